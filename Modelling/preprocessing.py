@@ -1,5 +1,9 @@
 import nltk
 import re
+import threading
+import multiprocessing
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
 from nltk.stem import WordNetLemmatizer
@@ -14,6 +18,9 @@ from nltk.tokenize import word_tokenize
 stop_words = set(stopwords.words('english'))
 lemmatizer = WordNetLemmatizer()
 
+_clean_pool = None
+_clean_pool_lock = threading.Lock()
+
 def textPreprocessing(text):
     text = re.sub(r'[^a-zA-Z\s]', '', text)
     text = text.lower()
@@ -39,4 +46,56 @@ def cleanTextPipeline(text):
     text = lemmatization(text)
     text = posTagging(text)
     text = ' '.join(text)
-    return text
\ No newline at end of file
+    return text
+
+@lru_cache(maxsize=100000)
+def lemmatizeWord(word):
+    return lemmatizer.lemmatize(word)
+
+def _cleanUniqueTexts(texts):
+    lemmatized = [tuple(lemmatizeWord(word) for word in textPreprocessing(text)) for text in texts]
+
+    # POS tags depend on the surrounding words, so they are memoized per token sequence, not per token
+    sentences = list(dict.fromkeys(lemmatized))
+    tagged = dict(zip(sentences, nltk.pos_tag_sents([list(sentence) for sentence in sentences])))
+
+    return [
+        ' '.join(word for word, tag in tagged[sentence] if tag.startswith('N') or tag.startswith('V'))
+        for sentence in lemmatized
+    ]
+
+def _clean_executor(workers):
+    global _clean_pool
+    with _clean_pool_lock:
+        if _clean_pool is None or _clean_pool._max_workers != workers:
+            if _clean_pool is not None:
+                _clean_pool.shutdown(wait=False)
+            # spawn, not fork: callers run in worker threads of a process that also holds model and event-loop threads
+            _clean_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _clean_pool
+
+def shutdown_clean_pool():
+    global _clean_pool
+    with _clean_pool_lock:
+        if _clean_pool is not None:
+            _clean_pool.shutdown(cancel_futures=True)
+            _clean_pool = None
+
+def cleanTextPipeline_batch(texts, workers=1, parallel_threshold=20000):
+    """
+    Same output as [cleanTextPipeline(text) for text in texts], computed once per distinct text
+    with one POS-tagger pass for the whole batch. Inputs with at least parallel_threshold
+    distinct texts are split across `workers` processes of a pool kept until shutdown_clean_pool().
+    """
+    texts = list(texts)
+    unique = list(dict.fromkeys(texts))
+
+    if workers > 1 and len(unique) >= parallel_threshold:
+        size = -(-len(unique) // workers)
+        chunks = [unique[i:i + size] for i in range(0, len(unique), size)]
+        cleaned = [text for chunk in _clean_executor(workers).map(_cleanUniqueTexts, chunks) for text in chunk]
+    else:
+        cleaned = _cleanUniqueTexts(unique)
+
+    mapping = dict(zip(unique, cleaned))
+    return [mapping[text] for text in texts]
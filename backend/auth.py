@@ -25,6 +25,8 @@ oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="auth/token", auto_error=
 SECRET_KEY = os.getenv('SECRET_KEY')
 ALGORITHM = os.getenv('ALGORITHM')
 TOKEN_EXPIRE_TIME = int(os.getenv('TOKEN_EXPIRE_TIME', 30))
+# Comma-separated usernames allowed to read the operational /metrics endpoints
+ADMIN_USERNAMES = {name.strip() for name in os.getenv('ADMIN_USERNAMES', '').split(',') if name.strip()}
 
 pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
 
@@ -148,6 +150,11 @@ def get_current_active_user(user: User = Depends(get_current_user)):
         raise HTTPException(status_code=400, detail="User not active")
     return user
 
+def get_admin_user(user: User = Depends(get_current_active_user)):
+    if user.username not in ADMIN_USERNAMES:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user
+
 router = APIRouter()
 
 @router.post("/register", response_model=UserResponse)
@@ -0,0 +1,61 @@
+"""
+Wall-clock scaling of the ARIMA order search with the number of worker processes.
+
+    python -m backend.benchmarks.arima_search
+    python -m backend.benchmarks.arima_search --workers 1 2 4 8
+    python -m backend.benchmarks.arima_search --search stepwise
+
+Every category of dataset/finance_time_series.csv is searched over the full (p, d, q) grid, or
+stepwise with --search stepwise, where d is taken from the ADF test as the forecast does. The
+pool is started before timing, so the numbers exclude process start-up, which the API pays once.
+Each run must choose the same orders as the serial search.
+"""
+import argparse
+import os
+import time
+import pandas as pd
+from backend.forecast.cleaner_shaping import cleaner_function, reshaping
+from backend.forecast.model import _fit_executor, arima_orders, check_stationary, find_best_arima_models, fit_aic
+
+DATASET_PATH = "dataset/finance_time_series.csv"
+
+def monthly_series(path = DATASET_PATH):
+    monthly = reshaping(cleaner_function(pd.read_csv(path)))
+    return {col: monthly[col].dropna() for col in monthly.columns if not col.endswith(" %") and col != "Total"}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--search", choices=["grid", "stepwise"], default="grid")
+    args = parser.parse_args()
+
+    series = monthly_series()
+    stationary = {col: check_stationary(data, col) for col, data in series.items()}
+    fits = sum(len(arima_orders(data)) for data in series.values())
+    print(f"{len(series)} categories, {fits} grid fits per search, {os.cpu_count()} cores")
+
+    baseline_time = None
+    baseline_orders = None
+    for workers in args.workers:
+        if workers > 1:
+            # Warm the pool: spawn and the statsmodels import happen once per process
+            sample = next(iter(series.values()))
+            list(_fit_executor(workers).map(fit_aic, [sample] * workers, [(0, 0, 0)] * workers))
+
+        timings = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            best = find_best_arima_models(series, workers = workers, search = args.search, stationary = stationary)
+            timings.append(time.perf_counter() - start)
+
+        elapsed = min(timings)
+        orders = {col: order for col, (order, _) in best.items()}
+        if baseline_time is None:
+            baseline_time, baseline_orders = elapsed, orders
+
+        print(f"search={args.search} workers={workers:<3} time={elapsed:>7.2f}s "
+              f"speedup={baseline_time / elapsed:>5.2f}x same_orders={orders == baseline_orders}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Accuracy / coverage trade-off of the cascade threshold.
+
+    python -m backend.benchmarks.cascade_threshold
+
+The fast model is trained on a split of the labelled datasets and evaluated on the rest. For
+every threshold it prints the share of rows the fast model would answer on its own, its accuracy
+on those rows, and (when backend/saved_model exists) the accuracy of the full cascade.
+"""
+import os
+import time
+import numpy as np
+from sklearn.model_selection import train_test_split
+from Modelling.preprocessing import cleanTextPipeline
+from Modelling.converter import l_t_id_converter, id_t_l_converter
+from backend.classification.cascade import LightWeightCategoryClassifier, load_training_data
+from backend.classification.category_cache import normalize_description
+from backend.benchmarks.inference_backends import MODEL_PATH, UNIQUE_LABELS, run_backend
+
+THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.99]
+
+def main():
+    df = load_training_data()
+    train_df, test_df = train_test_split(df, test_size=0.3, random_state=42, stratify=df["Category"])
+
+    fast_model = LightWeightCategoryClassifier().train(train_df["Description"], train_df["Category"])
+    labels = np.asarray(test_df["Category"].tolist())
+    keys = [normalize_description(text) for text in test_df["Description"]]
+
+    start = time.perf_counter()
+    fast_labels, fast_conf = fast_model.predictBatch(keys)
+    fast_seconds = time.perf_counter() - start
+    fast_labels = np.asarray(fast_labels)
+    print(f"fast model: {len(keys)} rows in {fast_seconds:.3f}s, accuracy={np.mean(fast_labels == labels):.4f}")
+
+    transformer_labels = None
+    if os.path.isdir(MODEL_PATH):
+        id_to_label = id_t_l_converter(l_t_id_converter(UNIQUE_LABELS))
+        predicted, _, elapsed = run_backend("torch", [cleanTextPipeline(key) for key in keys], batch_size=64)
+        transformer_labels = np.asarray([id_to_label[int(p)] for p in predicted])
+        print(f"transformer: {len(keys)} rows in {elapsed:.3f}s, accuracy={np.mean(transformer_labels == labels):.4f}")
+
+    print(f"\n{'threshold':>9} {'fast rows':>10} {'fast acc':>9} {'cascade acc':>12}")
+    for threshold in THRESHOLDS:
+        accepted = fast_conf >= threshold
+        fast_accuracy = np.mean(fast_labels[accepted] == labels[accepted]) if accepted.any() else float("nan")
+
+        cascade = ""
+        if transformer_labels is not None:
+            combined = np.where(accepted, fast_labels, transformer_labels)
+            cascade = f"{np.mean(combined == labels):.4f}"
+
+        print(f"{threshold:>9.2f} {accepted.mean():>10.1%} {fast_accuracy:>9.4f} {cascade:>12}")
+
+if __name__ == "__main__":
+    main()
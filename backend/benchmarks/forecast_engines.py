@@ -0,0 +1,78 @@
+"""
+Accuracy and latency of the forecast engines on dataset/finance_time_series.csv.
+
+    python -m backend.benchmarks.forecast_engines
+    python -m backend.benchmarks.forecast_engines --users 200 --arima-users 3
+
+Accuracy: every engine is fitted on all but the last month and scored on the held-out month.
+Latency: one user, then `--users` synthetic users (the dataset's series with per-user scale and
+noise). statsforecast engines forecast all users in one call; the ARIMA engines run user by user,
+so they are timed on `--arima-users` of them and reported per user.
+"""
+import argparse
+import contextlib
+import io
+import time
+import numpy as np
+from backend.benchmarks.arima_search import monthly_series
+from backend.forecast.model import ARIMA_SEARCHES, FORECAST_ENGINES, arima_forecasts
+from backend.forecast.statsforecast_engine import statsforecast_forecasts, statsforecast_forecasts_many
+
+def forecast(engine, series):
+    # The engines log every category; keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        if engine in ARIMA_SEARCHES:
+            return arima_forecasts(series, ARIMA_SEARCHES[engine])[0]
+        return statsforecast_forecasts(series, engine)[0]
+
+def synthetic_users(series, users, seed = 0):
+    rng = np.random.default_rng(seed)
+    return {
+        user: {
+            col: (data * rng.lognormal(0, 0.3) * rng.normal(1, 0.1, len(data))).clip(lower = 0)
+            for col, data in series.items()
+        }
+        for user in range(users)
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--engines", nargs="+", default=list(FORECAST_ENGINES))
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--arima-users", type=int, default=2)
+    args = parser.parse_args()
+
+    series = monthly_series()
+    train = {col: data.iloc[:-1] for col, data in series.items()}
+    actual = {col: data.iloc[-1] for col, data in series.items()}
+    print(f"{len(series)} categories, {len(next(iter(series.values())))} months, held out {next(iter(series.values())).index[-1]:%Y-%m}")
+
+    for engine in args.engines:
+        start = time.perf_counter()
+        predicted = forecast(engine, train)
+        elapsed = time.perf_counter() - start
+
+        errors = np.array([predicted[col] - actual[col] for col in series])
+        scale = np.array([abs(actual[col]) for col in series])
+        mape = np.mean(np.abs(errors[scale > 0]) / scale[scale > 0]) * 100
+        print(f"{engine:<14} 1 user  time={elapsed:>7.2f}s MAE={np.mean(np.abs(errors)):>10.2f} MAPE={mape:>6.2f}%")
+
+    users = synthetic_users(series, args.users)
+    for engine in args.engines:
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            if engine in ARIMA_SEARCHES:
+                timed_users = list(users)[:args.arima_users]
+                for user in timed_users:
+                    arima_forecasts(users[user], ARIMA_SEARCHES[engine])
+            else:
+                timed_users = list(users)
+                statsforecast_forecasts_many(users, engine)
+            elapsed = time.perf_counter() - start
+
+        per_user = elapsed / len(timed_users)
+        print(f"{engine:<14} {len(timed_users):>4} users time={elapsed:>7.2f}s per_user={per_user * 1000:>8.1f}ms "
+              f"projected_{args.users}_users={per_user * args.users:>8.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Parity and throughput of the classifier inference backends.
+
+    python -m backend.benchmarks.inference_backends --rows 2000
+
+Every backend classifies the same cleaned eSewa descriptions; predictions are compared
+against the fp32 PyTorch model and against the labelled categories in the dataset.
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from Modelling.converter import l_t_id_converter, id_t_l_converter
+from Modelling.preprocessing import cleanTextPipeline
+from backend.classification.batch_inference import BatchInferenceEngine
+from backend.classification.inference_backends import INFERENCE_BACKENDS, load_inference_model
+
+MODEL_PATH = os.path.abspath("backend/saved_model")
+DATASET_PATH = "dataset/esewa_transactions_balanced_final.csv"
+UNIQUE_LABELS = ['Personal Care', 'Income', 'Banking & Finance', 'Dining & Food', 'Groceries & Shopping', 'Subscriptions', 'others', 'Entertainment', 'Travel', 'Education']
+
+def run_backend(backend, texts, batch_size):
+    tokenizer, model = load_inference_model(MODEL_PATH, backend)
+    engine = BatchInferenceEngine(model, tokenizer, batch_size=batch_size)
+
+    # Warm-up so session creation and lazy kernel init are not billed to the timed run
+    engine.predict(texts[:batch_size])
+
+    start = time.perf_counter()
+    predicted, confidences = engine.predict(texts)
+    elapsed = time.perf_counter() - start
+
+    return predicted, confidences, elapsed
+
+def check_parity(reference, candidate, min_agreement=0.99, max_confidence_diff=0.05):
+    ref_pred, ref_conf = reference
+    cand_pred, cand_conf = candidate
+
+    agreement = float(np.mean(ref_pred == cand_pred))
+    same = ref_pred == cand_pred
+    confidence_diff = float(np.max(np.abs(ref_conf[same] - cand_conf[same]))) if same.any() else 0.0
+
+    return {
+        "agreement": agreement,
+        "max_confidence_diff": confidence_diff,
+        "ok": agreement >= min_agreement and confidence_diff <= max_confidence_diff
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--backends", nargs="+", default=list(INFERENCE_BACKENDS))
+    args = parser.parse_args()
+
+    df = pd.read_csv(DATASET_PATH).dropna(subset=["Description"])
+    if args.rows:
+        df = df.head(args.rows)
+
+    label_to_id = l_t_id_converter(UNIQUE_LABELS)
+    id_to_label = id_t_l_converter(label_to_id)
+    texts = [cleanTextPipeline(text) for text in df["Description"]]
+    labels = df["Category"].tolist()
+
+    outputs = {}
+    for backend in args.backends:
+        predicted, confidences, elapsed = run_backend(backend, texts, args.batch_size)
+        outputs[backend] = (predicted, confidences)
+        accuracy = np.mean([id_to_label[int(p)] == label for p, label in zip(predicted, labels)])
+        print(f"{backend:<10} rows={len(texts):>6} time={elapsed:>7.2f}s rows/s={len(texts) / elapsed:>9.1f} accuracy={accuracy:.4f}")
+
+    if "torch" not in outputs:
+        return 0
+
+    failed = False
+    for backend, candidate in outputs.items():
+        if backend == "torch":
+            continue
+        parity = check_parity(outputs["torch"], candidate)
+        failed = failed or not parity["ok"]
+        print(f"{backend:<10} vs torch: agreement={parity['agreement']:.4f} max_confidence_diff={parity['max_confidence_diff']:.4f} {'OK' if parity['ok'] else 'FAIL'}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
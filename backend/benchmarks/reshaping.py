@@ -0,0 +1,87 @@
+"""
+Cleaning and monthly reshaping of raw statements, row-wise against vectorized.
+
+    python -m backend.benchmarks.reshaping
+    python -m backend.benchmarks.reshaping --rows 10000 100000 1000000 --repeats 5
+
+Synthetic statements shaped like dataset/finance_time_series.csv (string timestamps over two
+years, newest first, padded headers, a few incomplete rows) go through cleaner_function and
+reshaping. The row-wise implementation the module used to have is kept below as the reference;
+both must produce the same frame.
+"""
+import argparse
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from backend.forecast.cleaner_shaping import cleaner_function, reshaping
+
+CATEGORIES = ["Banking & Finance", "Dining & Food", "Education", "Entertainment", "Groceries & Shopping",
+              "Housing & Utilities", "Income", "Personal Care", "Subscriptions", "Travel"]
+
+def rowwise_cleaner_function(df):
+    df.columns = df.columns.str.strip()
+    df = df.dropna(subset = ["Date Time", "Dr.", "Cr.", "Category"])
+    df["Date Time"] = pd.to_datetime(df["Date Time"])
+    df.set_index("Date Time", inplace = True)
+    df.sort_index(inplace = True)
+    return df
+
+def rowwise_reshaping(df):
+    monthly = df.groupby([pd.Grouper(freq = "ME"), "Category"])["Dr."].sum().unstack(fill_value = 0)
+    for cat in monthly.columns:
+        if sum(monthly[cat]) == 0:
+            monthly.drop([cat], axis = 1, inplace = True)
+
+    monthly["Total"] = monthly.apply(lambda row: sum(row, 0), axis = 1)
+    for col in monthly.columns:
+        monthly[f"{col} %"] = monthly.apply(lambda row: row[col] / row["Total"] * 100, axis = 1)
+    return monthly
+
+def statements(rows, seed = 0):
+    rng = np.random.default_rng(seed)
+    seconds = np.sort(rng.integers(0, 730 * 86400, rows))[::-1]
+    category = rng.choice(CATEGORIES, rows)
+    amount = np.round(rng.lognormal(6, 1, rows), 2)
+    income = category == "Income"
+
+    df = pd.DataFrame({
+        "Reference Code": np.arange(rows).astype(str),
+        "Date Time": (pd.Timestamp("2024-01-01") + pd.to_timedelta(seconds, unit = "s")).strftime("%Y-%m-%d %H:%M:%S"),
+        "Description": "Paid for " + pd.Series(category),
+        "Dr. ": np.where(income, 0.0, amount),
+        "Cr. ": np.where(income, amount, 0.0),
+        "Category": category
+    })
+    df.loc[::1000, "Category"] = None
+    return df
+
+def timed(clean, reshape, raw, repeats):
+    timings = []
+    for _ in range(repeats):
+        df = raw.copy()
+        start = time.perf_counter()
+        monthly = reshape(clean(df))
+        timings.append(time.perf_counter() - start)
+    return min(timings), monthly
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    # The reference assigns into a dropna result, which pandas warns about
+    warnings.simplefilter("ignore", pd.errors.SettingWithCopyWarning)
+    for rows in args.rows:
+        raw = statements(rows)
+        rowwise_time, expected = timed(rowwise_cleaner_function, rowwise_reshaping, raw, args.repeats)
+        vectorized_time, monthly = timed(cleaner_function, reshaping, raw, args.repeats)
+
+        # Total is a pairwise numpy sum instead of a left-to-right one, so it can differ in the last bits
+        pd.testing.assert_frame_equal(monthly, expected, check_freq = False, rtol = 1e-12)
+        print(f"rows={rows:>9,} months={len(monthly):>3} rowwise={rowwise_time * 1000:>9.1f}ms "
+              f"vectorized={vectorized_time * 1000:>9.1f}ms speedup={rowwise_time / vectorized_time:>5.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+cleanTextPipeline vs cleanTextPipeline_batch on the eSewa dataset.
+
+    python -m backend.benchmarks.text_cleaning --repeat 10 --workers 4
+
+--repeat tiles the 5k rows so the process-pool path can be measured as well.
+"""
+import argparse
+import os
+import time
+import pandas as pd
+from Modelling.preprocessing import cleanTextPipeline, cleanTextPipeline_batch, lemmatizeWord
+
+DATASET_PATH = "dataset/esewa_transactions_balanced_final.csv"
+
+def letters(i):
+    word = ""
+    while True:
+        word = chr(97 + i % 26) + word
+        i //= 26
+        if not i:
+            return word
+
+def timed(label, func, texts, baseline=None):
+    start = time.perf_counter()
+    output = func(texts)
+    elapsed = time.perf_counter() - start
+
+    speedup = f"{baseline / elapsed:>6.1f}x" if baseline else "      -"
+    print(f"{label:<28} rows={len(texts):>7} time={elapsed:>8.3f}s speedup={speedup}")
+    return output, elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    texts = pd.read_csv(DATASET_PATH)["Description"].dropna().astype(str).tolist() * args.repeat
+    # Suffix every row with a unique word so dedup alone cannot explain the batch/parallel speedup
+    distinct = [f"{text} {letters(i)}" for i, text in enumerate(texts)]
+
+    reference, baseline = timed("cleanTextPipeline (loop)", lambda t: [cleanTextPipeline(x) for x in t], texts)
+
+    lemmatizeWord.cache_clear()
+    batched, _ = timed("batch (cold lemma cache)", cleanTextPipeline_batch, texts, baseline)
+    assert batched == reference, "batch output differs from cleanTextPipeline"
+
+    timed("batch (warm lemma cache)", cleanTextPipeline_batch, texts, baseline)
+
+    _, distinct_baseline = timed("loop, distinct texts", lambda t: [cleanTextPipeline(x) for x in t], distinct)
+    timed("batch, distinct texts", cleanTextPipeline_batch, distinct, distinct_baseline)
+    timed(f"batch, {args.workers} workers", lambda t: cleanTextPipeline_batch(t, workers=args.workers, parallel_threshold=1), distinct, distinct_baseline)
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,41 @@
 from sqlalchemy.ext.asyncio import AsyncSession
+import json
 import pandas as pd
-from backend.database import Budget
+from backend.database import Budget, ForecastModel, dialect_insert
 import traceback
 from datetime import datetime
-from sqlalchemy import delete
+from sqlalchemy import delete, select
 
 async def forecastTransactions(user_id: int, forecast_month: str, df: pd.DataFrame, db: AsyncSession):
-    for _, row in df.iterrows():
-        bdt = Budget(
-            user_id = int(user_id),
-            month = str(forecast_month),
-            allocated = float(row['Budget_Amount']),
-            forecast = float(row['Forecasted_Amount']),
-            category = str(row['Category']),
-        )
-
-        db.add(bdt)
-
-        try:
-            await db.flush()
-            await db.commit()
-        
-        except Exception as e:
-            await db.rollback()
-            print(f"\nCommit failed: {e}\n")
-            traceback.print_exc()
-            raise
+    rows = [
+        {
+            "user_id": int(user_id),
+            "month": str(forecast_month),
+            "allocated": float(allocated),
+            "forecast": float(forecasted),
+            "category": str(category)
+        }
+        for category, allocated, forecasted in zip(df['Category'], df['Budget_Amount'], df['Forecasted_Amount'])
+    ]
+    if not rows:
+        return
+
+    # One statement for the whole month; re-running a forecast overwrites that month's rows in place
+    insert = dialect_insert(db)(Budget)
+    stmt = insert.on_conflict_do_update(
+        index_elements = ["user_id", "month", "category"],
+        set_ = {"allocated": insert.excluded.allocated, "forecast": insert.excluded.forecast}
+    )
+
+    try:
+        await db.execute(stmt, rows)
+        await db.commit()
+
+    except Exception as e:
+        await db.rollback()
+        print(f"\nCommit failed: {e}\n")
+        traceback.print_exc()
+        raise
 
 async def deleteBudget(db: AsyncSession):
     today = datetime.today().replace(day = 1)
@@ -33,4 +43,42 @@ async def deleteBudget(db: AsyncSession):
 
     stmt = delete(Budget).where(Budget.month < cutoff_date)
     await db.execute(stmt)
-    await db.commit()
\ No newline at end of file
+    await db.commit()
+async def loadForecastModels(user_id: int, db: AsyncSession):
+    """{category: {"order", "params", "aic", "n_obs"}} of the user's last ARIMA fits."""
+    rows = await db.execute(select(ForecastModel).where(ForecastModel.user_id == user_id))
+    return {
+        row.category: {"order": json.loads(row.arima_order), "params": json.loads(row.params), "aic": row.aic, "n_obs": row.n_obs}
+        for row in rows.scalars()
+    }
+
+async def saveForecastModels(user_id: int, models: dict, db: AsyncSession):
+    rows = [
+        {
+            "user_id": int(user_id),
+            "category": str(category),
+            "arima_order": json.dumps([int(x) for x in model["order"]]),
+            "params": json.dumps([float(x) for x in model["params"]]),
+            "aic": float(model["aic"]),
+            "n_obs": int(model["n_obs"]),
+            "updated_at": datetime.utcnow()
+        }
+        for category, model in models.items()
+    ]
+    if not rows:
+        return
+
+    insert = dialect_insert(db)(ForecastModel)
+    stmt = insert.on_conflict_do_update(
+        index_elements = ["user_id", "category"],
+        set_ = {col: insert.excluded[col] for col in ["arima_order", "params", "aic", "n_obs", "updated_at"]}
+    )
+
+    try:
+        await db.execute(stmt, rows)
+        await db.commit()
+
+    except Exception as e:
+        # Losing the warm start only costs the next refit a full search
+        await db.rollback()
+        print(f"\nSaving forecast models failed: {e}\n")
@@ -1,22 +1,103 @@
-from backend.database import ChatHistory
+import os
+import asyncio
+from datetime import datetime
+from backend.database import ChatHistory, SessionLocal
 from collections import defaultdict
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert
+
+CHAT_HISTORY_BATCH_SIZE = int(os.getenv("CHAT_HISTORY_BATCH_SIZE", 50))
+CHAT_HISTORY_FLUSH_SECONDS = float(os.getenv("CHAT_HISTORY_FLUSH_SECONDS", 2))
+# Rows held while the database is unreachable; the oldest are dropped past this
+CHAT_HISTORY_MAX_BUFFER = int(os.getenv("CHAT_HISTORY_MAX_BUFFER", 10000))
 
 conversation_memory = defaultdict(list)
 
-async def save_memory(db: AsyncSession, user_id: int, role: str, text: str):
+class ChatHistoryWriter:
+    """
+    Buffers ChatHistory rows and writes them in one INSERT per batch from a background task,
+    so /chat answers without waiting on commits. A batch is flushed when `batch_size` rows are
+    buffered or every `flush_interval` seconds, and whatever is left is flushed on shutdown.
+    """
+
+    def __init__(self, batch_size: int = CHAT_HISTORY_BATCH_SIZE, flush_interval: float = CHAT_HISTORY_FLUSH_SECONDS,
+                 max_buffer: int = CHAT_HISTORY_MAX_BUFFER, session_factory = SessionLocal):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.session_factory = session_factory
+        self.buffer = []
+        self.written = 0
+        self._task = None
+        self._wake = None
+        self._lock = None
+        self._stopping = False
+
+    def add(self, user_id: int, role: str, text: str):
+        # The timestamp is taken now, not at flush time, so history keeps the order of the conversation
+        self.buffer.append({"user_id": user_id, "role": role, "text": text, "timestamp": datetime.utcnow()})
+        if len(self.buffer) > self.max_buffer:
+            dropped = len(self.buffer) - self.max_buffer
+            del self.buffer[:dropped]
+            print(f"⚠️ Chat history buffer full, dropped {dropped} oldest rows")
+        if len(self.buffer) >= self.batch_size and self._wake is not None:
+            self._wake.set()
+
+    def start(self):
+        # Created here so the event and lock bind to the running event loop
+        if self._task is None:
+            self._stopping = False
+            self._wake = asyncio.Event()
+            self._lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout = self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            rows, self.buffer = self.buffer, []
+            if not rows:
+                return 0
+
+            try:
+                async with self.session_factory() as db:
+                    await db.execute(insert(ChatHistory), rows)
+                    await db.commit()
+            except Exception as e:
+                # Put the batch back in front of anything buffered meanwhile and retry on the next flush
+                self.buffer = rows + self.buffer
+                print(f"\nChat history write failed: {e}\n")
+                return 0
+
+            self.written += len(rows)
+            return len(rows)
+
+    async def shutdown(self):
+        # Stopped by waking the loop rather than cancelling it, so a batch mid-write is not lost
+        if self._task is not None:
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+chat_history_writer = ChatHistoryWriter()
+
+def save_memory(user_id: int, role: str, text: str):
     if not user_id:
         return
-    new_entry = ChatHistory(
-        user_id = user_id,
-        role = role,
-        text = text
-    )
-
-    db.add(new_entry)
-    await db.commit()
+    chat_history_writer.add(user_id, role, text)
 
 def memory_update(user_id: int, role: str, text: str):
     conversation_memory[user_id].append({"role": role, "text": text})
     if len(conversation_memory[user_id]) > 5:
-        conversation_memory[user_id] = conversation_memory[user_id][-5:]
\ No newline at end of file
+        conversation_memory[user_id] = conversation_memory[user_id][-5:]
@@ -1,6 +1,25 @@
+import os
+import csv
 import pandas as pd
 import numpy as np
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 from io import BytesIO
+from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from pandas.io.parsers import TextParser
+
+HEADER_KEYWORDS = ["description", "date", "dr.", "cr.", "balance"]
+HEADER_SCAN_ROWS = 15
+STATEMENT_CHUNK_ROWS = int(os.getenv("STATEMENT_CHUNK_ROWS", 5000))
+CSV_PREVIEW_BYTES = 64 * 1024
+
+# Leading bytes of each container format; anything else is treated as CSV text
+FORMAT_SIGNATURES = [
+    (b"PK\x03\x04", "xlsx"),
+    (b"PAR1", "parquet"),
+    (b"\xd0\xcf\x11\xe0", "xls")
+]
 
 def clean_transactions(df):
     df = df[df[['Dr.', 'Cr.', 'Balance (NPR)']].notna().any(axis=1)]
@@ -8,19 +27,175 @@ def clean_transactions(df):
     df = df.replace({pd.NaT: None, np.nan: None, 'nan': None})
     return df
 
-def read_excel_dynamic(file_bytes: bytes):
-    preview_df = pd.read_excel(BytesIO(file_bytes), header=None, nrows=15)
+def _convert_cell(cell):
+    # Same conversions pandas' openpyxl reader applies, so chunks parse exactly like pd.read_excel
+    if cell.value is None:
+        return ""
+    elif cell.data_type == TYPE_ERROR:
+        return np.nan
+    elif cell.data_type == TYPE_NUMERIC:
+        value = int(cell.value)
+        if value == cell.value:
+            return value
+        return float(cell.value)
+    return cell.value
+
+def _sheet_rows(source):
+    workbook = load_workbook(source, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook.worksheets[0]
+        sheet.reset_dimensions()
+        for row in sheet.rows:
+            converted = [_convert_cell(cell) for cell in row]
+            while converted and converted[-1] == "":
+                converted.pop()
+            yield converted
+    finally:
+        workbook.close()
+
+def _is_header(row):
+    return any(isinstance(value, str) and value.lower() in HEADER_KEYWORDS for value in row)
+
+def _to_frame(header, rows):
+    # Cells past the header width are dropped; pandas would only have named them "Unnamed: n"
+    width = len(header)
+    data = [header] + [row[:width] + [""] * (width - len(row)) for row in rows]
+    return TextParser(data, header=0, skip_blank_lines=False).read()
+
+def detect_statement_format(source):
+    """Sniff the format of a seekable binary file from its leading bytes, leaving the position at 0."""
+    signature = source.read(8)
+    source.seek(0)
+    for magic, file_format in FORMAT_SIGNATURES:
+        if signature.startswith(magic):
+            return file_format
+    return "csv"
+
+def _excel_chunks(source, chunk_rows):
+    rows = _sheet_rows(source)
 
-    header_row = None
-    for i, row in preview_df.iterrows():
-        row_str = row.astype(str).str.lower().tolist()
-        if any(keyword in row_str for keyword in ["description", "date", "dr.", "cr.", "balance"]):
-            header_row = i
+    preview = []
+    for row in rows:
+        preview.append(row)
+        if _is_header(row) or len(preview) == HEADER_SCAN_ROWS:
             break
 
-    if header_row is None:
-        header_row = 0
+    if not preview:
+        raise ValueError("Statement has no rows")
+
+    header_row = next((i for i, row in enumerate(preview) if _is_header(row)), 0)
+    header = preview[header_row]
+
+    buffer = preview[header_row + 1:]
+    blank_rows = 0
+    chunks = 0
+    for row in rows:
+        # Blank rows are held back so trailing ones are trimmed the way pandas does
+        if not row:
+            blank_rows += 1
+            continue
+        for pending in [[]] * blank_rows + [row]:
+            buffer.append(pending)
+            if len(buffer) >= chunk_rows:
+                yield _to_frame(header, buffer)
+                buffer = []
+                chunks += 1
+        blank_rows = 0
+
+    while buffer and not buffer[-1]:
+        buffer.pop()
+
+    if buffer or not chunks:
+        yield _to_frame(header, buffer)
+
+def _csv_header_row(source):
+    preview = source.read(CSV_PREVIEW_BYTES).decode("utf-8-sig", errors="replace")
+    source.seek(0)
+
+    # csv.reader returns [] for blank lines, so the index lines up with pyarrow's skip_rows
+    for i, row in enumerate(csv.reader(preview.splitlines())):
+        if i == HEADER_SCAN_ROWS:
+            break
+        if _is_header(row):
+            return i
+    return 0
 
-    df = pd.read_excel(BytesIO(file_bytes), header=header_row)
+def _table_chunks(table, chunk_rows):
+    if table.num_rows == 0:
+        yield table.to_pandas()
+        return
+    for offset in range(0, table.num_rows, chunk_rows):
+        yield table.slice(offset, chunk_rows).to_pandas()
 
-    return df
\ No newline at end of file
+def _csv_chunks(source, chunk_rows):
+    header_row = _csv_header_row(source)
+
+    # Footer lines such as "Total,,500" have fewer columns than the header; skip them instead of failing the file
+    skipped = []
+    def skip_ragged_row(row):
+        skipped.append(row.number)
+        return "skip"
+
+    # read_csv parses blocks on all cores; only the Arrow table is held, not a pandas copy of it
+    table = pa_csv.read_csv(
+        source,
+        read_options=pa_csv.ReadOptions(skip_rows=header_row, use_threads=True),
+        parse_options=pa_csv.ParseOptions(invalid_row_handler=skip_ragged_row),
+        convert_options=pa_csv.ConvertOptions(strings_can_be_null=True)
+    )
+    if skipped:
+        print(f"⚠️ Skipped {len(skipped)} CSV rows with the wrong number of columns")
+
+    yield from _table_chunks(table, chunk_rows)
+
+def _parquet_chunks(source, chunk_rows):
+    # Parquet carries a typed schema, so its column names are the header
+    parquet_file = pq.ParquetFile(source)
+    batches = 0
+    for batch in parquet_file.iter_batches(batch_size=chunk_rows, use_threads=True):
+        batches += 1
+        yield batch.to_pandas()
+    if not batches:
+        yield parquet_file.schema_arrow.empty_table().to_pandas()
+
+def _xls_chunks(source, chunk_rows):
+    # Legacy .xls has no streaming reader; pandas (xlrd) parses it whole, as read_excel_dynamic used to
+    preview = pd.read_excel(source, header=None, nrows=HEADER_SCAN_ROWS)
+    source.seek(0)
+    header_row = next((i for i, row in preview.iterrows() if _is_header(row.astype(str).str.lower().tolist())), 0)
+
+    df = pd.read_excel(source, header=header_row)
+    if df.empty:
+        yield df
+        return
+    for offset in range(0, len(df), chunk_rows):
+        yield df.iloc[offset:offset + chunk_rows]
+
+STATEMENT_READERS = {
+    "xlsx": _excel_chunks,
+    "xls": _xls_chunks,
+    "csv": _csv_chunks,
+    "parquet": _parquet_chunks
+}
+
+def read_statement_chunks(source, chunk_rows: int = STATEMENT_CHUNK_ROWS):
+    """
+    Read a statement in a single streaming pass and yield DataFrames of at most `chunk_rows` rows.
+
+    Excel (.xlsx, and legacy .xls read whole by pandas), CSV and Parquet are told apart by their
+    leading bytes. For sheets and CSV the header is the first of the opening HEADER_SCAN_ROWS rows
+    that names a statement column, falling back to the first row like read_excel_dynamic always did.
+
+    `source` is a seekable binary file object or the raw bytes of the upload.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+
+    file_format = detect_statement_format(source)
+    if file_format not in STATEMENT_READERS:
+        raise ValueError(f"Unsupported statement format: {file_format}")
+
+    yield from STATEMENT_READERS[file_format](source, chunk_rows)
+
+def read_excel_dynamic(file_bytes: bytes):
+    return pd.concat(read_statement_chunks(file_bytes), ignore_index=True)
@@ -1,14 +1,30 @@
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from backend.database import SessionLocal, Transaction, Budget 
+from backend.database import SessionLocal, Transaction, Budget, MonthlyCategoryTotal
 
 async def get_user_docs(db: AsyncSession, user_id: int):
-    txns = await db.execute(select(Transaction).where(Transaction.user_id == user_id))
+    """One doc per monthly category total, then every transaction of the user's history, then budgets."""
+    totals = await db.execute(
+        select(MonthlyCategoryTotal)
+        .where(MonthlyCategoryTotal.user_id == user_id)
+        .order_by(MonthlyCategoryTotal.month, MonthlyCategoryTotal.category)
+    )
+    txns = await db.execute(
+        select(Transaction)
+        .where(Transaction.user_id == user_id)
+        .order_by(Transaction.date_time)
+    )
     budgets = await db.execute(select(Budget).where(Budget.user_id == user_id))
 
     docs = []
 
-    for txn in txns.scalars(): 
+    for total in totals.scalars():
+        docs.append({
+            "text": f"{total.category} in {total.month:%B %Y}: spent {total.debit:.2f}, received {total.credit:.2f} across {total.count} transactions",
+            "metadata": {"table": "monthly_category_totals", "id": total.id, "user_id": user_id}
+        })
+
+    for txn in txns.scalars():
         docs.append({
             "text": f"Transaction on {txn.date_time}: {txn.description}. Amount: {txn.amount} ({txn.type}), Category: {txn.category}, Balance: {txn.balance}",
             "metadata": {"table": "transactions", "id": txn.id, "user_id": user_id}
@@ -26,9 +42,9 @@ if __name__ == "__main__":
     import asyncio
 
     async def main():
-        async with SessionLocal() as session: 
+        async with SessionLocal() as session:
             docs = await get_user_docs(session, user_id=1)
             for doc in docs:
                 print(doc)
 
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
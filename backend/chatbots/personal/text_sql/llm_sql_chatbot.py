@@ -1,10 +1,10 @@
-import asyncpg
 from datetime import datetime
 import json
 from openai import OpenAI
 from typing import Dict, List, Optional
 import asyncio
 from .config import data_db
+from backend.connection_pool import ConnectionPool
 import os
 from dotenv import load_dotenv
 
@@ -12,11 +12,35 @@ load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# Few-shot examples for generate_sql_query. backend/tests/test_query_plans.py checks that each one
+# is answered from an index, so keep their filters index-friendly when editing them.
+SQL_EXAMPLES = [
+    ("How much did I spend on groceries last month?",
+     "SELECT COALESCE(SUM(debit), 0) as total_spending FROM monthly_category_totals WHERE user_id = {user_id} AND category ILIKE '%groceries%' AND category ILIKE '%shopping' AND month = DATE_TRUNC('month', CURRENT_DATE - INTERVAL '1 month')::date"),
+    ("Show my last 10 transactions",
+     "SELECT date_time, description, amount, type, category, balance FROM transactions WHERE user_id = {user_id} ORDER BY date_time DESC LIMIT 10"),
+    ("What's my budget status?",
+     "SELECT b.category, b.allocated as budget_amount, COALESCE(m.debit, 0) as spent_amount, (b.allocated - COALESCE(m.debit, 0)) as remaining, b.forecast FROM budgets b LEFT JOIN monthly_category_totals m ON m.user_id = b.user_id AND m.category = b.category AND m.month = DATE_TRUNC('month', b.month::timestamp)::date WHERE b.user_id = {user_id}"),
+    ("How much did I earn last month?",
+     "SELECT COALESCE(SUM(credit), 0) as total_income FROM monthly_category_totals WHERE user_id = {user_id} AND month = DATE_TRUNC('month', CURRENT_DATE - INTERVAL '1 month')::date"),
+    ("My account balance",
+     "SELECT balance FROM transactions WHERE user_id = {user_id} ORDER BY date_time DESC, id DESC LIMIT 1"),
+    ("Total spending this month",
+     "SELECT COALESCE(SUM(debit), 0) as total_spending FROM monthly_category_totals WHERE user_id = {user_id} AND month = DATE_TRUNC('month', CURRENT_DATE)::date"),
+    ("How much did I spend on food?",
+     "SELECT COALESCE(SUM(debit), 0) as total_spending FROM monthly_category_totals WHERE user_id = {user_id} AND category ILIKE '%food%'"),
+    ("Show my travel expenses this month",
+     "SELECT date_time, description, amount, balance FROM transactions WHERE user_id = {user_id} AND category ILIKE '%travel%' AND type = 'expense' AND date_time >= DATE_TRUNC('month', CURRENT_DATE) ORDER BY date_time DESC"),
+    ("What did I spend at Foodmandu?",
+     "SELECT date_time, description, amount, category FROM transactions WHERE user_id = {user_id} AND description ILIKE '%foodmandu%' AND type = 'expense' ORDER BY date_time DESC"),
+    ("My spending breakdown this month",
+     "SELECT category, debit as total, count as transaction_count FROM monthly_category_totals WHERE user_id = {user_id} AND debit > 0 AND month = DATE_TRUNC('month', CURRENT_DATE)::date ORDER BY total DESC")
+]
+
 class test_sql:
-    def __init__(self, db_config: dict, openai_api_key: str):
-        self.db_config = db_config
+    def __init__(self, pool: ConnectionPool, openai_api_key: str):
+        self.pool = pool
         self.client = OpenAI(api_key=openai_api_key)
-        self.conn = None
         self.schema = """
 DATABASE SCHEMA FOR PERSONAL FINANCE APPLICATION:
 
@@ -43,44 +67,44 @@ Columns:
   - forecast (numeric): Forecasted spending for the category
   - category (text): Budget category name
 
+Table: monthly_category_totals
+Columns:
+  - user_id (integer): User ID (ALWAYS filter by this!)
+  - month (date): First day of the month
+  - category (text): Transaction category
+  - debit (numeric): Total spent (expenses) in this category and month
+  - credit (numeric): Total received (income) in this category and month
+  - count (integer): Number of transactions in this category and month
+
 CRITICAL RULES:
 1. ALWAYS include WHERE user_id = {user_id} in every query
-2. For spending/expense queries: use WHERE type = 'expense' AND amount > 0
-3. For income queries: use WHERE type = 'income' AND amount > 0
+2. For spending/expense queries on transactions: use WHERE type = 'expense' AND amount > 0 (on monthly_category_totals, spending is SUM(debit); it has no type or amount column)
+3. For income queries on transactions: use WHERE type = 'income' AND amount > 0 (on monthly_category_totals, income is SUM(credit))
 4. Categories have spaces and special characters - use ILIKE '%keyword%' for matching
 5. Use COALESCE(SUM(...), 0) to handle NULL values in aggregations
 6. The date/time column is called 'date_time' (not 'date')
-7. Use CAST(date_time AS DATE) when comparing dates only
+7. Compare date_time directly with timestamps (date_time >= X AND date_time < Y); never wrap date_time in CAST or DATE_TRUNC, so the (user_id, date_time) index can be used
+8. For totals by month and/or category use monthly_category_totals (SUM(debit) for spending, SUM(credit) for income) instead of summing transactions
+9. Use transactions only for individual transactions, descriptions, balances, or date ranges that are not whole months
 
 DATE FILTERS (using date_time column):
-- Last month: CAST(date_time AS DATE) >= DATE_TRUNC('month', CURRENT_DATE - INTERVAL '1 month')::date AND CAST(date_time AS DATE) < DATE_TRUNC('month', CURRENT_DATE)::date
-- This month: CAST(date_time AS DATE) >= DATE_TRUNC('month', CURRENT_DATE)::date
-- Last week: CAST(date_time AS DATE) >= CURRENT_DATE - INTERVAL '7 days'
-- Today: CAST(date_time AS DATE) = CURRENT_DATE
-- Yesterday: CAST(date_time AS DATE) = CURRENT_DATE - INTERVAL '1 day'
+- Last month: date_time >= DATE_TRUNC('month', CURRENT_DATE - INTERVAL '1 month') AND date_time < DATE_TRUNC('month', CURRENT_DATE)
+- This month: date_time >= DATE_TRUNC('month', CURRENT_DATE)
+- Last week: date_time >= CURRENT_DATE - INTERVAL '7 days'
+- Today: date_time >= CURRENT_DATE AND date_time < CURRENT_DATE + INTERVAL '1 day'
+- Yesterday: date_time >= CURRENT_DATE - INTERVAL '1 day' AND date_time < CURRENT_DATE
+
+MONTH FILTERS (using monthly_category_totals.month):
+- Last month: month = DATE_TRUNC('month', CURRENT_DATE - INTERVAL '1 month')::date
+- This month: month = DATE_TRUNC('month', CURRENT_DATE)::date
+- Last 3 months: month >= DATE_TRUNC('month', CURRENT_DATE - INTERVAL '3 months')::date AND month < DATE_TRUNC('month', CURRENT_DATE)::date
 
 BUDGET TABLE NOTES:
 - 'allocated' is the recommended/allocated budget
 - 'forecast' is the predicted spending
-- Compare actual spending (from transactions) with allocated budget
+- Compare actual spending (debit in monthly_category_totals) with allocated budget
 """
 
-    async def initialize(self):
-        try:
-            self.conn = await asyncpg.connect(**self.db_config)
-
-            print("Database connected successfully!!")
-
-        except Exception as e:
-            print(f"The following error has occured: {e}")
-            raise
-
-    async def disconnect(self):
-        """Close database connection"""
-        if self.conn:
-            await self.conn.close()
-            print("Database disconnected")    
-
     async def sql_query_answer(self, user_id: int, query: str):
 
         sql_query = await self.generate_sql_query(user_id, query)
@@ -95,7 +119,7 @@ BUDGET TABLE NOTES:
         print(f"Generated query: {sql_query}")
 
         try:
-            results = await self.conn.fetch(sql_query)
+            results = await self.pool.fetch(sql_query)
             result_dict = [dict(row) for row in results]
             print(f"The query returned {len(result_dict)} rows!!")
 
@@ -111,6 +135,8 @@ BUDGET TABLE NOTES:
         return result_dict, sql_query
         
     async def generate_sql_query(self, user_id: int, query: str):
+        examples = "\n\n".join(f'Q: "{question}"\nSQL: {sql.format(user_id = user_id)}' for question, sql in SQL_EXAMPLES)
+
         prompt = f"""You are a PostgreSQL expert specializing in personal finance queries.
 
 {self.schema}
@@ -124,44 +150,16 @@ TASK: Generate a PostgreSQL query to answer this question.
 
 CRITICAL REQUIREMENTS:
 1. ALWAYS include WHERE user_id = {user_id}
-2. For spending/expense queries: use WHERE type = 'expense' AND amount > 0
-3. For income queries: use WHERE type = 'income' AND amount > 0
+2. For spending/expense queries on transactions: use WHERE type = 'expense' AND amount > 0; on monthly_category_totals use SUM(debit)
+3. For income queries on transactions: use WHERE type = 'income' AND amount > 0; on monthly_category_totals use SUM(credit)
 4. Use ILIKE for case-insensitive category matching
-5. Use proper date filters with date_time column (see schema for examples)
+5. Use proper date filters with date_time column, or the month column of monthly_category_totals (see schema for examples)
 6. Return ONLY the SQL query, no explanations
 7. If question is NOT about personal finances, return exactly: CANNOT_ANSWER
 
 EXAMPLE QUERIES:
 
-Q: "How much did I spend on groceries last month?"
-SQL: SELECT COALESCE(SUM(amount), 0) as total_spending FROM transactions WHERE user_id = {user_id} AND category ILIKE '%groceries%' AND category ILIKE '%shopping' AND type = 'expense' AND amount > 0 AND CAST(date_time AS DATE) >= DATE_TRUNC('month', CURRENT_DATE - INTERVAL '1 month')::date AND CAST(date_time AS DATE) < DATE_TRUNC('month', CURRENT_DATE)::date
-
-Q: "Show my last 10 transactions"
-SQL: SELECT date_time, description, amount, type, category, balance FROM transactions WHERE user_id = {user_id} ORDER BY date_time DESC LIMIT 10
-
-Q: "What's my budget status?"
-SQL: SELECT b.category, b.allocated as budget_amount, COALESCE(SUM(t.amount), 0) as spent_amount, (b.allocated - COALESCE(SUM(t.amount), 0)) as remaining, b.forecast FROM budgets b LEFT JOIN transactions t ON t.user_id = b.user_id AND t.category = b.category AND t.type = 'expense' AND EXTRACT(MONTH FROM t.date_time) = EXTRACT(MONTH FROM b.month) AND EXTRACT(YEAR FROM t.date_time) = EXTRACT(YEAR FROM b.month) WHERE b.user_id = {user_id} GROUP BY b.category, b.allocated, b.forecast
-
-Q: "How much did I earn last month?"
-SQL: SELECT COALESCE(SUM(amount), 0) as total_income FROM transactions WHERE user_id = {user_id} AND type = 'income' AND amount > 0 AND CAST(date_time AS DATE) >= DATE_TRUNC('month', CURRENT_DATE - INTERVAL '1 month')::date AND CAST(date_time AS DATE) < DATE_TRUNC('month', CURRENT_DATE)::date
-
-Q: "My account balance"
-SQL: SELECT balance FROM transactions WHERE user_id = {user_id} ORDER BY date_time DESC, id DESC LIMIT 1
-
-Q: "Total spending this month"
-SQL: SELECT COALESCE(SUM(amount), 0) as total_spending FROM transactions WHERE user_id = {user_id} AND type = 'expense' AND amount > 0 AND CAST(date_time AS DATE) >= DATE_TRUNC('month', CURRENT_DATE)::date
-
-Q: "How much did I spend on food?"
-SQL: SELECT COALESCE(SUM(amount), 0) as total_spending FROM transactions WHERE user_id = {user_id} AND category ILIKE '%food%' AND type = 'expense' AND amount > 0
-
-Q: "Show my travel expenses this month"
-SQL: SELECT date_time, description, amount, balance FROM transactions WHERE user_id = {user_id} AND category ILIKE '%travel%' AND type = 'expense' AND CAST(date_time AS DATE) >= DATE_TRUNC('month', CURRENT_DATE)::date ORDER BY date_time DESC
-
-Q: "What did I spend at Foodmandu?"
-SQL: SELECT date_time, description, amount, category FROM transactions WHERE user_id = {user_id} AND description ILIKE '%foodmandu%' AND type = 'expense' ORDER BY date_time DESC
-
-Q: "My spending breakdown this month"
-SQL: SELECT category, COALESCE(SUM(amount), 0) as total, COUNT(*) as transaction_count FROM transactions WHERE user_id = {user_id} AND type = 'expense' AND CAST(date_time AS DATE) >= DATE_TRUNC('month', CURRENT_DATE)::date GROUP BY category ORDER BY total DESC
+{examples}
 
 NOW GENERATE SQL FOR THE USER'S QUESTION:"""
             
@@ -254,12 +252,16 @@ RESPONSE:"""
             
 if __name__ == "__main__":
     async def main():
-        tsql = test_sql(db_config=data_db, openai_api_key=OPENAI_API_KEY)
-        await tsql.initialize()
-        user_id = 9
-        user_query = "How much did i spend in total last month?"
-        result_dict, sql_query = await tsql.sql_query_answer(user_query, user_id)
-        response = await tsql._generate_response_with_llm(user_query, result_dict, sql_query)
-        print(response)
+        pool = ConnectionPool(**data_db)
+        await pool.open()
+        try:
+            tsql = test_sql(pool=pool, openai_api_key=OPENAI_API_KEY)
+            user_id = 9
+            user_query = "How much did i spend in total last month?"
+            result_dict, sql_query = await tsql.sql_query_answer(user_query, user_id)
+            response = await tsql._generate_response_with_llm(user_query, result_dict, sql_query)
+            print(response)
+        finally:
+            await pool.close()
 
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,88 @@
+import os
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+INFERENCE_BATCH_SIZE = int(os.getenv("INFERENCE_BATCH_SIZE", 64))
+# Upper bound on (rows x padded length) per forward pass, which is what drives activation memory.
+INFERENCE_MAX_BATCH_TOKENS = int(os.getenv("INFERENCE_MAX_BATCH_TOKENS", 4096))
+INFERENCE_MAX_LENGTH = 128
+
+class BatchInferenceEngine:
+    """
+    Runs a sequence classifier over many descriptions in length-sorted micro-batches.
+
+    Each micro-batch is padded only to its own longest row, so short eSewa descriptions
+    are not padded up to the longest one in the whole statement.
+    """
+
+    def __init__(self, model, tokenizer, batch_size: int = INFERENCE_BATCH_SIZE, max_batch_tokens: int = INFERENCE_MAX_BATCH_TOKENS, max_length: int = INFERENCE_MAX_LENGTH):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        self.model = model
+        self.tokenizer = tokenizer
+        self.batch_size = batch_size
+        self.max_length = max_length
+        # A single row may never exceed the budget, otherwise it could not be scheduled at all
+        self.max_batch_tokens = max(max_batch_tokens, max_length)
+
+    def plan_batches(self, lengths):
+        order = np.argsort(lengths, kind="stable")
+
+        batches = []
+        current = []
+        current_max = 0
+
+        for idx in order:
+            length = int(lengths[idx])
+            padded_len = max(current_max, length)
+
+            if current and (len(current) >= self.batch_size or padded_len * (len(current) + 1) > self.max_batch_tokens):
+                batches.append(current)
+                current = []
+                padded_len = length
+
+            current.append(int(idx))
+            current_max = padded_len
+
+        if current:
+            batches.append(current)
+
+        return batches
+
+    def forward(self, inputs):
+        with torch.no_grad():
+            outputs = self.model(**inputs)
+        return outputs.logits
+
+    def iter_batches(self, texts):
+        """Yield (row_indices, predicted_ids, confidences) for every micro-batch."""
+        texts = list(texts)
+        if not texts:
+            return
+
+        encodings = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+        lengths = np.fromiter((len(ids) for ids in encodings["input_ids"]), dtype=np.int64, count=len(texts))
+        keys = list(encodings.keys())
+
+        for batch in self.plan_batches(lengths):
+            features = [{key: encodings[key][i] for key in keys} for i in batch]
+            inputs = self.tokenizer.pad(features, padding=True, return_tensors="pt")
+
+            probs = F.softmax(self.forward(inputs), dim=1)
+            confidences, predicted = torch.max(probs, dim=1)
+
+            yield np.asarray(batch, dtype=np.int64), predicted.numpy(), confidences.numpy()
+
+    def predict(self, texts):
+        """Classify texts and return (predicted_ids, confidences) in input order."""
+        texts = list(texts)
+        predicted = np.zeros(len(texts), dtype=np.int64)
+        confidences = np.zeros(len(texts), dtype=np.float32)
+
+        for indices, batch_predicted, batch_confidences in self.iter_batches(texts):
+            predicted[indices] = batch_predicted
+            confidences[indices] = batch_confidences
+
+        return predicted, confidences
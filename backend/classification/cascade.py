@@ -0,0 +1,67 @@
+import os
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from backend.classification.category_cache import normalize_description
+
+BASE_DIR = Path(__file__).resolve().parent
+CASCADE_MODEL_PATH = os.getenv("CASCADE_MODEL_PATH", str(BASE_DIR / "categoryClassifier.pkl"))
+# Rows the fast model predicts with at least this confidence never reach the transformer; 1.0 disables the cascade
+CASCADE_THRESHOLD = float(os.getenv("CASCADE_THRESHOLD", 0.9))
+TRAINING_DATASETS = ["dataset/esewa_transactions_balanced_final.csv", "dataset/finance_time_series.csv"]
+
+class LightWeightCategoryClassifier:
+    """TF-IDF + logistic regression over normalized descriptions, the first stage of the classification cascade."""
+
+    def __init__(self):
+        self.model = None
+
+    def train(self, descriptions, labels):
+        self.model = Pipeline([
+            ("tfidf", TfidfVectorizer(ngram_range = (1, 2), sublinear_tf = True)),
+            ("clf", LogisticRegression(max_iter = 1000))
+        ])
+        self.model.fit([normalize_description(text) for text in descriptions], list(labels))
+        return self
+
+    def predictBatch(self, keys):
+        """Predict categories for already-normalized descriptions; returns (labels, confidences)."""
+        if not keys:
+            return [], np.zeros(0)
+
+        probs = self.model.predict_proba(list(keys))
+        best = probs.argmax(axis = 1)
+        return self.model.classes_[best].tolist(), probs[np.arange(len(best)), best]
+
+    def saveModel(self, filepath = CASCADE_MODEL_PATH):
+        joblib.dump({"model": self.model}, filepath)
+        print(f"Model saved to {filepath}")
+
+    def loadModel(self, filepath = CASCADE_MODEL_PATH):
+        try:
+            self.model = joblib.load(filepath)["model"]
+            print(f"Model loaded from {filepath}")
+        except FileNotFoundError:
+            print(f'{filepath} was not found!!')
+        return self
+
+    @property
+    def is_ready(self):
+        return self.model is not None
+
+def load_training_data(paths = TRAINING_DATASETS, min_category_rows = 10):
+    frames = [pd.read_csv(path, usecols = ["Description", "Category"]) for path in paths]
+    df = pd.concat(frames, ignore_index = True).dropna()
+
+    # Stray one-off labels are not categories the transformer can produce either
+    counts = df["Category"].value_counts()
+    return df[df["Category"].isin(counts[counts >= min_category_rows].index)]
+
+if __name__ == "__main__":
+    df = load_training_data()
+    classifier = LightWeightCategoryClassifier().train(df["Description"], df["Category"])
+    classifier.saveModel()
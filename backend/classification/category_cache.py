@@ -0,0 +1,118 @@
+import os
+import re
+import hashlib
+from pathlib import Path
+from collections import OrderedDict
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.database import CategoryCacheEntry, dialect_insert
+
+CATEGORY_CACHE_SIZE = int(os.getenv("CATEGORY_CACHE_SIZE", 50000))
+CACHE_QUERY_CHUNK = 1000
+
+def normalize_description(text) -> str:
+    # cleanTextPipeline keeps only letters and lowercases them, so descriptions that differ
+    # only in digits, punctuation or spacing always produce the same model input
+    text = re.sub(r'[^a-zA-Z\s]', '', str(text)).lower()
+    return ' '.join(text.split())
+
+def model_fingerprint(model_path: str) -> str:
+    version = os.getenv("CLASSIFIER_MODEL_VERSION")
+    if version:
+        return version
+
+    digest = hashlib.sha1()
+    for path in sorted(Path(model_path).glob("*")):
+        if path.is_file():
+            stat = path.stat()
+            digest.update(f"{path.name}:{stat.st_size}:{int(stat.st_mtime)}".encode())
+    return digest.hexdigest()[:16]
+
+class DescriptionCategoryCache:
+    """
+    Two-tier cache of normalized description -> (category, confidence).
+
+    The in-memory tier is an LRU bounded by max_size; the persistent tier is the
+    category_cache table, keyed by model version so a retrained model never reads
+    categories predicted by an older one.
+    """
+
+    def __init__(self, model_version: str, max_size: int = CATEGORY_CACHE_SIZE):
+        self.model_version = model_version
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def _remember(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last = False)
+
+    async def lookup(self, db: AsyncSession, keys):
+        """Return {key: (category, confidence)} for every key found in either tier."""
+        found = {}
+        missing = []
+
+        for key in dict.fromkeys(keys):
+            value = self.entries.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                self.entries.move_to_end(key)
+                found[key] = value
+
+        self.memory_hits += len(found)
+
+        persistent = 0
+        for start in range(0, len(missing), CACHE_QUERY_CHUNK):
+            chunk = missing[start:start + CACHE_QUERY_CHUNK]
+            rows = await db.execute(
+                select(CategoryCacheEntry.description_key, CategoryCacheEntry.category, CategoryCacheEntry.confidence)
+                .where(CategoryCacheEntry.model_version == self.model_version)
+                .where(CategoryCacheEntry.description_key.in_(chunk))
+            )
+            for key, category, confidence in rows:
+                found[key] = (category, confidence)
+                self._remember(key, (category, confidence))
+                persistent += 1
+
+        self.persistent_hits += persistent
+        self.misses += len(missing) - persistent
+
+        return found
+
+    async def store(self, db: AsyncSession, entries: dict):
+        if not entries:
+            return
+
+        for key, value in entries.items():
+            self._remember(key, value)
+
+        rows = [
+            {"model_version": self.model_version, "description_key": key, "category": category, "confidence": confidence}
+            for key, (category, confidence) in entries.items()
+        ]
+        stmt = dialect_insert(db)(CategoryCacheEntry).on_conflict_do_nothing(index_elements = ["model_version", "description_key"])
+
+        try:
+            await db.execute(stmt, rows)
+            await db.commit()
+        except Exception as e:
+            # The persistent tier is an optimisation; a failed write must not fail the upload
+            await db.rollback()
+            print(f"\nCategory cache write failed: {e}\n")
+
+    def stats(self):
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        return {
+            "model_version": self.model_version,
+            "memory_size": len(self.entries),
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.persistent_hits) / lookups if lookups else 0.0
+        }
@@ -0,0 +1,161 @@
+import os
+import time
+import asyncio
+from collections import Counter, defaultdict
+from sqlalchemy.ext.asyncio import AsyncSession
+from Modelling.preprocessing import cleanTextPipeline_batch
+from backend.classification.category_cache import normalize_description
+from backend.classification.cascade import CASCADE_THRESHOLD
+
+STAGES = ("rules", "cache", "fast_model", "transformer")
+CLEAN_TEXT_WORKERS = int(os.getenv("CLEAN_TEXT_WORKERS", 1))
+
+class TransactionClassifier:
+    """
+    Classifies statement descriptions in stages: merchant rules, cached transformer predictions,
+    the TF-IDF fast model for rows it is confident about, and the transformer only for what is left.
+    """
+
+    def __init__(self, engine, id_to_label: dict, cache = None, fast_model = None, threshold: float = CASCADE_THRESHOLD, rules = None):
+        self.engine = engine
+        self.id_to_label = id_to_label
+        self.cache = cache
+        self.rules = rules
+        self.fast_model = fast_model
+        self.threshold = threshold
+
+        self.rows_classified = 0
+        self.rows_inferred = 0
+        self.stage_rows = dict.fromkeys(STAGES, 0)
+        self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+        self.last_run = None
+
+    @property
+    def cascade_enabled(self):
+        return self.fast_model is not None and self.fast_model.is_ready and self.threshold < 1
+
+    def _fast_predict(self, keys):
+        labels, confidences = self.fast_model.predictBatch(keys)
+
+        accepted = {}
+        rejected = []
+        for key, label, confidence in zip(keys, labels, confidences):
+            if confidence >= self.threshold:
+                accepted[key] = (label, float(confidence))
+            else:
+                rejected.append(key)
+        return accepted, rejected
+
+    def _resolved_rows(self, resolved: dict, rows_by_key: dict):
+        indices = []
+        categories = []
+        confidences = []
+        for key, (category, confidence) in resolved.items():
+            for row in rows_by_key[key]:
+                indices.append(row)
+                categories.append(category)
+                confidences.append(confidence)
+        return indices, categories, confidences
+
+    async def iter_classify(self, db: AsyncSession, descriptions):
+        """
+        Yield (row_indices, categories, confidences) as soon as each stage, and each transformer
+        micro-batch, resolves a group of rows. Every row is yielded exactly once.
+        """
+        keys = [normalize_description(text) for text in descriptions]
+        rows_by_key = defaultdict(list)
+        for row, key in enumerate(keys):
+            rows_by_key[key].append(row)
+        pending = list(rows_by_key)
+
+        stage_of = {}
+        seconds = dict.fromkeys(STAGES, 0.0)
+
+        if self.rules is not None and pending:
+            start = time.perf_counter()
+            self.rules.maybe_reload()
+            matched = {key: (category, 1.0) for key, category in self.rules.match(pending).items()}
+            seconds["rules"] = time.perf_counter() - start
+            stage_of.update(dict.fromkeys(matched, "rules"))
+            pending = [key for key in pending if key not in matched]
+            if matched:
+                yield self._resolved_rows(matched, rows_by_key)
+
+        if self.cache and pending:
+            start = time.perf_counter()
+            cached = await self.cache.lookup(db, pending)
+            seconds["cache"] = time.perf_counter() - start
+            stage_of.update(dict.fromkeys(cached, "cache"))
+            pending = [key for key in pending if key not in cached]
+            if cached:
+                yield self._resolved_rows(cached, rows_by_key)
+
+        if self.cascade_enabled and pending:
+            start = time.perf_counter()
+            accepted, pending = self._fast_predict(pending)
+            seconds["fast_model"] = time.perf_counter() - start
+            stage_of.update(dict.fromkeys(accepted, "fast_model"))
+            if accepted:
+                yield self._resolved_rows(accepted, rows_by_key)
+
+        if pending:
+            start = time.perf_counter()
+            # Cleaning the normalized key yields exactly the text cleanTextPipeline would produce for the raw description
+            cleaned_text = await asyncio.to_thread(cleanTextPipeline_batch, pending, workers = CLEAN_TEXT_WORKERS)
+            batches = self.engine.iter_batches(cleaned_text)
+            seconds["transformer"] += time.perf_counter() - start
+
+            predicted = {}
+            while True:
+                start = time.perf_counter()
+                batch = await asyncio.to_thread(next, batches, None)
+                seconds["transformer"] += time.perf_counter() - start
+                if batch is None:
+                    break
+
+                batch_indices, batch_classes, batch_confidences = batch
+                resolved = {
+                    pending[i]: (self.id_to_label[int(pred_class)], float(confidence))
+                    for i, pred_class, confidence in zip(batch_indices, batch_classes, batch_confidences)
+                }
+                predicted.update(resolved)
+                yield self._resolved_rows(resolved, rows_by_key)
+
+            if self.cache:
+                await self.cache.store(db, predicted)
+            stage_of.update(dict.fromkeys(predicted, "transformer"))
+
+        rows = Counter(stage_of[key] for key in keys)
+        for stage in STAGES:
+            self.stage_rows[stage] += rows[stage]
+            self.stage_seconds[stage] += seconds[stage]
+
+        self.rows_classified += len(keys)
+        self.rows_inferred += len(pending)
+        self.last_run = {stage: {"rows": rows[stage], "seconds": round(seconds[stage], 4)} for stage in STAGES}
+        print(f"Classification stages: {self.last_run}")
+
+    async def classify(self, db: AsyncSession, descriptions):
+        """Return (categories, confidences) aligned with descriptions."""
+        descriptions = list(descriptions)
+        categories = [None] * len(descriptions)
+        confidences = [None] * len(descriptions)
+
+        async for indices, batch_categories, batch_confidences in self.iter_classify(db, descriptions):
+            for row, category, confidence in zip(indices, batch_categories, batch_confidences):
+                categories[row] = category
+                confidences[row] = confidence
+
+        return categories, confidences
+
+    def stats(self):
+        return {
+            "rows_classified": self.rows_classified,
+            "rows_inferred": self.rows_inferred,
+            "inference_saved": 1 - self.rows_inferred / self.rows_classified if self.rows_classified else 0.0,
+            "cascade_threshold": self.threshold if self.cascade_enabled else None,
+            "stages": {stage: {"rows": self.stage_rows[stage], "seconds": round(self.stage_seconds[stage], 4)} for stage in STAGES},
+            "last_run": self.last_run,
+            "merchant_rules": len(self.rules) if self.rules is not None else None,
+            "cache": self.cache.stats() if self.cache else None
+        }
@@ -0,0 +1,89 @@
+import os
+import torch
+from types import SimpleNamespace
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", 0))
+INFERENCE_BACKENDS = ("torch", "quantized", "onnx")
+
+def onnx_model_path(model_path: str) -> str:
+    # Kept outside saved_model so exporting does not change the model fingerprint used by the category cache
+    return os.getenv("ONNX_MODEL_PATH", os.path.join(f"{model_path}_onnx", "model.onnx"))
+
+class _LogitsOnly(torch.nn.Module):
+    def __init__(self, model, input_names):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *tensors):
+        return self.model(**dict(zip(self.input_names, tensors))).logits
+
+def export_onnx(model, tokenizer, path: str):
+    sample = tokenizer(["paid for hair cutting saloon", "salary"], return_tensors="pt", padding=True)
+    input_names = list(sample.keys())
+
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    torch.onnx.export(
+        _LogitsOnly(model, input_names).eval(),
+        tuple(sample[name] for name in input_names),
+        path,
+        input_names=input_names,
+        output_names=["logits"],
+        dynamic_axes=dynamic_axes,
+        opset_version=14
+    )
+    print(f"Exported ONNX model to {path}")
+
+class OnnxSequenceClassifier:
+    """Wraps one onnxruntime session behind the same call interface as the HF model, so BatchInferenceEngine can use either."""
+
+    def __init__(self, path: str, num_threads: int = INFERENCE_THREADS):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError("INFERENCE_BACKEND=onnx requires the onnxruntime package") from e
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {item.name for item in self.session.get_inputs()}
+
+    def __call__(self, **inputs):
+        feed = {name: tensor.numpy() for name, tensor in inputs.items() if name in self.input_names}
+        logits = self.session.run(["logits"], feed)[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+def load_inference_model(model_path: str, backend: str = INFERENCE_BACKEND):
+    """Return (tokenizer, model) for the requested backend; the model is shared by every request."""
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {INFERENCE_BACKENDS}")
+
+    if INFERENCE_THREADS:
+        torch.set_num_threads(INFERENCE_THREADS)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+
+    if backend == "onnx":
+        path = onnx_model_path(model_path)
+        if not os.path.exists(path):
+            model = AutoModelForSequenceClassification.from_pretrained(model_path)
+            model.eval()
+            export_onnx(model, tokenizer, path)
+        return tokenizer, OnnxSequenceClassifier(path)
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_path)
+    model.eval()
+
+    if backend == "quantized":
+        # int8 weights for every Linear layer; activations are quantized on the fly
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    return tokenizer, model
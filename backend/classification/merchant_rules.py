@@ -0,0 +1,94 @@
+import os
+import re
+import json
+import bisect
+import threading
+from pathlib import Path
+from backend.classification.category_cache import normalize_description
+
+BASE_DIR = Path(__file__).resolve().parent
+MERCHANT_RULES_PATH = os.getenv("MERCHANT_RULES_PATH", str(BASE_DIR / "merchant_rules.json"))
+
+class MerchantRules:
+    """
+    Merchant/keyword -> category table compiled into a single regex alternation.
+
+    Patterns are normalized like descriptions and matched on whole words. When several
+    rules match one description, the one listed first in the table wins, so specific
+    rules ("refund") can be placed above broad ones ("daraz").
+    """
+
+    def __init__(self, path: str = MERCHANT_RULES_PATH, allowed_categories = None):
+        self.path = path
+        self.allowed_categories = set(allowed_categories) if allowed_categories else None
+        self.mtime = None
+        self.compiled = (None, {})
+        self._lock = threading.Lock()
+        self.reload()
+
+    def _compile(self, rules):
+        keywords = {}
+        for priority, rule in enumerate(rules):
+            keyword = normalize_description(rule["pattern"])
+            category = rule["category"]
+
+            if self.allowed_categories is not None and category not in self.allowed_categories:
+                raise ValueError(f"Unknown category '{category}' for merchant rule '{rule['pattern']}'")
+            if keyword and keyword not in keywords:
+                keywords[keyword] = (priority, category)
+
+        if not keywords:
+            return None, {}
+
+        # Longest first, so a longer keyword wins over its own prefix at the same position
+        alternation = "|".join(re.escape(keyword) for keyword in sorted(keywords, key = len, reverse = True))
+        return re.compile(rf"\b(?:{alternation})\b"), keywords
+
+    def reload(self):
+        """Re-read the rule table; the previous rules stay active if the new table is invalid."""
+        with self._lock:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, encoding = "utf-8") as f:
+                table = json.load(f)
+
+            # Swapped as one tuple so concurrent matches never see a pattern without its keyword map
+            self.compiled = self._compile(table["rules"])
+            self.mtime = mtime
+            return len(self.compiled[1])
+
+    def maybe_reload(self):
+        try:
+            if os.path.getmtime(self.path) == self.mtime:
+                return False
+            self.reload()
+            print(f"Merchant rules reloaded from {self.path}")
+            return True
+        except Exception as e:
+            print(f"⚠️ Merchant rules reload failed, keeping previous rules: {e}")
+            return False
+
+    def match(self, keys):
+        """Return {key: category} for the normalized descriptions that hit a rule."""
+        pattern, keywords = self.compiled
+        keys = list(keys)
+        if pattern is None or not keys:
+            return {}
+
+        # One scan over all descriptions joined by newlines; normalized keys never contain one
+        starts = []
+        offset = 0
+        for key in keys:
+            starts.append(offset)
+            offset += len(key) + 1
+
+        best = {}
+        for m in pattern.finditer("\n".join(keys)):
+            row = bisect.bisect_right(starts, m.start()) - 1
+            rule = keywords[m.group(0)]
+            if row not in best or rule[0] < best[row][0]:
+                best[row] = rule
+
+        return {keys[row]: category for row, (_, category) in best.items()}
+
+    def __len__(self):
+        return len(self.compiled[1])
@@ -0,0 +1,87 @@
+import asyncio
+import time
+import asyncpg
+from contextlib import asynccontextmanager
+from backend.query_metrics import query_stats
+from backend.database import ASYNCPG_DSN, SQL_POOL_MIN_SIZE, SQL_POOL_MAX_SIZE, SQL_POOL_ACQUIRE_TIMEOUT
+
+class PoolNotOpen(RuntimeError):
+    pass
+
+class ConnectionPool:
+    """
+    App-lifetime asyncpg pool for raw SQL (the text-to-SQL chatbot). Opened on startup, closed on
+    shutdown; callers borrow a connection per query instead of connecting per request.
+    """
+
+    def __init__(self, min_size: int = SQL_POOL_MIN_SIZE, max_size: int = SQL_POOL_MAX_SIZE,
+                 acquire_timeout: float = SQL_POOL_ACQUIRE_TIMEOUT, **connect_kwargs):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.connect_kwargs = connect_kwargs or {"dsn": ASYNCPG_DSN}
+        self.pool = None
+
+        self.acquired = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    async def open(self):
+        if self.pool is None:
+            self.pool = await asyncpg.create_pool(min_size = self.min_size, max_size = self.max_size, **self.connect_kwargs)
+            print(f"SQL connection pool opened ({self.min_size}-{self.max_size} connections)")
+
+    async def close(self):
+        if self.pool is not None:
+            pool, self.pool = self.pool, None
+            await pool.close()
+            print("SQL connection pool closed")
+
+    @asynccontextmanager
+    async def acquire(self):
+        if self.pool is None:
+            raise PoolNotOpen("SQL connection pool is not open")
+
+        start = time.perf_counter()
+        try:
+            connection = await self.pool.acquire(timeout = self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            print(f"⚠️ No SQL connection free within {self.acquire_timeout}s")
+            raise
+
+        waited = time.perf_counter() - start
+        self.acquired += 1
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+        try:
+            yield connection
+        finally:
+            await self.pool.release(connection)
+
+    async def fetch(self, query: str, *args):
+        async with self.acquire() as connection:
+            start = time.perf_counter()
+            rows = await connection.fetch(query, *args)
+        query_stats.record(query, (time.perf_counter() - start) * 1000, len(rows), source = "asyncpg")
+        return rows
+
+    def stats(self):
+        size = self.pool.get_size() if self.pool is not None else 0
+        idle = self.pool.get_idle_size() if self.pool is not None else 0
+        return {
+            "open": self.pool is not None,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": self.wait_seconds / self.acquired * 1000 if self.acquired else 0.0,
+            "max_wait_ms": self.max_wait_seconds * 1000
+        }
+
+sql_pool = ConnectionPool()
@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, ForeignKey, Float, UniqueConstraint, Index
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base, relationship
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 import asyncpg
 import logging
 from datetime import datetime
@@ -9,6 +11,8 @@ from dotenv import load_dotenv
 from urllib.parse import quote
 import asyncio
 from pathlib import Path
+from backend.migrations import run_migrations, UNIQUE_TRANSACTIONS
+from backend.query_metrics import instrument_engine
 load_dotenv(dotenv_path=Path(__file__).resolve().parent / ".env")
 
 logging.basicConfig(level=logging.INFO)
@@ -23,9 +27,18 @@ FINAL_PASSWORD = quote(POSTGRES_PASSWORD)
 
 ADMIN_DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{FINAL_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/postgres"
 DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{FINAL_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{DATABASE_NAME}"
+# Same database as the engine, for the raw asyncpg pool in backend/connection_pool.py
+ASYNCPG_DSN = f"postgresql://{POSTGRES_USER}:{FINAL_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{DATABASE_NAME}"
+
+SQL_POOL_MIN_SIZE = int(os.getenv("SQL_POOL_MIN_SIZE", 1))
+SQL_POOL_MAX_SIZE = int(os.getenv("SQL_POOL_MAX_SIZE", 10))
+SQL_POOL_ACQUIRE_TIMEOUT = float(os.getenv("SQL_POOL_ACQUIRE_TIMEOUT", 10))
+# Statement echo is for local debugging only; timings go through backend/query_metrics.py
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() == "true"
 
 Base = declarative_base()
-engine = create_async_engine(DATABASE_URL, echo = True)
+engine = create_async_engine(DATABASE_URL, echo = SQL_ECHO)
+instrument_engine(engine)
 SessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
 class User(Base):
@@ -45,6 +58,15 @@ class User(Base):
 
 class Transaction(Base):
     __tablename__ = "transactions" 
+    __table_args__ = (
+        Index("ix_transactions_user_reference", "user_id", "reference_code"),
+        Index("ix_transactions_user_content_hash", "user_id", "content_hash"),
+        # Per-user time ranges, and spending by type/category within a time range
+        Index("ix_transactions_user_date_time", "user_id", "date_time"),
+        Index("ix_transactions_user_type_category_date_time", "user_id", "type", "category", "date_time"),
+        # Same dedupe key as transaction_keys; concurrent uploads of one statement insert it once
+        Index("uq_transactions_user_reference_content_hash", "user_id", "reference_code", "content_hash", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
@@ -60,11 +82,13 @@ class Transaction(Base):
     balance = Column(Float)
     channel = Column(String)
     category = Column(String)
+    content_hash = Column(String)
 
     user = relationship("User", back_populates="transactions")
 
 class Budget(Base):
     __tablename__ = "budgets"
+    __table_args__ = (UniqueConstraint("user_id", "month", "category", name = "uq_budgets_user_month_category"),)
 
     id = Column(Integer, primary_key = True, index = True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete = "CASCADE"))
@@ -76,6 +100,21 @@ class Budget(Base):
 
     user = relationship("User", back_populates = "budgets")
 
+class MonthlyCategoryTotal(Base):
+    """Per user, month and category rollup of transactions, kept current by insertTransaction."""
+    __tablename__ = "monthly_category_totals"
+    __table_args__ = (UniqueConstraint("user_id", "month", "category", name = "uq_monthly_totals_user_month_category"),)
+
+    id = Column(Integer, primary_key = True, index = True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete = "CASCADE"), nullable = False)
+
+    month = Column(Date, nullable = False)
+    category = Column(String, nullable = False)
+
+    debit = Column(Float, nullable = False, default = 0.0)
+    credit = Column(Float, nullable = False, default = 0.0)
+    count = Column(Integer, nullable = False, default = 0)
+
 class ChatHistory(Base):
     __tablename__ = "chat_history"
 
@@ -86,6 +125,43 @@ class ChatHistory(Base):
     text = Column(String, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+class CategoryCacheEntry(Base):
+    __tablename__ = "category_cache"
+    __table_args__ = (UniqueConstraint("model_version", "description_key", name = "uq_category_cache_version_key"),)
+
+    id = Column(Integer, primary_key = True, index = True)
+    model_version = Column(String, nullable = False)
+    description_key = Column(String, nullable = False)
+
+    category = Column(String, nullable = False)
+    confidence = Column(Float, nullable = False)
+    created_at = Column(DateTime, default = datetime.utcnow)
+
+class ForecastCacheEntry(Base):
+    """Per-category forecast summary keyed by a hash of the monthly series and the engine configuration."""
+    __tablename__ = "forecast_cache"
+
+    id = Column(Integer, primary_key = True, index = True)
+    cache_key = Column(String, nullable = False, unique = True)
+
+    summary = Column(String, nullable = False)
+    created_at = Column(DateTime, default = datetime.utcnow)
+
+class ForecastModel(Base):
+    """The ARIMA order and parameters that last won for a user and category, used to warm-start the next refit."""
+    __tablename__ = "forecast_models"
+    __table_args__ = (UniqueConstraint("user_id", "category", name = "uq_forecast_models_user_category"),)
+
+    id = Column(Integer, primary_key = True, index = True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete = "CASCADE"), nullable = False)
+    category = Column(String, nullable = False)
+
+    arima_order = Column(String, nullable = False)
+    params = Column(String, nullable = False)
+    aic = Column(Float, nullable = False)
+    n_obs = Column(Integer, nullable = False)
+    updated_at = Column(DateTime, default = datetime.utcnow, onupdate = datetime.utcnow)
+
 async def create_database():
     try:
         admin_conn = await asyncpg.connect(f"postgresql://{POSTGRES_USER}:{FINAL_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/postgres")
@@ -111,16 +187,26 @@ async def create_tables():
     try:
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await run_migrations(conn)
         logger.info("Database tables created!!")
 
     except Exception as e:
         logger.error("Tables could not be created!!")
         raise
 
+async def enforce_unique_transactions():
+    # Separate from create_tables: it needs the content_hash backfill to have run first
+    async with engine.begin() as conn:
+        await run_migrations(conn, UNIQUE_TRANSACTIONS)
+
 async def db_setup():
     await create_database()
     await create_tables()
 
+def dialect_insert(db: AsyncSession):
+    # ON CONFLICT clauses live on the dialect-specific insert(); tests run against SQLite
+    return pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+
 async def get_db():
     async with SessionLocal() as session:
         try:
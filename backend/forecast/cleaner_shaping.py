@@ -1,33 +1,59 @@
+import numpy as np
 import pandas as pd
 
+REQUIRED_COLUMNS = ["Date Time", "Dr.", "Cr.", "Category"]
+
 def cleaner_function(df):
+    """
+    Rows with a date, both amounts and a category, indexed and sorted by time. `df` itself is not
+    modified, but the result may share its column data.
+    """
+    names = dict(zip(df.columns.str.strip(), df.columns))
+    complete = np.logical_and.reduce([df[names[col]].notna().to_numpy() for col in REQUIRED_COLUMNS])
+    # Rows are only copied when some must go; a complete statement gets a shallow copy sharing its data
+    df = df[complete] if not complete.all() else df.copy(deep = False)
+
     df.columns = df.columns.str.strip()
-    df = df.dropna(subset = ["Date Time", "Dr.", "Cr.", "Category"])
-    df["Date Time"] = pd.to_datetime(df["Date Time"])
-    df.set_index("Date Time", inplace = True)
-    df.sort_index(inplace = True)
+    df.set_index(pd.DatetimeIndex(pd.to_datetime(df.pop("Date Time")), name = "Date Time"), inplace = True)
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
     return df
 
 def reshaping(df):
-    monthly = df.groupby([pd.Grouper(freq = "M"), "Category"])["Dr."].sum().unstack(fill_value=0)
-
-    for cat in monthly.columns:
-        if sum(monthly[cat]) == 0:
-            monthly.drop([cat], axis = 1, inplace=True)
-    
-    def summation(row):
-        total_sum = 0
-        for value in row:
-            total_sum = total_sum + value
-        return total_sum
-    
-    monthly['Total'] = monthly.apply(lambda x: summation(x), axis = 1)
-    
-    def percentage(row, col):
-        percent = ((row[col] / row["Total"]) * 100)
-        return percent
-    
-    for col in monthly.columns:
-        monthly[f"{col} %"] = monthly.apply(lambda x: percentage(x, col), axis = 1)
-    
-    return monthly
\ No newline at end of file
+    monthly = df.pivot_table(index = pd.Grouper(freq = "ME"), columns = "Category", values = "Dr.", aggfunc = "sum", fill_value = 0)
+    return shape_monthly(monthly)
+
+def reshape_monthly_totals(totals):
+    """reshaping() for rows of monthly_category_totals instead of raw transactions."""
+    monthly = totals.pivot_table(index = "month", columns = "category", values = "debit", aggfunc = "sum", fill_value = 0)
+    # Totals are accumulated over many inserts; rounding to cents keeps them independent of summation
+    # order, which the ARIMA order search on a handful of months is sensitive to
+    monthly = monthly.round(2)
+    # Month-end labels, as pd.Grouper(freq = "ME") produces them
+    monthly.index = pd.to_datetime(monthly.index) + pd.offsets.MonthEnd(0)
+    monthly.index.name = "Date Time"
+    monthly.columns.name = "Category"
+    return shape_monthly(monthly)
+
+def shape_monthly(monthly):
+    """
+    Drop categories that never have spending, then append "Total" and a "<column> %" share of the
+    total for every category and for Total itself. Returns a new frame; `monthly` is not modified.
+    """
+    spent = monthly.sum(axis = 0).to_numpy() != 0
+    columns = [*monthly.columns[spent], "Total"]
+    width = len(columns)
+
+    # One block for the amounts, Total and the percentages, wrapped by the frame without a copy
+    block = np.empty((len(monthly), 2 * width))
+    block[:, :width - 1] = monthly.to_numpy(dtype = float)[:, spent]
+    block[:, width - 1] = block[:, :width - 1].sum(axis = 1)
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        np.divide(block[:, :width], block[:, width - 1:width], out = block[:, width:])
+    block[:, width:] *= 100
+
+    return pd.DataFrame(
+        block,
+        index = monthly.index,
+        columns = pd.Index(columns + [f"{col} %" for col in columns], name = monthly.columns.name)
+    )
@@ -0,0 +1,102 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.database import ForecastCacheEntry, dialect_insert
+
+FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", 10000))
+FORECAST_CACHE_PERSISTENT = os.getenv("FORECAST_CACHE_PERSISTENT", "true").lower() == "true"
+CACHE_QUERY_CHUNK = 1000
+
+def _json_value(value):
+    # numpy scalars from the fitted models
+    return value.item() if hasattr(value, "item") else str(value)
+
+class ForecastCache:
+    """
+    Two-tier cache of series key (see model.series_key) -> model summary (forecast, order, AIC and bounds).
+
+    The in-memory tier is an LRU bounded by max_size and is read and written from the forecast
+    thread. The persistent tier is the forecast_cache table: the pipeline loads the keys of a
+    request into memory before forecasting and writes the new entries back afterwards.
+    """
+
+    def __init__(self, max_size: int = FORECAST_CACHE_SIZE, persistent: bool = FORECAST_CACHE_PERSISTENT):
+        self.max_size = max_size
+        self.persistent = persistent
+        self.entries = OrderedDict()
+        self.pending = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.persistent_loads = 0
+        self.misses = 0
+
+    def _remember(self, key, summary):
+        self.entries[key] = summary
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last = False)
+
+    def get(self, key):
+        with self._lock:
+            summary = self.entries.get(key)
+            if summary is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return dict(summary)
+
+    def put(self, key, summary):
+        with self._lock:
+            self._remember(key, dict(summary))
+            if self.persistent:
+                self.pending[key] = dict(summary)
+
+    async def load(self, db: AsyncSession, keys):
+        """Pull the persistent entries for `keys` that are not in memory yet."""
+        if not self.persistent:
+            return
+        with self._lock:
+            missing = [key for key in dict.fromkeys(keys) if key not in self.entries]
+
+        for start in range(0, len(missing), CACHE_QUERY_CHUNK):
+            rows = await db.execute(
+                select(ForecastCacheEntry.cache_key, ForecastCacheEntry.summary)
+                .where(ForecastCacheEntry.cache_key.in_(missing[start:start + CACHE_QUERY_CHUNK]))
+            )
+            with self._lock:
+                for key, summary in rows:
+                    self._remember(key, json.loads(summary))
+                    self.persistent_loads += 1
+
+    async def persist(self, db: AsyncSession):
+        with self._lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return
+
+        rows = [{"cache_key": key, "summary": json.dumps(summary, default = _json_value)} for key, summary in pending.items()]
+        stmt = dialect_insert(db)(ForecastCacheEntry).on_conflict_do_nothing(index_elements = ["cache_key"])
+        try:
+            await db.execute(stmt, rows)
+            await db.commit()
+        except Exception as e:
+            # The persistent tier is an optimisation; a failed write must not fail the upload
+            await db.rollback()
+            print(f"\nForecast cache write failed: {e}\n")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "memory_size": len(self.entries),
+            "hits": self.hits,
+            "persistent_loads": self.persistent_loads,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+forecast_cache = ForecastCache()
@@ -3,10 +3,38 @@ import numpy as np
 from statsmodels.tsa.arima.model import ARIMA
 from statsmodels.tsa.stattools import adfuller
 from statsmodels.tsa.seasonal import seasonal_decompose
+import os
 import warnings
 import time
+import json
+import hashlib
+import threading
+import multiprocessing
+from itertools import product
+from concurrent.futures import ProcessPoolExecutor, wait
+from backend.forecast.statsforecast_engine import FORECAST_LEVEL, STATSFORECAST_MODELS, statsforecast_forecasts
 warnings.filterwarnings('ignore')
 
+# Processes used for the (category, order) grid; 1 fits everything in the calling thread
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", os.cpu_count() or 1))
+# Wall-clock seconds each category's order search may take, checked between fits; 0 disables it
+ARIMA_TIME_BUDGET = float(os.getenv("ARIMA_TIME_BUDGET", 10))
+# How much a warm-started refit's AIC per differenced observation may exceed the stored fit's before the full search runs
+ARIMA_WARM_START_TOLERANCE = float(os.getenv("ARIMA_WARM_START_TOLERANCE", 1.0))
+# "arima" and "arima_stepwise" are the statsmodels searches in this module; the others run on statsforecast
+FORECAST_ENGINE = os.getenv("FORECAST_ENGINE", "arima")
+ARIMA_SEARCHES = {"arima": "grid", "arima_stepwise": "stepwise"}
+FORECAST_ENGINES = tuple(ARIMA_SEARCHES) + tuple(STATSFORECAST_MODELS)
+
+# Hyndman-Khandakar starting models as (p, q), and the neighbours tried around the current best
+STEPWISE_START = [(2, 2), (0, 0), (1, 0), (0, 1)]
+STEPWISE_MOVES = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (1, 1)]
+# Bump when a change to the fitting code should invalidate cached forecasts
+FORECAST_CACHE_VERSION = 1
+
+_fit_pool = None
+_fit_pool_lock = threading.Lock()
+
 def check_stationary(timeseries, title):
     try:
         print(f"Result of Dickey-Fuller Test for {title}: ")
@@ -29,30 +57,203 @@ def check_stationary(timeseries, title):
         print(f"⚠️ ADF check failed for {title}: {e}")
         return False
 
-def find_best_arima_model(data, max_p = 3, max_d = 3, max_q = 3):
+def arima_orders(data, max_p = 3, max_d = 3, max_q = 3):
+    # Grid order matters: ties on AIC go to the first order listed, as in the serial search
+    return [
+        (p, d, q) for p, d, q in product(range(max_p + 1), range(max_d + 1), range(max_q + 1))
+        # require at least some minimal size: ARIMA(p,d,q) fitting will fail on tiny samples
+        if len(data) >= (p + d + q + 1)
+    ]
+
+def fit_aic(data, order, start_params = None):
+    try:
+        return ARIMA(data, order = order).fit(start_params = start_params).aic
+    except Exception:
+        return None
+
+def best_aic(orders, aics):
     best_aic = np.inf
     best_order = None
+    for order, aic in zip(orders, aics):
+        if aic is not None and aic < best_aic:
+            best_aic = aic
+            best_order = order
+    return best_order, best_aic
 
-    for p in range(max_p + 1):
-        for d in range(max_d + 1):
-            for q in range(max_q + 1):
-                try:
-                    # require at least some minimal size: ARIMA(p,d,q) fitting will fail on tiny samples
-                    if len(data) < (p + d + q + 1):
-                        continue
-                    arima_model = ARIMA(data, order = (p, d, q))
-                    fit_model = arima_model.fit()
-                    aic = fit_model.aic
-
-                    if aic < best_aic:
-                        best_aic = aic
-                        best_order = (p, d, q)
-                except Exception:
-                    continue
+def _deadline(time_budget):
+    return time.monotonic() + time_budget if time_budget else None
+
+def _expired(deadline):
+    return deadline is not None and time.monotonic() >= deadline
+
+def grid_search(data, orders, time_budget = ARIMA_TIME_BUDGET):
+    deadline = _deadline(time_budget)
+    aics = []
+    for order in orders:
+        if _expired(deadline):
+            print(f"⚠️ ARIMA grid search ran out of time after {len(aics)} of {len(orders)} orders")
+            break
+        aics.append(fit_aic(data, order))
+    return best_aic(orders, aics)
+
+def stepwise_search(data, d, max_p = 3, max_q = 3, time_budget = ARIMA_TIME_BUDGET):
+    """
+    Hyndman-Khandakar stepwise search over p and q with d fixed: fit the starting models, then
+    move to the first neighbour of the best order that lowers the AIC until none does or the
+    time budget runs out. Returns (None, inf) when nothing fitted, which forecast_arima turns
+    into the mean forecast.
+    """
+    deadline = _deadline(time_budget)
+    tried = set()
+    best_order, lowest_aic = None, np.inf
+
+    def improves(p, q):
+        nonlocal best_order, lowest_aic
+        order = (p, d, q)
+        if order in tried or not (0 <= p <= max_p and 0 <= q <= max_q) or len(data) < (p + d + q + 1):
+            return False
+        tried.add(order)
+        aic = fit_aic(data, order)
+        if aic is not None and aic < lowest_aic:
+            best_order, lowest_aic = order, aic
+            return True
+        return False
 
-    return best_order, best_aic
+    for p, q in STEPWISE_START:
+        if _expired(deadline):
+            break
+        improves(p, q)
+
+    moved = best_order is not None
+    while moved and not _expired(deadline):
+        moved = False
+        p, _, q = best_order
+        for dp, dq in STEPWISE_MOVES:
+            if _expired(deadline):
+                break
+            if improves(p + dp, q + dq):
+                moved = True
+                break
 
-def forecast_arima(data, order, steps = 1):
+    if _expired(deadline):
+        print(f"⚠️ ARIMA stepwise search ran out of time after {len(tried)} fits, keeping {best_order}")
+    return best_order, lowest_aic
+
+def neighbourhood(order, data, max_p = 3, max_q = 3):
+    # The order itself comes first, so it keeps ties
+    p, d, q = order
+    return [
+        (p + dp, d, q + dq) for dp, dq in product((0, -1, 1), repeat = 2)
+        if 0 <= p + dp <= max_p and 0 <= q + dq <= max_q and len(data) >= (p + dp + d + q + dq + 1)
+    ]
+
+def warm_search(data, previous, max_p = 3, max_q = 3, tolerance = None):
+    """
+    Refit around the order that won last time: the previous order, started from its stored
+    parameters, and its p/q neighbours with d unchanged. Returns (order, aic), or None when the
+    history shrank or the fit has degraded (the best AIC per observation left after differencing
+    is more than `tolerance` above the stored one), in which case the caller runs the full search.
+    """
+    tolerance = ARIMA_WARM_START_TOLERANCE if tolerance is None else tolerance
+    order = tuple(previous["order"])
+    d = order[1]
+    if len(data) < previous["n_obs"] or len(data) <= d:
+        return None
+
+    orders = neighbourhood(order, data, max_p, max_q)
+    aics = [fit_aic(data, candidate, previous["params"] if candidate == order else None) for candidate in orders]
+    best_order, lowest_aic = best_aic(orders, aics)
+
+    if best_order is None or lowest_aic / (len(data) - d) > previous["aic"] / max(previous["n_obs"] - d, 1) + tolerance:
+        print(f"⚠️ Warm-started ARIMA around {order} degraded, running the full search")
+        return None
+    return best_order, lowest_aic
+
+def search_order(data, search, stationary, max_p, max_d, max_q, time_budget, previous = None):
+    if previous is not None:
+        warm = warm_search(data, previous, max_p, max_q)
+        if warm is not None:
+            return warm
+
+    if search == "stepwise":
+        # d comes from the ADF test instead of being searched
+        return stepwise_search(data, 0 if stationary else min(1, max_d), max_p, max_q, time_budget)
+    return grid_search(data, arima_orders(data, max_p, max_d, max_q), time_budget)
+
+def _fit_executor(workers):
+    global _fit_pool
+    # Forecasts run in worker threads, so two requests can get here at once
+    with _fit_pool_lock:
+        if _fit_pool is None or _fit_pool._max_workers != workers:
+            if _fit_pool is not None:
+                _fit_pool.shutdown(wait = False)
+            # spawn, not fork: the API process has model and event-loop threads that fork would copy mid-flight
+            _fit_pool = ProcessPoolExecutor(max_workers = workers, mp_context = multiprocessing.get_context("spawn"))
+        return _fit_pool
+
+def shutdown_fit_pool():
+    global _fit_pool
+    with _fit_pool_lock:
+        if _fit_pool is not None:
+            _fit_pool.shutdown(cancel_futures = True)
+            _fit_pool = None
+
+def find_best_arima_models(series, max_p = 3, max_d = 3, max_q = 3, workers = None, search = "grid",
+                           stationary = None, time_budget = None, previous = None):
+    """
+    Choose an ARIMA order for every category. Returns {category: (best_order, best_aic)}.
+
+    "grid" fits every (p, d, q); on a process pool all (category, order) fits are spread over the
+    workers and each category keeps its lowest AIC. "stepwise" runs stepwise_search per category
+    with d taken from `stationary` ({category: ADF result}). `time_budget` (default
+    ARIMA_TIME_BUDGET) bounds each category's search; the pooled grid, where all categories
+    share the workers, gets time_budget per category per worker, then cancels the fits still
+    pending and keeps the best order that finished. Categories in `previous` ({category: stored model}) try
+    warm_search first and only fall back to the full search when it reports a degraded fit.
+    """
+    workers = FORECAST_WORKERS if workers is None else workers
+    time_budget = ARIMA_TIME_BUDGET if time_budget is None else time_budget
+    stationary = stationary or {}
+    previous = previous or {}
+
+    def arguments(col):
+        return series[col], search, stationary.get(col, False), max_p, max_d, max_q, time_budget, previous.get(col)
+
+    if workers <= 1:
+        return {col: search_order(*arguments(col)) for col in series}
+
+    executor = _fit_executor(workers)
+    if search == "stepwise":
+        futures = {col: executor.submit(search_order, *arguments(col)) for col in series}
+        return {col: future.result() for col, future in futures.items()}
+
+    warm = {col: executor.submit(warm_search, series[col], previous[col], max_p, max_q) for col in series if col in previous}
+    best = {col: future.result() for col, future in warm.items()}
+    best = {col: found for col, found in best.items() if found is not None}
+
+    grids = {col: arima_orders(data, max_p, max_d, max_q) for col, data in series.items() if col not in best}
+    # The grids share the workers, so the budget is time_budget for every category a worker would search in turn
+    deadline = _deadline(time_budget * -(-len(grids) // workers))
+    # Submitted round-robin across categories, so a budget that runs out cuts every grid short evenly
+    submissions = sorted(((i, col, order) for col, orders in grids.items() for i, order in enumerate(orders)), key = lambda item: item[0])
+    futures = {col: [] for col in grids}
+    for _, col, order in submissions:
+        futures[col].append(executor.submit(fit_aic, series[col], order))
+
+    for col, orders in grids.items():
+        done, pending = wait(futures[col], timeout = None if deadline is None else max(deadline - time.monotonic(), 0))
+        if pending:
+            for future in pending:
+                future.cancel()
+            print(f"⚠️ ARIMA grid search for {col} ran out of time after {len(done)} of {len(orders)} orders")
+        # Results are read back in grid order, so completion order never changes the winner
+        best[col] = best_aic(orders, [future.result() if future in done else None for future in futures[col]])
+    return {col: best[col] for col in series}
+
+def find_best_arima_model(data, max_p = 3, max_d = 3, max_q = 3, workers = None, search = "grid", stationary = False, time_budget = None):
+    return find_best_arima_models({None: data}, max_p, max_d, max_q, workers, search, {None: stationary}, time_budget)[None]
+
+def forecast_arima(data, order, steps = 1, start_params = None):
     if order is None:
         # fallback: return mean forecast and trivial conf_int
         mean_val = data.mean() if len(data) > 0 else 0.0
@@ -64,82 +265,81 @@ def forecast_arima(data, order, steps = 1):
         return forecast, conf_int, Dummy()
 
     arima_model = ARIMA(data, order=order)
-    fitted_model = arima_model.fit()
+    fitted_model = arima_model.fit(start_params = start_params)
     forecast = fitted_model.forecast(steps = steps)
     conf_int = fitted_model.get_forecast(steps = steps).conf_int()
 
     return forecast, conf_int, fitted_model
 
-def create_budget_forecast(monthly_data, income, target_savings):
+def arima_forecasts(series, search = "grid", models = None):
+    """
+    ARIMA forecast per category. `models` ({category: {"order", "params", "aic", "n_obs"}})
+    warm-starts the order search and is updated in place with the new fits.
+    """
     forecasts = {}
     model_summary = {}
+    stationary = {}
 
-    start_time = time.time()
-
-    cols = {col for col in monthly_data.columns if not col.endswith(" %") and col != "Total"}
-    print("Monthly Data")
-    print(monthly_data)
-
-    if (monthly_data.shape[0] < 3):
-        budget = None
-        forecast = None
-        model_summary = None
-        print("Data not sufficient")
-        return {}, model_summary, {}
-    
-    for col in cols:
-        if col in monthly_data.columns:
+    for col, data in series.items():
+        if(len(data) < 3):
+            print(f"{col} has insufficient data for ARIMA modelling!!")
+            forecasts[col] = data.mean() if len(data) > 0 else 0
 
+        stationary[col] = check_stationary(data, col)
 
-            data = monthly_data[col].dropna()
+    best_models = find_best_arima_models(series, search = search, stationary = stationary, previous = models)
 
-            if(len(data) < 3):
-                print(f"{col} has insufficient data for ARIMA modelling!!")
-                forecasts[col] = data.mean() if len(data) > 0 else 0
-
-            is_stationary = check_stationary(data, col)
-    
-            best_order, best_aic = find_best_arima_model(data)
-    
-            forecast, conf_int, fitted_model = forecast_arima(data, best_order)
+    for col, data in series.items():
+        best_order, best_aic = best_models[col]
 
-            if (forecast.iloc[0] < 0):
+        # A warm-started winner was scored from its stored parameters, and refitting it from the
+        # default start can fail where that fit did not, so the forecast starts from them too
+        previous = (models or {}).get(col)
+        start_params = previous["params"] if previous is not None and best_order == tuple(previous["order"]) else None
+        forecast, conf_int, fitted_model = forecast_arima(data, best_order, start_params = start_params)
+        if models is not None and best_order is not None:
+            models[col] = {"order": list(best_order), "params": fitted_model.params.tolist(), "aic": best_aic, "n_obs": len(data)}
 
-                forecast = data.mean()
-                forecasts[col] = forecast
+        if (forecast.iloc[0] < 0):
 
-                model_summary[col] = {
-                'forecast': forecast,
-                'aic': 0,
-                'order': [0, 0, 0],
-                'lower_bound': data.min(),
-                'upper_bound': data.max()
-                }
+            forecast = data.mean()
+            forecasts[col] = forecast
 
-                print(f"{col}:")
-                print(f"Forecast: {forecast}")
-                print(f"Lower Bound: {data.min()}")
-                print(f"Upper Bound: {data.max()}")
+            model_summary[col] = {
+            'forecast': forecast,
+            'aic': 0,
+            'order': [0, 0, 0],
+            'lower_bound': data.min(),
+            'upper_bound': data.max()
+            }
 
-            else: 
-                
-                forecasts[col] = forecast.iloc[0]
-        
-                model_summary[col] = {
-                'forecast': forecast.iloc[0],
-                'aic': best_aic,
-                'order': best_order,
-                'lower_bound': conf_int.iloc[0, 0],
-                'upper_bound': conf_int.iloc[0, 1]
-                }
-
-                print(f"{col}:")
-                print(f"Best order: {best_order}")
-                print(f"AIC: {best_aic}")
-                print(f"Forecast: {forecast.iloc[0]}")
-                print(f"Lower Bound: {conf_int.iloc[0, 0]}")
-                print(f"Upper Bound: {conf_int.iloc[0, 1]}")
+            print(f"{col}:")
+            print(f"Forecast: {forecast}")
+            print(f"Lower Bound: {data.min()}")
+            print(f"Upper Bound: {data.max()}")
 
+        else: 
+            
+            forecasts[col] = forecast.iloc[0]
+    
+            model_summary[col] = {
+            'forecast': forecast.iloc[0],
+            'aic': best_aic,
+            'order': best_order,
+            'lower_bound': conf_int.iloc[0, 0],
+            'upper_bound': conf_int.iloc[0, 1]
+            }
+
+            print(f"{col}:")
+            print(f"Best order: {best_order}")
+            print(f"AIC: {best_aic}")
+            print(f"Forecast: {forecast.iloc[0]}")
+            print(f"Lower Bound: {conf_int.iloc[0, 0]}")
+            print(f"Upper Bound: {conf_int.iloc[0, 1]}")
+
+    return forecasts, model_summary
+
+def allocate_budget(forecasts, income, target_savings):
     total_forecast = sum(forecasts.values())
     budget = forecasts.copy()
 
@@ -163,8 +363,6 @@ def create_budget_forecast(monthly_data, income, target_savings):
         cat_percent[category] = percentage
         print(f"{category:<20}: Rs. {forecast_value:>8,.2f} ({percentage:>5.1f}%)")
 
-    endtime = time.time()
-
     if budget_surplus_deficit < 0:
         sorted_categories = sorted(forecasts.items(), key = lambda x:x[1], reverse=True)
 
@@ -227,9 +425,74 @@ def create_budget_forecast(monthly_data, income, target_savings):
                 print("⚠️ No further deductions possible.")
                 break
 
-        endtime = time.time()
+    return budget
+
+def engine_config(engine):
+    config = {"version": FORECAST_CACHE_VERSION, "engine": engine, "max_order": [3, 3, 3], "level": FORECAST_LEVEL}
+    if engine in ARIMA_SEARCHES:
+        # A search cut short by the budget keeps the best order it reached, so the budget is part of the result
+        config["time_budget"] = ARIMA_TIME_BUDGET
+    return json.dumps(config, sort_keys = True)
+
+def series_key(data, config):
+    """Hash of a monthly series (month-end dates and cent-rounded amounts) plus the engine configuration."""
+    digest = hashlib.sha1(config.encode())
+    digest.update(np.asarray(data.index.values, dtype = "datetime64[ns]").tobytes())
+    digest.update(np.round(np.asarray(data, dtype = float), 2).tobytes())
+    return digest.hexdigest()
+
+def monthly_series(monthly_data):
+    cols = [col for col in monthly_data.columns if not col.endswith(" %") and col != "Total"]
+    return {col: monthly_data[col].dropna() for col in cols}
+
+def forecast_cache_keys(monthly_data, engine = None):
+    config = engine_config(engine or FORECAST_ENGINE)
+    return {col: series_key(data, config) for col, data in monthly_series(monthly_data).items()}
+
+def create_budget_forecast(monthly_data, income, target_savings, engine = None, cache = None, models = None):
+    engine = engine or FORECAST_ENGINE
+    if engine not in FORECAST_ENGINES:
+        raise ValueError(f"Unknown forecast engine: {engine}")
+
+    start_time = time.time()
+
+    print("Monthly Data")
+    print(monthly_data)
+
+    if (monthly_data.shape[0] < 3):
+        budget = None
+        forecast = None
+        model_summary = None
+        print("Data not sufficient")
+        return {}, model_summary, {}
+    
+    series = monthly_series(monthly_data)
+
+    # Categories whose series and engine were forecast before skip fitting; only the allocation re-runs
+    config = engine_config(engine)
+    keys = {col: series_key(data, config) for col, data in series.items()} if cache is not None else {}
+    model_summary = {col: summary for col, summary in ((col, cache.get(key)) for col, key in keys.items()) if summary is not None}
+    misses = {col: data for col, data in series.items() if col not in model_summary}
+    if model_summary:
+        print(f"Forecast cache: {len(model_summary)} of {len(series)} categories cached")
+
+    if misses:
+        if engine in ARIMA_SEARCHES:
+            _, fitted = arima_forecasts(misses, ARIMA_SEARCHES[engine], models)
+        else:
+            _, fitted = statsforecast_forecasts(misses, engine)
+
+        model_summary.update(fitted)
+        if cache is not None:
+            for col in fitted:
+                cache.put(keys[col], fitted[col])
+
+    model_summary = {col: model_summary[col] for col in series}
+    forecasts = {col: summary["forecast"] for col, summary in model_summary.items()}
+
+    budget = allocate_budget(forecasts, income, target_savings)
 
-    elapsed_time = endtime - start_time
+    elapsed_time = time.time() - start_time
     print(elapsed_time)
              
     return forecasts, model_summary, budget
\ No newline at end of file
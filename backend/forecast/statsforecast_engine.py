@@ -0,0 +1,100 @@
+import os
+import pandas as pd
+from statsforecast import StatsForecast
+from statsforecast.models import AutoARIMA, AutoETS, HistoricAverage
+
+FORECAST_LEVEL = 95
+STATSFORECAST_WORKERS = int(os.getenv("STATSFORECAST_WORKERS", 1))
+
+STATSFORECAST_MODELS = {
+    "auto_arima": AutoARIMA,
+    "auto_ets": AutoETS
+}
+
+def to_long(series_by_key):
+    """
+    Stack {key: monthly series} into the long (unique_id, ds, y) frame statsforecast fits in one
+    call. Returns the frame and {unique_id: key}.
+    """
+    frames = []
+    keys = {}
+    for i, (key, data) in enumerate(series_by_key.items()):
+        unique_id = str(i)
+        keys[unique_id] = key
+        frames.append(pd.DataFrame({"unique_id": unique_id, "ds": data.index, "y": data.to_numpy(dtype = float)}))
+    return pd.concat(frames, ignore_index = True), keys
+
+def _describe(fitted):
+    # The chosen model and its AIC; None for series that fell back to the historic average
+    model = getattr(fitted, "model_", None)
+    if isinstance(fitted, AutoARIMA):
+        p, q, _, _, _, d, _ = model["arma"]
+        return (p, d, q), model["aic"]
+    if isinstance(fitted, AutoETS):
+        return model["method"], model["aic"]
+    return None, None
+
+def fit_statsforecast(series_by_key, engine):
+    """One-step forecasts for every series at once. Returns {key: summary dict}."""
+    series_by_key = {key: data for key, data in series_by_key.items() if len(data) > 0}
+    if not series_by_key:
+        return {}
+
+    long, keys = to_long(series_by_key)
+    model = STATSFORECAST_MODELS[engine]()
+    # Series too short for the model (AutoETS needs more than a handful of months) get the mean,
+    # which is also the ARIMA engine's fallback
+    sf = StatsForecast(models = [model], freq = "ME", n_jobs = STATSFORECAST_WORKERS, fallback_model = HistoricAverage())
+    sf.fit(df = long)
+    predictions = sf.predict(h = 1, level = [FORECAST_LEVEL]).set_index("unique_id")
+
+    results = {}
+    for row, unique_id in enumerate(sf.uids):
+        order, aic = _describe(sf.fitted_[row, 0])
+        prediction = predictions.loc[unique_id]
+        results[keys[unique_id]] = {
+            "forecast": prediction[model.alias],
+            "aic": aic,
+            "order": order,
+            "lower_bound": prediction[f"{model.alias}-lo-{FORECAST_LEVEL}"],
+            "upper_bound": prediction[f"{model.alias}-hi-{FORECAST_LEVEL}"]
+        }
+    return results
+
+def _forecasts_and_summary(series, fitted):
+    forecasts = {}
+    model_summary = {}
+    for col, data in series.items():
+        summary = fitted.get(col)
+        if summary is None or summary["forecast"] < 0:
+            # Same fallback as the ARIMA engine: the mean, bounded by the observed range
+            mean = data.mean() if len(data) > 0 else 0
+            summary = {
+                "forecast": mean,
+                "aic": 0,
+                "order": [0, 0, 0],
+                "lower_bound": data.min() if len(data) > 0 else 0,
+                "upper_bound": data.max() if len(data) > 0 else 0
+            }
+
+        forecasts[col] = summary["forecast"]
+        model_summary[col] = summary
+        print(f"{col}: {summary['order']} forecast {summary['forecast']:.2f} [{summary['lower_bound']:.2f}, {summary['upper_bound']:.2f}]")
+    return forecasts, model_summary
+
+def statsforecast_forecasts_many(series_by_owner, engine):
+    """
+    Forecast many users in a single statsforecast call. `series_by_owner` maps any owner key (a
+    user id) to {category: monthly series}; returns {owner: (forecasts, model_summary)}.
+    """
+    fitted = fit_statsforecast({
+        (owner, col): data for owner, series in series_by_owner.items() for col, data in series.items()
+    }, engine)
+
+    return {
+        owner: _forecasts_and_summary(series, {col: fitted.get((owner, col)) for col in series})
+        for owner, series in series_by_owner.items()
+    }
+
+def statsforecast_forecasts(series, engine):
+    return statsforecast_forecasts_many({None: series}, engine)[None]
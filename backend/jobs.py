@@ -0,0 +1,135 @@
+import os
+import uuid
+import asyncio
+import traceback
+from datetime import datetime
+from backend.database import SessionLocal
+from backend.pipeline import STAGES, InvalidStatement, PipelineResult
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_QUEUE_LIMIT = int(os.getenv("JOB_QUEUE_LIMIT", 20))
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", 3600))
+
+class Job:
+    def __init__(self, user_id: int):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.status = "queued"
+        self.stages = dict.fromkeys(STAGES)
+        self.result = None
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.finished_at = None
+        self.done = asyncio.Event()
+        self.task = None
+
+    @property
+    def finished(self):
+        return self.status in ("completed", "failed")
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stages": {stage: at.isoformat() if at else None for stage, at in self.stages.items()},
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class JobQueueFull(Exception):
+    pass
+
+class JobManager:
+    """
+    Runs budget pipelines in the background on at most `workers` concurrent jobs.
+
+    Every job gets its own database session because the request that submitted it
+    (and its session) is gone by the time the job runs.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, queue_limit: int = JOB_QUEUE_LIMIT, ttl_seconds: int = JOB_TTL_SECONDS, session_factory = SessionLocal):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.ttl_seconds = ttl_seconds
+        self.session_factory = session_factory
+        self.jobs = {}
+        self._semaphore = None
+
+    @property
+    def semaphore(self):
+        # Created on first use so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        return self._semaphore
+
+    def pending(self):
+        return sum(1 for job in self.jobs.values() if not job.finished)
+
+    def submit(self, user_id: int, pipeline_factory):
+        """pipeline_factory(db) must return the async event generator of run_budget_pipeline."""
+        self._evict_expired()
+        if self.pending() >= self.queue_limit:
+            raise JobQueueFull()
+
+        job = Job(user_id)
+        self.jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job, pipeline_factory))
+        return job
+
+    async def _run(self, job: Job, pipeline_factory):
+        async with self.semaphore:
+            job.status = "running"
+            try:
+                collected = PipelineResult()
+                async with self.session_factory() as db:
+                    async for event, value in pipeline_factory(db):
+                        collected.add(event, value)
+                        if event == "stage":
+                            job.stages[value] = datetime.utcnow()
+                            job.status = value
+                job.result = collected.response()
+                job.status = "completed"
+
+            except InvalidStatement:
+                job.status = "failed"
+                job.error = "Invalid Format"
+
+            except Exception as e:
+                traceback.print_exc()
+                job.status = "failed"
+                job.error = f"Classification failed: {str(e)}"
+
+            finally:
+                job.finished_at = datetime.utcnow()
+                job.done.set()
+
+    def get(self, job_id: str, user_id: int):
+        job = self.jobs.get(job_id)
+        if job is None or job.user_id != user_id:
+            return None
+        return job
+
+    async def wait(self, job: Job, timeout: float):
+        if job.finished or timeout <= 0:
+            return job
+        try:
+            await asyncio.wait_for(job.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return job
+
+    def _evict_expired(self):
+        now = datetime.utcnow()
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished and (now - job.finished_at).total_seconds() > self.ttl_seconds
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    async def shutdown(self):
+        tasks = [job.task for job in self.jobs.values() if job.task and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
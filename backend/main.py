@@ -1,37 +1,26 @@
-import math
 import asyncio
 from fastapi import FastAPI, Request, UploadFile, Form, File, APIRouter, Depends, HTTPException
 from fastapi.responses import HTMLResponse, StreamingResponse
 import traceback
 from pydantic import BaseModel
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
-import torch.nn.functional as F
 from Modelling.converter import l_t_id_converter, id_t_l_converter
-from Modelling.preprocessing import cleanTextPipeline
+from Modelling.preprocessing import shutdown_clean_pool
 from collections import defaultdict
 import os
-import numpy as np
-import pandas as pd
 from pathlib import Path
 from fastapi.templating import Jinja2Templates
 from datetime import datetime
-from io import BytesIO
-from backend.forecast.cleaner_shaping import cleaner_function, reshaping
-from backend.forecast.model import create_budget_forecast
-from backend.Visualize.img_converter import fig_to_base64
-from backend.Visualize.vis_forecast import visualize_forecast
+from backend.forecast.model import shutdown_fit_pool, FORECAST_ENGINES
+from backend.forecast.forecast_cache import forecast_cache
 from fastapi.middleware.cors import CORSMiddleware
-from backend.database import db_setup
+from backend.database import db_setup, enforce_unique_transactions, SessionLocal
+from backend.transaction import backfillContentHashes
 from backend.auth import router as auth_router
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from backend.database import User
 from backend.database import get_db
-from backend.auth import get_current_user, get_current_user_optional
-from backend.transaction import insertTransaction
-from backend.budget import forecastTransactions
-from backend.budget import deleteBudget
+from backend.auth import get_current_user, get_current_user_optional, get_admin_user
 from backend.intent_classfier.classifier_class import lightWeightIntentClassifier
 from backend.chatbots.general.knowledge_base_loader import knowledge_base_creation
 from backend.chatbots.general.pinecone_store import create_general_index, load_general_index
@@ -41,9 +30,18 @@ from backend.chatbots.personal.pinecone_store import create_user_index, load_use
 from backend.chatbots.personal.personal_chat import personal_chat
 from backend.chatbots.personal.personal_intent import PersonalIntentClassifier
 from backend.chatbots.personal.text_sql.llm_sql_chatbot import test_sql 
-from backend.chatbots.personal.text_sql.config import data_db
-from backend.chatbots.general.clean_transaction import clean_transactions, read_excel_dynamic
-from backend.chatbots.chat_memory import save_memory, memory_update, conversation_memory
+from backend.connection_pool import sql_pool
+from backend.query_metrics import query_stats, current_endpoint
+from starlette.routing import Match
+from backend.chatbots.chat_memory import save_memory, memory_update, conversation_memory, chat_history_writer
+from backend.classification.batch_inference import BatchInferenceEngine
+from backend.classification.inference_backends import INFERENCE_BACKEND, load_inference_model
+from backend.classification.category_cache import DescriptionCategoryCache, model_fingerprint
+from backend.classification.classifier import TransactionClassifier
+from backend.classification.cascade import LightWeightCategoryClassifier
+from backend.classification.merchant_rules import MerchantRules
+from backend.pipeline import run_budget_pipeline, InvalidStatement, PipelineResult, ndjson_events, spool_uploads
+from backend.jobs import JobManager, JobQueueFull
 # from backend.Visualize.vis_trend import analyze_trends
 
 model_path = os.path.abspath("backend/saved_model")
@@ -64,39 +62,51 @@ app.add_middleware(
     allow_headers=["*"],  
 )
 
+@app.middleware("http")
+async def track_endpoint(request: Request, call_next):
+    # Route templates rather than raw paths, so job ids do not split the query report
+    endpoint = request.url.path
+    for route in app.router.routes:
+        if route.matches(request.scope)[0] == Match.FULL:
+            endpoint = getattr(route, "path", endpoint)
+            break
+
+    token = current_endpoint.set(f"{request.method} {endpoint}")
+    try:
+        return await call_next(request)
+    finally:
+        current_endpoint.reset(token)
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 model = None
 tokenizer = None
+inference_engine = None
+transaction_classifier = None
 label_to_id = None
 id_to_label = None
 
+job_manager = JobManager()
+JOB_MAX_WAIT_SECONDS = 60
+
 class InputText(BaseModel):
     text: str
 
 templates = Jinja2Templates(directory="backend/templates")
 
-def clean_floats(data):
-    """Recursively replace NaN/Inf/-Inf values with 0 or None."""
-    if isinstance(data, dict):
-        return {k: clean_floats(v) for k, v in data.items()}
-    elif isinstance(data, list):
-        return [clean_floats(i) for i in data]
-    elif isinstance(data, float):
-        if math.isnan(data) or math.isinf(data):
-            return 0.0
-        return data
-    return data
-
 @app.on_event("startup")
 async def load_model():
-    global model, tokenizer, label_to_id, id_to_label, classifier
+    global model, tokenizer, inference_engine, transaction_classifier, label_to_id, id_to_label, classifier
     label_to_id = l_t_id_converter(unique_labels)
     id_to_label = id_t_l_converter(label_to_id)
 
-    tokenizer = AutoTokenizer.from_pretrained(model_path)
-    model = AutoModelForSequenceClassification.from_pretrained(model_path)
-    model.eval()
+    tokenizer, model = load_inference_model(model_path, INFERENCE_BACKEND)
+    inference_engine = BatchInferenceEngine(model, tokenizer)
+    # Quantized and ONNX outputs can differ slightly from fp32, so each backend gets its own cache namespace
+    category_cache = DescriptionCategoryCache(model_version = f"{model_fingerprint(model_path)}-{INFERENCE_BACKEND}")
+    fast_model = LightWeightCategoryClassifier().loadModel()
+    merchant_rules = MerchantRules(allowed_categories = unique_labels)
+    transaction_classifier = TransactionClassifier(inference_engine, id_to_label, cache = category_cache, fast_model = fast_model, rules = merchant_rules)
 
     classifier = lightWeightIntentClassifier(method = "hybrid")
     BASE_DIR = Path(__file__).resolve().parent
@@ -104,6 +114,19 @@ async def load_model():
     classifier.loadModel(filepath = str(MODEL_PATH))
 
     await db_setup()
+    async with SessionLocal() as db:
+        await backfillContentHashes(db)
+    await enforce_unique_transactions()
+    await sql_pool.open()
+    chat_history_writer.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await job_manager.shutdown()
+    await chat_history_writer.shutdown()
+    await sql_pool.close()
+    shutdown_fit_pool()
+    shutdown_clean_pool()
 
 @app.get("/")
 async def form_load(request: Request):
@@ -142,8 +165,8 @@ async def answer(input_data: InputText, db: Session = Depends(get_db), current_u
             memory_update(user_id, "bot", text)
 
             if current_user:
-                await save_memory(db, current_user.id, "user", user_query)
-                await save_memory(db, current_user.id, "bot", text)
+                save_memory(current_user.id, "user", user_query)
+                save_memory(current_user.id, "bot", text)
     
             return {"intent": intent, "confidence": confidence, "response": text}
         
@@ -173,8 +196,8 @@ async def answer(input_data: InputText, db: Session = Depends(get_db), current_u
 
                 memory_update(user_id, "user", user_query)
                 memory_update(user_id, "bot", text)
-                await save_memory(db, current_user.id, "user", user_query)
-                await save_memory(db, current_user.id, "bot", text)
+                save_memory(current_user.id, "user", user_query)
+                save_memory(current_user.id, "bot", text)
     
                 return {"intent": intent, "confidence": confidence, "response": text}
             
@@ -185,16 +208,15 @@ async def answer(input_data: InputText, db: Session = Depends(get_db), current_u
         elif final_intent[0] == "personal_sql":
 
             try:
-                t_sql = test_sql(db_config=data_db, openai_api_key=OPENAI_API_KEY)
-                await t_sql.initialize()
+                t_sql = test_sql(pool=sql_pool, openai_api_key=OPENAI_API_KEY)
                 result_dict, sql_query = await t_sql.sql_query_answer(user_id = user_id, query = combined_input)
     
                 response = await t_sql._generate_response_with_llm(query = user_query, results = result_dict, sql_query = sql_query)
 
                 memory_update(user_id, "user", user_query)
                 memory_update(user_id, "bot", response)
-                await save_memory(db, current_user.id, "user", user_query)
-                await save_memory(db, current_user.id, "bot", response)
+                save_memory(current_user.id, "user", user_query)
+                save_memory(current_user.id, "bot", response)
     
                 return {
                 'response': response,
@@ -211,153 +233,86 @@ async def answer(input_data: InputText, db: Session = Depends(get_db), current_u
     "response": "I'm not confident enough to answer that right now. Could you please rephrase your question or ask another question?"
     }
 
+def check_forecast_engine(forecast_engine: Optional[str]):
+    if forecast_engine is not None and forecast_engine not in FORECAST_ENGINES:
+        raise HTTPException(status_code=400, detail=f"forecast_engine must be one of {', '.join(FORECAST_ENGINES)}")
+
 @app.post("/predict_budget")
-async def predict(request: Request,  income: int = Form(), saving_amt: int = Form(), files: List[UploadFile] = File(...), db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    global model, tokenizer, label_to_id, id_to_label
+async def predict(request: Request,  income: int = Form(), saving_amt: int = Form(), forecast_engine: Optional[str] = Form(None), files: List[UploadFile] = File(...), db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    check_forecast_engine(forecast_engine)
 
     try: 
-        df_results = []
-        for file in files:
-            contents = await file.read()
-    
-            try:
-                df = read_excel_dynamic(contents)
-            except Exception:
-                return {"Error": "Invalid Format"}
-            
-            df = df.dropna(subset="Description")
-    
-            df_results.append(df)
-    
-        df = pd.concat(df_results, ignore_index=True)
-        df = clean_transactions(df)
-    
-        results = []
-        categories = []
-    
-        cleaned_text = [cleanTextPipeline(text) for text in df['Description']]
-
-        final_inputs = tokenizer(
-            cleaned_text,
-            return_tensors='pt',
-            padding=True,
-            truncation=True,
-            max_length=128
-        )
-
-        with torch.no_grad():
-            outputs = model(**final_inputs)
-            probs = F.softmax(outputs.logits, dim=1)
-            predicted_classes = torch.argmax(probs, dim=1)
-
-        for i, text in enumerate(df['Description']):
-            pred_class = predicted_classes[i].item()
-            confidence = probs[i][pred_class].item()
-        
-            results.append({
-                "text": text,
-                "category": id_to_label[pred_class],
-                "confidence": f"{confidence:.2f}"
-            })
-        
-            categories.append(id_to_label[pred_class])
-    
-        df['Category'] = categories
-        txn_stream = BytesIO()
-        df.to_excel(txn_stream, index = False)
-    
-        txn_stream.seek(0)
-    
-        request.app.state.txn_stream = txn_stream
-    
-        await deleteBudget(db)
-    
-        await insertTransaction(current_user.id, df, db)
-    
-        cleaned_df = cleaner_function(df)
-    
-        monthly_data = reshaping(cleaned_df)
-
-        forecast_month = None
+        uploads = await spool_uploads(files)
 
-        print(f"\n\nMonthly data shape: {monthly_data.shape[0]}\n\n")
+        result = PipelineResult()
+        async for event, value in run_budget_pipeline(uploads, income, saving_amt, current_user.id, db, transaction_classifier, request.app.state, forecast_engine):
+            result.add(event, value)
 
-        # If monthly_data has less than 3 rows overall -> skip budget forecasting.
-        if monthly_data.shape[0] < 3:
-            print("⚠️ Monthly data has fewer than 3 periods — skipping budget forecast.")
-            # still prepare the transaction excel and return classification results
-            forecast = {}
-            summary = None
-            budget = {}
-            final_fig1 = None  # no image
+        return result.response()
 
-
-        else:
-            last_month = monthly_data.index[-1]
-            forecast_month = last_month + pd.DateOffset(months = 1)
-        
-            # call the forecast function (it is now safer)
-            forecast, summary, budget = create_budget_forecast(monthly_data, income, saving_amt)
-        
-            # If create_budget_forecast returns None/empty budget (e.g., per-category insufficient),
-            # handle it gracefully:
-            if not forecast:
-                print("⚠️ Forecast returned empty. Skipping image generation.")
-                final_fig1 = None
-            else:
-                # visualize only if forecast and monthly_data okay
-                try:
-                    fig1 = visualize_forecast(monthly_data, forecast, summary)
-                    final_fig1 = fig_to_base64(fig1)
-                except Exception as e:
-                    print(f"⚠️ Visualization failed: {e}")
-                    final_fig1 = None
-    
-        print(f"\n\nBudget: {budget}\n\n")
-        print(f"\n\Figure: {final_fig1}\n\n")
-        if budget:
-            final_dict = {"Category": [], "Budget_Amount": [], "Forecasted_Amount": []}
-            for key, value in budget.items():
-                final_dict['Category'].append(key)
-                final_dict['Budget_Amount'].append(value)
-            for value in forecast.values():
-                final_dict['Forecasted_Amount'].append(value)
-            bf_df = pd.DataFrame(final_dict)
-            budget_stream = BytesIO()
-            bf_df.to_excel(budget_stream, index = False)
-            budget_stream.seek(0)
-            request.app.state.budget_stream = budget_stream
-            await forecastTransactions(current_user.id, forecast_month, bf_df, db)
-        else:
-            # clear previous streams if any
-            request.app.state.budget_stream = None
-    
-        fig1 = visualize_forecast(monthly_data, forecast, summary)
-        # fig2 = analyze_trends(monthly_data)
-    
-        final_fig1 = fig_to_base64(fig1)
-        # final_fig2 = fig_to_base64(fig2)
-    
-        docs = await get_user_docs(db, current_user.id)
-    
-        # create_user_index(docs, current_user.id)
-
-        forecast = clean_floats(forecast) if forecast else {}
-        summary = clean_floats(summary) if summary else None
-        budget = clean_floats(budget) if budget else {}
-        
-        return {
-            "results": results,
-            "forecast": forecast,
-            "summary": summary,
-            "budget": budget,
-            "image_data": final_fig1
-        }
+    except InvalidStatement:
+        raise HTTPException(status_code=400, detail="Invalid Format")
     
     except Exception as e:
         traceback.print_exc()  # log full traceback to console
         raise HTTPException(status_code=500, detail=f"Classification failed: {str(e)}")
 
+@app.post("/predict_budget/stream")
+async def predict_stream(request: Request, income: int = Form(), saving_amt: int = Form(), forecast_engine: Optional[str] = Form(None), files: List[UploadFile] = File(...), current_user: User = Depends(get_current_user)):
+    check_forecast_engine(forecast_engine)
+    uploads = await spool_uploads(files)
+    user_id = current_user.id
+
+    async def stream():
+        # The body is sent after the endpoint returns, so the stream owns its session
+        async with SessionLocal() as db:
+            events = run_budget_pipeline(uploads, income, saving_amt, user_id, db, transaction_classifier, request.app.state, forecast_engine)
+            async for line in ndjson_events(events):
+                yield line
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/predict_budget/jobs", status_code=202)
+async def submit_predict_job(request: Request, income: int = Form(), saving_amt: int = Form(), forecast_engine: Optional[str] = Form(None), files: List[UploadFile] = File(...), current_user: User = Depends(get_current_user)):
+    check_forecast_engine(forecast_engine)
+    # Uploads are closed once this request returns, so the job gets its own spooled copy
+    uploads = await spool_uploads(files)
+    user_id = current_user.id
+
+    def pipeline_factory(db):
+        return run_budget_pipeline(uploads, income, saving_amt, user_id, db, transaction_classifier, request.app.state, forecast_engine)
+
+    try:
+        job = job_manager.submit(user_id, pipeline_factory)
+    except JobQueueFull:
+        raise HTTPException(status_code=429, detail="Too many budget jobs in progress, try again later")
+
+    return job.to_dict()
+
+@app.get("/predict_budget/jobs/{job_id}")
+async def predict_job_status(job_id: str, current_user: User = Depends(get_current_user)):
+    job = job_manager.get(job_id, current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/predict_budget/jobs/{job_id}/result")
+async def predict_job_result(job_id: str, wait: float = 0, current_user: User = Depends(get_current_user)):
+    job = job_manager.get(job_id, current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    # Long-poll: hold the request until the job finishes or `wait` seconds pass
+    await job_manager.wait(job, min(max(wait, 0), JOB_MAX_WAIT_SECONDS))
+
+    if job.status == "completed":
+        return job.result
+    if job.status == "failed":
+        if job.error == "Invalid Format":
+            raise HTTPException(status_code=400, detail="Invalid Format")
+        raise HTTPException(status_code=500, detail=job.error)
+    return job.to_dict()
+
 # @app.post("/budget")
 # async def budget(request: Request, files: List[UploadFile] = File(...)):
 #     results = []
@@ -380,6 +335,36 @@ async def predict(request: Request,  income: int = Form(), saving_amt: int = For
 #         "bud_results": results
 #     })
 
+@app.get("/metrics/classification")
+async def classification_metrics(admin: User = Depends(get_admin_user)):
+    if transaction_classifier is None:
+        return {"error": "Classifier is not loaded."}
+    return transaction_classifier.stats()
+
+@app.get("/metrics/forecast_cache")
+async def forecast_cache_metrics(admin: User = Depends(get_admin_user)):
+    return forecast_cache.stats()
+
+@app.get("/metrics/db_pool")
+async def db_pool_metrics(admin: User = Depends(get_admin_user)):
+    return sql_pool.stats()
+
+@app.get("/metrics/queries")
+async def query_metrics(limit: int = 50, admin: User = Depends(get_admin_user)):
+    return query_stats.report(limit)
+
+@app.post("/classification/rules/reload")
+async def reload_merchant_rules(current_user: User = Depends(get_current_user)):
+    if transaction_classifier is None or transaction_classifier.rules is None:
+        raise HTTPException(status_code=503, detail="Classifier is not loaded")
+
+    try:
+        count = transaction_classifier.rules.reload()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Merchant rules could not be reloaded: {str(e)}")
+
+    return {"rules": count}
+
 @app.post("/download/classification")
 async def donwload_classification():
     buffer = getattr(app.state, "txn_stream", None)
@@ -0,0 +1,69 @@
+from sqlalchemy import text
+import logging
+
+logger = logging.getLogger(__name__)
+
+# create_all only creates missing tables, so columns and indexes added to existing tables are
+# listed here as idempotent Postgres DDL and applied on every startup, in order.
+MIGRATIONS = [
+    "ALTER TABLE transactions ADD COLUMN IF NOT EXISTS content_hash VARCHAR",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_user_reference ON transactions (user_id, reference_code)",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_user_content_hash ON transactions (user_id, content_hash)",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_user_date_time ON transactions (user_id, date_time)",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_user_type_category_date_time ON transactions (user_id, type, category, date_time)",
+    # Budgets used to be appended on every forecast; keep the newest row per month and category before enforcing uniqueness
+    """
+    DELETE FROM budgets older USING budgets newer
+    WHERE older.user_id = newer.user_id AND older.month = newer.month
+      AND older.category = newer.category AND older.id < newer.id
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_budgets_user_month_category ON budgets (user_id, month, category)",
+    # Backfill the rollup once, when it is first created next to an existing ledger
+    """
+    INSERT INTO monthly_category_totals (user_id, month, category, debit, credit, count)
+    SELECT user_id, DATE_TRUNC('month', date_time)::date, category,
+           SUM(CASE WHEN type = 'expense' THEN amount ELSE 0 END),
+           SUM(CASE WHEN type = 'income' THEN amount ELSE 0 END),
+           COUNT(*)
+    FROM transactions
+    WHERE category IS NOT NULL AND NOT EXISTS (SELECT 1 FROM monthly_category_totals)
+    GROUP BY user_id, DATE_TRUNC('month', date_time)::date, category
+    """,
+]
+
+# Run after backfillContentHashes, since rows stored before content_hash existed only become
+# comparable once they have one. Uploads used to race past the stored-key lookup, so the later
+# copy of a duplicated row is deleted, and taken back out of the rollup, before the index exists.
+UNIQUE_TRANSACTIONS = [
+    """
+    WITH removed AS (
+        DELETE FROM transactions newer USING transactions older
+        WHERE newer.user_id = older.user_id AND newer.reference_code = older.reference_code
+          AND newer.content_hash = older.content_hash AND newer.id > older.id
+        RETURNING newer.user_id, newer.date_time, newer.type, newer.amount, newer.category
+    ), removed_totals AS (
+        SELECT user_id, DATE_TRUNC('month', date_time)::date AS month, category,
+               SUM(CASE WHEN type = 'expense' THEN amount ELSE 0 END) AS debit,
+               SUM(CASE WHEN type = 'income' THEN amount ELSE 0 END) AS credit,
+               COUNT(*) AS count
+        FROM removed
+        GROUP BY user_id, DATE_TRUNC('month', date_time)::date, category
+    )
+    UPDATE monthly_category_totals totals
+    SET debit = totals.debit - removed_totals.debit,
+        credit = totals.credit - removed_totals.credit,
+        count = totals.count - removed_totals.count
+    FROM removed_totals
+    WHERE totals.user_id = removed_totals.user_id AND totals.month = removed_totals.month
+      AND totals.category = removed_totals.category
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_transactions_user_reference_content_hash ON transactions (user_id, reference_code, content_hash)",
+]
+
+async def run_migrations(conn, statements = MIGRATIONS):
+    if conn.dialect.name != "postgresql":
+        return
+
+    for statement in statements:
+        await conn.execute(text(statement))
+    logger.info(f"Applied {len(statements)} schema migrations")
@@ -0,0 +1,309 @@
+import os
+import json
+import math
+import tempfile
+import traceback
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from io import BytesIO
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.forecast.cleaner_shaping import reshape_monthly_totals
+from backend.forecast.model import create_budget_forecast, forecast_cache_keys
+from backend.forecast.forecast_cache import forecast_cache
+from backend.Visualize.img_converter import fig_to_base64
+from backend.Visualize.vis_forecast import visualize_forecast
+from backend.transaction import insertTransaction, content_hashes, transaction_keys, storedTransactionCategories, loadMonthlyTotals
+from backend.budget import forecastTransactions, deleteBudget, loadForecastModels, saveForecastModels
+from backend.chatbots.personal.personal_docs import get_user_docs
+from backend.chatbots.general.clean_transaction import clean_transactions, read_statement_chunks
+
+STAGES = ("parsed", "classified", "persisted", "forecast", "rendered")
+
+# Uploads larger than this are spooled to a temporary file instead of being held in memory
+UPLOAD_SPOOL_MAX_MEMORY = int(os.getenv("UPLOAD_SPOOL_MAX_MEMORY", 4 * 1024 * 1024))
+UPLOAD_READ_CHUNK = 1024 * 1024
+
+# Shared by every request so a burst of multi-file uploads cannot start unbounded parser threads
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", 4))
+
+# Rows stored by an earlier upload are not reclassified, so there is no confidence to report
+STORED_CONFIDENCE = "-"
+_parse_pool = ThreadPoolExecutor(max_workers = PARSE_WORKERS, thread_name_prefix = "statement-parse")
+
+# pyplot keeps global figure state, so concurrent jobs must not render at the same time
+_render_lock = threading.Lock()
+
+class InvalidStatement(Exception):
+    def __init__(self, filename: str, reason: str = ""):
+        super().__init__(filename)
+        self.filename = filename
+        self.reason = reason
+
+def clean_floats(data):
+    """Recursively replace NaN/Inf/-Inf values with 0 or None."""
+    if isinstance(data, dict):
+        return {k: clean_floats(v) for k, v in data.items()}
+    elif isinstance(data, list):
+        return [clean_floats(i) for i in data]
+    elif isinstance(data, float):
+        if math.isnan(data) or math.isinf(data):
+            return 0.0
+        return data
+    return data
+
+def to_excel_stream(df: pd.DataFrame):
+    stream = BytesIO()
+    df.to_excel(stream, index = False)
+    stream.seek(0)
+    return stream
+
+def render_forecast(monthly_data, forecast, summary):
+    with _render_lock:
+        try:
+            fig = visualize_forecast(monthly_data, forecast, summary)
+            return fig_to_base64(fig)
+        finally:
+            plt.close("all")
+
+async def spool_upload(upload):
+    """Copy an UploadFile into a spooled temp file that outlives the request; returns (filename, file)."""
+    spooled = tempfile.SpooledTemporaryFile(max_size = UPLOAD_SPOOL_MAX_MEMORY)
+    while chunk := await upload.read(UPLOAD_READ_CHUNK):
+        spooled.write(chunk)
+    spooled.seek(0)
+    return upload.filename, spooled
+
+async def spool_uploads(files):
+    return await asyncio.gather(*(spool_upload(file) for file in files))
+
+def iter_statement_chunks(filename: str, source):
+    """Yield cleaned DataFrame chunks of one upload."""
+    try:
+        for df in read_statement_chunks(source):
+            df = df.dropna(subset="Description")
+            yield clean_transactions(df)
+    except Exception as e:
+        raise InvalidStatement(filename, str(e))
+    finally:
+        if hasattr(source, "close"):
+            source.close()
+
+def parse_statement(filename: str, source):
+    # Streaming bounds what the workbook/CSV reader holds, not the statement: the pipeline dedupes
+    # across the whole upload and returns it classified (results and download), so it needs every
+    # row at once and the chunks are joined here. Peak memory is the cleaned statement, not the raw file.
+    return pd.concat(iter_statement_chunks(filename, source), ignore_index=True)
+
+async def parse_statements(uploads):
+    """
+    Parse every upload concurrently on the shared parser pool.
+
+    Returns the statements merged in upload order and one {"file", "error", "reason"} entry per
+    upload that could not be read, `reason` being what the reader failed with. Only when no upload is readable does it raise InvalidStatement.
+    """
+    loop = asyncio.get_running_loop()
+    parsed = await asyncio.gather(
+        *(loop.run_in_executor(_parse_pool, parse_statement, filename, source) for filename, source in uploads),
+        return_exceptions = True
+    )
+
+    frames = []
+    file_errors = []
+    for (filename, _), result in zip(uploads, parsed):
+        if isinstance(result, InvalidStatement):
+            print(f"⚠️ Could not parse {filename}: {result.reason}")
+            file_errors.append({"file": filename, "error": "Invalid Format", "reason": result.reason})
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            frames.append(result)
+
+    if not frames:
+        raise InvalidStatement(", ".join(filename for filename, _ in uploads), "no readable statements")
+
+    return pd.concat(frames, ignore_index = True), file_errors
+
+class PipelineResult:
+    """Collects pipeline events into the response body of the blocking endpoint."""
+
+    def __init__(self):
+        self.rows = {}
+        self.payload = None
+
+    def add(self, event: str, value):
+        if event == "rows":
+            self.rows.update(value)
+        elif event == "result":
+            self.payload = value
+
+    def response(self):
+        return {"results": [self.rows[row] for row in sorted(self.rows)], **self.payload}
+
+async def run_budget_pipeline(uploads, income: int, saving_amt: int, user_id: int, db: AsyncSession, classifier, state, forecast_engine: str = None):
+    """
+    Parse, classify, persist, forecast and render one set of uploaded statements. Only rows the
+    user has not stored yet are classified and inserted; the forecast is rebuilt from the stored history.
+
+    Yields ("rows", [(row_index, row), ...]) for the already stored rows, with their stored
+    category, and then as classification resolves each micro-batch,
+    ("stage", name) after each of STAGES completes and finally ("result", payload), so the same
+    pipeline backs the blocking, background job and streaming endpoints. Rows arrive out of
+    statement order; PipelineResult puts them back. Download buffers are left on `state`
+    exactly like the original endpoint did. `forecast_engine` picks one of FORECAST_ENGINES for
+    this request, defaulting to FORECAST_ENGINE. Categories whose monthly series was forecast
+    before with the same engine come from forecast_cache and skip model fitting. ARIMA refits
+    warm-start from the user's stored orders and store the new winners.
+    """
+    df, file_errors = await parse_statements(uploads)
+
+    # Rows this user already has stored (or that repeat within the upload) keep their category
+    keys = transaction_keys(df, content_hashes(df))
+    key_categories = await storedTransactionCategories(user_id, keys, db)
+    stored = keys.isin(key_categories.keys())
+    is_new = ~stored & ~keys.duplicated()
+    new_df = df[is_new]
+    print(f"Upload has {len(new_df)} new and {len(df) - len(new_df)} already stored transactions")
+    yield "stage", "parsed"
+
+    # Every statement row is reported, indexed by its position in the upload
+    texts = df['Description'].tolist()
+    row_keys = keys.to_numpy()
+    new_positions = np.flatnonzero(is_new)
+    repeats = {}
+    for position in np.flatnonzero(~stored & ~is_new):
+        repeats.setdefault(row_keys[position], []).append(position)
+
+    stored_positions = np.flatnonzero(stored)
+    if len(stored_positions):
+        yield "rows", [(int(position), {
+            "text": texts[position],
+            "category": key_categories[row_keys[position]],
+            "confidence": STORED_CONFIDENCE
+        }) for position in stored_positions]
+
+    descriptions = new_df['Description'].tolist()
+    categories = [None] * len(descriptions)
+
+    async for indices, batch_categories, batch_confidences in classifier.iter_classify(db, descriptions):
+        rows = []
+        for row, category, confidence in zip(indices, batch_categories, batch_confidences):
+            categories[row] = category
+            # Repeats of a new row within the upload take its category
+            position = new_positions[row]
+            for same in [position, *repeats.get(row_keys[position], [])]:
+                rows.append((int(same), {
+                    "text": texts[same],
+                    "category": category,
+                    "confidence": f"{confidence:.2f}"
+                }))
+        yield "rows", rows
+
+    key_categories.update(zip(keys[is_new], categories))
+    df['Category'] = keys.map(key_categories)
+    state.txn_stream = await asyncio.to_thread(to_excel_stream, df)
+    yield "stage", "classified"
+
+    await deleteBudget(db)
+
+    # A concurrent upload of the same statement may have stored some of these rows first
+    inserted = await insertTransaction(user_id, df[is_new], db)
+    yield "stage", "persisted"
+
+    # The forecast covers everything stored for the user, read from the monthly rollup
+    monthly_data = reshape_monthly_totals(await loadMonthlyTotals(user_id, db))
+
+    forecast_month = None
+
+    print(f"\n\nMonthly data shape: {monthly_data.shape[0]}\n\n")
+
+    # If monthly_data has less than 3 rows overall -> skip budget forecasting.
+    if monthly_data.shape[0] < 3:
+        print("⚠️ Monthly data has fewer than 3 periods — skipping budget forecast.")
+        forecast = {}
+        summary = None
+        budget = {}
+
+    else:
+        last_month = monthly_data.index[-1]
+        forecast_month = last_month + pd.DateOffset(months = 1)
+
+        await forecast_cache.load(db, forecast_cache_keys(monthly_data, forecast_engine).values())
+        models = await loadForecastModels(user_id, db)
+        stored_models = {col: dict(model) for col, model in models.items()}
+        forecast, summary, budget = await asyncio.to_thread(create_budget_forecast, monthly_data, income, saving_amt, forecast_engine, forecast_cache, models)
+        await forecast_cache.persist(db)
+        await saveForecastModels(user_id, {col: model for col, model in models.items() if model != stored_models.get(col)}, db)
+
+        if not forecast:
+            print("⚠️ Forecast returned empty.")
+
+    print(f"\n\nBudget: {budget}\n\n")
+    if budget:
+        final_dict = {"Category": [], "Budget_Amount": [], "Forecasted_Amount": []}
+        for key, value in budget.items():
+            final_dict['Category'].append(key)
+            final_dict['Budget_Amount'].append(value)
+        for value in forecast.values():
+            final_dict['Forecasted_Amount'].append(value)
+        bf_df = pd.DataFrame(final_dict)
+        state.budget_stream = await asyncio.to_thread(to_excel_stream, bf_df)
+        await forecastTransactions(user_id, forecast_month, bf_df, db)
+    else:
+        # clear previous streams if any
+        state.budget_stream = None
+    yield "stage", "forecast"
+
+    final_fig1 = None  # no image without a forecast
+    if forecast and monthly_data.shape[0] >= 3:
+        try:
+            final_fig1 = await asyncio.to_thread(render_forecast, monthly_data, forecast, summary)
+        except Exception as e:
+            # Transactions and budgets are already committed; a chart failure must not fail the upload
+            print(f"⚠️ Visualization failed: {e}")
+
+    docs = await get_user_docs(db, user_id)
+
+    # create_user_index(docs, user_id)
+    yield "stage", "rendered"
+
+    forecast = clean_floats(forecast) if forecast else {}
+    summary = clean_floats(summary) if summary else None
+    budget = clean_floats(budget) if budget else {}
+
+    yield "result", {
+        "file_errors": file_errors,
+        "new_transactions": inserted,
+        "duplicate_transactions": len(df) - inserted,
+        "forecast": forecast,
+        "summary": summary,
+        "budget": budget,
+        "image_data": final_fig1
+    }
+
+async def ndjson_events(events):
+    """
+    Serialize pipeline events as newline-delimited JSON for the streaming endpoint.
+
+    The HTTP status is already sent once the first line goes out, so failures are reported
+    in-band as a final {"type": "error"} message with the same text the blocking endpoint uses.
+    """
+    try:
+        async for event, value in events:
+            if event == "rows":
+                message = {"type": "rows", "rows": [{"index": row, **data} for row, data in value]}
+            elif event == "stage":
+                message = {"type": "stage", "stage": value}
+            else:
+                message = {"type": "result", **value}
+            yield json.dumps(message, default=str) + "\n"
+
+    except InvalidStatement:
+        yield json.dumps({"type": "error", "detail": "Invalid Format"}) + "\n"
+
+    except Exception as e:
+        traceback.print_exc()
+        yield json.dumps({"type": "error", "detail": f"Classification failed: {str(e)}"}) + "\n"
@@ -0,0 +1,141 @@
+import os
+import re
+import time
+import random
+import logging
+from collections import deque
+from contextvars import ContextVar
+from sqlalchemy import event
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+# Share of queries under the slow threshold that are logged anyway; slow queries are always logged
+QUERY_LOG_SAMPLE_RATE = float(os.getenv("QUERY_LOG_SAMPLE_RATE", 0.01))
+QUERY_STATS_MAX_FINGERPRINTS = int(os.getenv("QUERY_STATS_MAX_FINGERPRINTS", 500))
+QUERY_STATS_WINDOW = 1000
+OTHER_FINGERPRINT = "<other>"
+
+logger = logging.getLogger("backend.sql")
+
+# "METHOD /route/{param}" of the request being served, set by the middleware in main.py
+current_endpoint = ContextVar("current_endpoint", default = None)
+
+_LITERALS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\$\d+|%\(\w+\)s|(?<![:\w]):\w+"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:::\w+)?(?:\s*,\s*\?(?:::\w+)?)*\s*\)"), "(?+)"),
+    (re.compile(r"\(\?\+\)(?:\s*,\s*\(\?\+\))+"), "(?+)+"),
+    (re.compile(r"\s+"), " ")
+]
+
+def fingerprint(statement: str) -> str:
+    """Statement with literals, bind parameters and IN lists collapsed, so repeats of a query group together."""
+    for pattern, replacement in _LITERALS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+class FingerprintStats:
+    def __init__(self):
+        self.count = 0
+        self.slow = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.endpoints = {}
+        self.recent_ms = deque(maxlen = QUERY_STATS_WINDOW)
+
+    def add(self, elapsed_ms: float, rows, endpoint, slow: bool):
+        self.count += 1
+        self.slow += slow
+        self.rows += rows or 0
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.recent_ms.append(elapsed_ms)
+        if endpoint:
+            self.endpoints[endpoint] = self.endpoints.get(endpoint, 0) + 1
+
+    def percentile(self, q: float) -> float:
+        ordered = sorted(self.recent_ms)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+class QueryStats:
+    """Per-fingerprint latency aggregates plus the slow-query and sampled query log."""
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS, sample_rate: float = QUERY_LOG_SAMPLE_RATE,
+                 max_fingerprints: int = QUERY_STATS_MAX_FINGERPRINTS):
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self.max_fingerprints = max_fingerprints
+        self.fingerprints = {}
+
+    def record(self, statement: str, elapsed_ms: float, rows = None, source: str = "orm"):
+        key = fingerprint(statement)
+        endpoint = current_endpoint.get()
+        slow = elapsed_ms >= self.slow_ms
+
+        stats = self.fingerprints.get(key)
+        if stats is None:
+            # Generated SQL can vary without bound; past the cap new shapes share one bucket
+            if len(self.fingerprints) >= self.max_fingerprints:
+                key = OTHER_FINGERPRINT
+            stats = self.fingerprints.setdefault(key, FingerprintStats())
+        stats.add(elapsed_ms, rows, endpoint, slow)
+
+        if slow:
+            logger.warning("slow query %.1fms rows=%s endpoint=%s source=%s: %s", elapsed_ms, rows, endpoint, source, key)
+        elif self.sample_rate and random.random() < self.sample_rate:
+            logger.info("query %.1fms rows=%s endpoint=%s source=%s: %s", elapsed_ms, rows, endpoint, source, key)
+
+    def report(self, limit: int = 50):
+        ranked = sorted(self.fingerprints.items(), key = lambda item: item[1].total_ms, reverse = True)
+        return {
+            "slow_query_ms": self.slow_ms,
+            "fingerprints": len(self.fingerprints),
+            "queries": [
+                {
+                    "fingerprint": key,
+                    "count": stats.count,
+                    "slow": stats.slow,
+                    "rows": stats.rows,
+                    "total_ms": round(stats.total_ms, 2),
+                    "mean_ms": round(stats.total_ms / stats.count, 2),
+                    "p50_ms": round(stats.percentile(0.5), 2),
+                    "p95_ms": round(stats.percentile(0.95), 2),
+                    "max_ms": round(stats.max_ms, 2),
+                    "endpoints": stats.endpoints
+                }
+                for key, stats in ranked[:limit]
+            ]
+        }
+
+    def reset(self):
+        self.fingerprints = {}
+
+query_stats = QueryStats()
+
+def _row_count(cursor):
+    if cursor.rowcount is not None and cursor.rowcount >= 0:
+        return cursor.rowcount
+    # The async adapters buffer SELECT results before returning, so the buffer holds the whole result
+    rows = getattr(cursor, "_rows", None)
+    return len(rows) if rows is not None else None
+
+def instrument_engine(engine, stats: QueryStats = query_stats):
+    """Time every statement an (async) engine executes through SQLAlchemy's cursor events."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start"].pop()
+        stats.record(statement, (time.perf_counter() - start) * 1000, _row_count(cursor))
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _failed(exception_context):
+        # after_cursor_execute does not run for failed statements
+        starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+        if starts:
+            starts.pop()
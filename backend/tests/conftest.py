@@ -90,6 +90,12 @@ async def db_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+@pytest.fixture
+def plain_text_cleaning(monkeypatch):
+    """Replaces the NLTK cleaning in front of the transformer with lowercasing, so classifier tests need no NLTK data"""
+    monkeypatch.setattr("backend.classification.classifier.cleanTextPipeline_batch", lambda texts, workers=1: [text.lower() for text in texts])
+
+
 async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
     """Override for get_db dependency"""
     async with TestAsyncSessionLocal() as session:
@@ -0,0 +1,128 @@
+import time
+import numpy as np
+import pandas as pd
+from backend.forecast import model
+from backend.forecast.model import arima_orders, best_aic, find_best_arima_models, forecast_arima, stepwise_search
+
+
+def monthly(values):
+    return pd.Series(values, index=pd.date_range("2024-01-31", periods=len(values), freq="ME"), dtype=float)
+
+
+def test_ties_go_to_the_first_order_in_the_grid():
+    orders = [(0, 0, 0), (0, 0, 1), (1, 0, 0)]
+    assert best_aic(orders, [12.0, 10.0, 10.0]) == ((0, 0, 1), 10.0)
+    assert best_aic(orders, [None, None, None]) == (None, np.inf)
+
+
+def test_orders_too_large_for_the_series_are_skipped():
+    assert max(sum(order) for order in arima_orders(monthly([1, 2, 3, 4]))) == 3
+
+
+def test_process_pool_picks_the_same_orders_as_the_serial_search():
+    series = {
+        "Travel": monthly([5200, 6100, 4800, 7000, 6500, 5900, 6200]),
+        "Dining & Food": monthly([3100, 2900, 3500, 3300, 3600, 3400, 3000])
+    }
+
+    serial = find_best_arima_models(series, max_p=1, max_d=1, max_q=1, workers=1)
+    pooled = find_best_arima_models(series, max_p=1, max_d=1, max_q=1, workers=2)
+
+    assert pooled == serial
+
+
+def test_stepwise_search_fixes_d_and_stays_within_bounds():
+    data = monthly([5200, 6100, 4800, 7000, 6500, 5900, 6200, 6800, 5600, 6400])
+
+    order, aic = find_best_arima_models({"Travel": data}, max_p=2, max_q=2, workers=1, search="stepwise",
+                                        stationary={"Travel": True}, time_budget=0)["Travel"]
+
+    assert order[1] == 0
+    assert order[0] <= 2 and order[2] <= 2
+    assert aic < np.inf
+
+
+def test_stepwise_search_needs_fewer_fits_than_the_grid(monkeypatch):
+    fits = []
+    real_fit_aic = model.fit_aic
+    monkeypatch.setattr(model, "fit_aic", lambda data, order: fits.append(order) or real_fit_aic(data, order))
+    data = monthly([5200, 6100, 4800, 7000, 6500, 5900, 6200, 6800, 5600, 6400])
+
+    stepwise_search(data, d=1, time_budget=0)
+
+    assert len(fits) == len(set(fits))
+    assert len(fits) < len(arima_orders(data))
+
+
+def test_expired_budget_falls_back_to_the_mean_forecast():
+    data = monthly([5200, 6100, 4800, 7000, 6500, 5900])
+
+    order, aic = stepwise_search(data, d=0, time_budget=1e-9)
+    forecast, _, _ = forecast_arima(data, order)
+
+    assert order is None
+    assert forecast.iloc[0] == data.mean()
+
+
+def test_warm_start_only_searches_the_previous_neighbourhood(monkeypatch):
+    data = monthly([5200, 6100, 4800, 7000, 6500, 5900, 6200, 6800, 5600, 6400])
+    models = {}
+    model.arima_forecasts({"Travel": data.iloc[:-1]}, search="stepwise", models=models)
+    previous = models["Travel"]
+
+    fits = []
+    real_fit_aic = model.fit_aic
+    monkeypatch.setattr(model, "fit_aic", lambda data, order, start_params=None: fits.append(order) or real_fit_aic(data, order, start_params))
+    order, aic = find_best_arima_models({"Travel": data}, workers=1, previous={"Travel": previous})["Travel"]
+
+    assert fits[0] == tuple(previous["order"])
+    assert set(fits) == set(model.neighbourhood(tuple(previous["order"]), data))
+    assert order in fits
+
+
+def test_warm_started_order_is_forecast_from_its_stored_parameters(monkeypatch):
+    data = monthly([5200, 6100, 4800, 7000, 6500, 5900, 6200, 6800, 5600, 6400])
+    models = {}
+    model.arima_forecasts({"Travel": data.iloc[:-1]}, search="stepwise", models=models)
+    previous = dict(models["Travel"])
+
+    class ColdStartFails(model.ARIMA):
+        # Like the statsmodels fits that only converge from the stored parameters
+        def fit(self, start_params=None, **kwargs):
+            if start_params is None and tuple(self.order) == tuple(previous["order"]):
+                raise np.linalg.LinAlgError("LU decomposition error.")
+            return super().fit(start_params=start_params, **kwargs)
+
+    monkeypatch.setattr(model, "ARIMA", ColdStartFails)
+    monkeypatch.setattr(model, "neighbourhood", lambda order, data, max_p=3, max_q=3: [order])
+
+    forecasts, summary = model.arima_forecasts({"Travel": data}, search="stepwise", models=models)
+
+    assert summary["Travel"]["order"] == tuple(previous["order"])
+    assert models["Travel"]["n_obs"] == len(data)
+
+
+def test_degraded_warm_start_falls_back_to_the_full_search():
+    data = monthly([5200, 6100, 4800, 7000, 6500, 5900, 6200, 6800, 5600, 6400])
+    # A stored fit far better than anything reachable now
+    previous = {"order": [1, 0, 0], "params": [6000.0, 0.1, 1e5], "aic": -1e6, "n_obs": 9}
+
+    assert model.warm_search(data, previous) is None
+    assert model.warm_search(data.iloc[:5], previous) is None
+    assert find_best_arima_models({"Travel": data}, max_p=1, max_d=1, max_q=1, workers=1, time_budget=0,
+                                  previous={"Travel": previous}) == find_best_arima_models(
+        {"Travel": data}, max_p=1, max_d=1, max_q=1, workers=1, time_budget=0)
+
+
+def test_pooled_grid_search_keeps_to_the_time_budget():
+    series = {
+        "Travel": monthly([5200, 6100, 4800, 7000, 6500, 5900, 6200]),
+        "Dining & Food": monthly([3100, 2900, 3500, 3300, 3600, 3400, 3000])
+    }
+
+    start = time.monotonic()
+    best = find_best_arima_models(series, workers=2, time_budget=0.01)
+
+    assert time.monotonic() - start < 1
+    for col, (order, aic) in best.items():
+        assert order is None or order in arima_orders(series[col])
@@ -1,5 +1,6 @@
 import pytest
 from httpx import AsyncClient
+from backend import auth
 from backend.database import User
 
 @pytest.mark.asyncio
@@ -35,4 +36,15 @@ async def test_login_json_endpoint(async_client: AsyncClient, test_user: User):
     assert response.status_code == 200
     data = response.json()
     assert "access_token" in data
-    assert data["token_type"] == "bearer"
\ No newline at end of file
+    assert data["token_type"] == "bearer"
+
+@pytest.mark.asyncio
+async def test_metrics_are_admin_only(async_client: AsyncClient, auth_token: str, test_user: User, monkeypatch):
+    """Operational metrics need the token of a user listed in ADMIN_USERNAMES"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    assert (await async_client.get("/metrics/queries")).status_code == 401
+    assert (await async_client.get("/metrics/queries", headers=headers)).status_code == 403
+
+    monkeypatch.setattr(auth, "ADMIN_USERNAMES", {test_user.username})
+    assert (await async_client.get("/metrics/queries", headers=headers)).status_code == 200
@@ -0,0 +1,79 @@
+import pytest
+import torch
+import numpy as np
+from backend.classification.batch_inference import BatchInferenceEngine
+
+
+class FakeTokenizer:
+    """Whitespace tokenizer with the subset of the HF tokenizer API the engine uses"""
+
+    def __call__(self, texts, truncation=True, max_length=128):
+        input_ids = [[len(word) for word in text.split()][:max_length] or [0] for text in texts]
+        return {
+            "input_ids": input_ids,
+            "attention_mask": [[1] * len(ids) for ids in input_ids]
+        }
+
+    def pad(self, features, padding=True, return_tensors="pt"):
+        width = max(len(f["input_ids"]) for f in features)
+        self.widths.append((len(features), width))
+        return {
+            "input_ids": torch.tensor([f["input_ids"] + [0] * (width - len(f["input_ids"])) for f in features]),
+            "attention_mask": torch.tensor([f["attention_mask"] + [0] * (width - len(f["attention_mask"])) for f in features])
+        }
+
+
+class FakeOutput:
+    def __init__(self, logits):
+        self.logits = logits
+
+
+class FakeModel(torch.nn.Module):
+    """Logits only depend on the unpadded tokens, so padding must not change predictions"""
+
+    def forward(self, input_ids, attention_mask):
+        total = (input_ids * attention_mask).sum(dim=1).float()
+        return FakeOutput(torch.stack([total % 3, total % 5, total % 7], dim=1))
+
+
+@pytest.fixture
+def tokenizer():
+    tok = FakeTokenizer()
+    tok.widths = []
+    return tok
+
+
+def test_batch_predictions_keep_input_order(tokenizer):
+    texts = ["a bb ccc", "dddd", "e f g h i j k", "salary credited", "x", "paid for hair cutting saloon"]
+    engine = BatchInferenceEngine(FakeModel(), tokenizer, batch_size=2)
+
+    predicted, confidences = engine.predict(texts)
+
+    reference = FakeModel()(**{
+        "input_ids": torch.tensor([[len(w) for w in t.split()] + [0] * (8 - len(t.split())) for t in texts]),
+        "attention_mask": torch.tensor([[1] * len(t.split()) + [0] * (8 - len(t.split())) for t in texts])
+    }).logits
+    probs = torch.softmax(reference, dim=1)
+
+    assert predicted.tolist() == torch.argmax(probs, dim=1).tolist()
+    assert np.allclose(confidences, probs.max(dim=1).values.numpy())
+
+
+def test_batches_respect_size_and_token_budget(tokenizer):
+    texts = ["w " * n for n in [1, 9, 2, 8, 3, 7, 4, 6, 5]]
+    engine = BatchInferenceEngine(FakeModel(), tokenizer, batch_size=3, max_batch_tokens=16, max_length=8)
+
+    engine.predict(texts)
+
+    assert sum(rows for rows, _ in tokenizer.widths) == len(texts)
+    for rows, width in tokenizer.widths:
+        assert rows <= 3
+        assert rows * width <= 16
+
+
+def test_empty_input(tokenizer):
+    engine = BatchInferenceEngine(FakeModel(), tokenizer)
+    predicted, confidences = engine.predict([])
+
+    assert len(predicted) == 0
+    assert len(confidences) == 0
@@ -0,0 +1,39 @@
+import pytest
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.budget import forecastTransactions, loadForecastModels, saveForecastModels
+from backend.database import Budget, User
+
+
+def budget_frame(travel_budget):
+    return pd.DataFrame({
+        "Category": ["Travel", "Dining & Food"],
+        "Budget_Amount": [travel_budget, 4000.0],
+        "Forecasted_Amount": [6000.0, 4500.0]
+    })
+
+
+@pytest.mark.asyncio
+async def test_rerunning_a_forecast_updates_the_month_in_place(db_session: AsyncSession, test_user: User):
+    month = pd.Timestamp("2025-07-31")
+
+    await forecastTransactions(test_user.id, month, budget_frame(5000.0), db_session)
+    await forecastTransactions(test_user.id, month, budget_frame(5500.0), db_session)
+    await forecastTransactions(test_user.id, month + pd.DateOffset(months=1), budget_frame(5200.0), db_session)
+
+    budgets = (await db_session.execute(select(Budget).order_by(Budget.id))).scalars().all()
+
+    assert len(budgets) == 4
+    assert {(b.month, b.category): b.allocated for b in budgets}[(str(month), "Travel")] == 5500.0
+
+
+@pytest.mark.asyncio
+async def test_forecast_models_are_stored_per_user_and_category(db_session: AsyncSession, test_user: User):
+    await saveForecastModels(test_user.id, {"Travel": {"order": (1, 1, 0), "params": [0.4, 2e5], "aic": 120.5, "n_obs": 6}}, db_session)
+    await saveForecastModels(test_user.id, {"Travel": {"order": [0, 1, 1], "params": [0.2, 1e5], "aic": 130.0, "n_obs": 7}}, db_session)
+
+    assert await loadForecastModels(test_user.id, db_session) == {
+        "Travel": {"order": [0, 1, 1], "params": [0.2, 1e5], "aic": 130.0, "n_obs": 7}
+    }
+    assert await loadForecastModels(test_user.id + 1, db_session) == {}
@@ -0,0 +1,45 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.classification.cascade import LightWeightCategoryClassifier
+from backend.classification.classifier import TransactionClassifier
+
+
+class CountingEngine:
+    def __init__(self):
+        self.calls = []
+
+    def iter_batches(self, texts):
+        self.calls.append(list(texts))
+        yield list(range(len(texts))), [1] * len(texts), [0.99] * len(texts)
+
+
+@pytest.fixture
+def fast_model():
+    descriptions = ["Ordered food from Foodmandu", "Ordered momo from Foodmandu", "Netflix Subscription", "Spotify Subscription"] * 5
+    labels = ["Dining & Food", "Dining & Food", "Subscriptions", "Subscriptions"] * 5
+    return LightWeightCategoryClassifier().train(descriptions, labels)
+
+
+@pytest.mark.asyncio
+async def test_low_confidence_rows_fall_through_to_transformer(db_session: AsyncSession, fast_model, plain_text_cleaning):
+    engine = CountingEngine()
+    classifier = TransactionClassifier(engine, {1: "Travel"}, fast_model=fast_model, threshold=0.6)
+
+    categories, _ = await classifier.classify(db_session, ["Ordered food from Foodmandu", "Uber ride to airport"])
+
+    assert categories == ["Dining & Food", "Travel"]
+    # The transformer gets the normalized key, cleaned by the stubbed pipeline
+    assert engine.calls == [["uber ride to airport"]]
+    assert classifier.last_run["fast_model"]["rows"] == 1
+    assert classifier.last_run["transformer"]["rows"] == 1
+
+
+@pytest.mark.asyncio
+async def test_threshold_of_one_disables_cascade(db_session: AsyncSession, fast_model, plain_text_cleaning):
+    engine = CountingEngine()
+    classifier = TransactionClassifier(engine, {1: "Travel"}, fast_model=fast_model, threshold=1.0)
+
+    await classifier.classify(db_session, ["Ordered food from Foodmandu"])
+
+    assert len(engine.calls) == 1
+    assert classifier.stats()["cascade_threshold"] is None
@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.classification.category_cache import DescriptionCategoryCache, normalize_description
+from backend.classification.classifier import TransactionClassifier
+
+
+class CountingEngine:
+    """Stands in for BatchInferenceEngine and records what reached the model"""
+
+    def __init__(self):
+        self.calls = []
+
+    def iter_batches(self, texts):
+        self.calls.append(list(texts))
+        yield list(range(len(texts))), [0] * len(texts), [0.9] * len(texts)
+
+
+def test_normalize_description_matches_model_input():
+    assert normalize_description("Paid for  Dipesh Hair-Cutting & Saloon #42") == "paid for dipesh haircutting saloon"
+    assert normalize_description("Ordered food from Foodmandu") == normalize_description("ORDERED food from Foodmandu 123")
+
+
+@pytest.mark.asyncio
+async def test_memory_tier_is_lru_bounded(db_session: AsyncSession):
+    cache = DescriptionCategoryCache(model_version="v1", max_size=2)
+    await cache.store(db_session, {"a": ("Travel", 0.9), "b": ("Education", 0.8)})
+    await cache.lookup(db_session, ["a"])
+    await cache.store(db_session, {"c": ("Income", 0.7)})
+
+    assert list(cache.entries) == ["a", "c"]
+
+
+@pytest.mark.asyncio
+async def test_persistent_tier_is_keyed_by_model_version(db_session: AsyncSession):
+    writer = DescriptionCategoryCache(model_version="v1")
+    await writer.store(db_session, {"ordered food from foodmandu": ("Dining & Food", 0.95)})
+
+    same_version = DescriptionCategoryCache(model_version="v1")
+    found = await same_version.lookup(db_session, ["ordered food from foodmandu"])
+    assert found == {"ordered food from foodmandu": ("Dining & Food", 0.95)}
+    assert same_version.persistent_hits == 1
+
+    new_version = DescriptionCategoryCache(model_version="v2")
+    assert await new_version.lookup(db_session, ["ordered food from foodmandu"]) == {}
+    assert new_version.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_classifier_only_infers_unseen_descriptions(db_session: AsyncSession, plain_text_cleaning):
+    engine = CountingEngine()
+    classifier = TransactionClassifier(engine, {0: "Dining & Food"}, cache=DescriptionCategoryCache(model_version="v1"))
+
+    first = ["Ordered food from Foodmandu", "Ordered food from Foodmandu 2", "Paid at Bajeko Sekuwa"]
+    categories, confidences = await classifier.classify(db_session, first)
+    assert categories == ["Dining & Food"] * 3
+    assert len(engine.calls[0]) == 2
+
+    await classifier.classify(db_session, ["paid at bajeko sekuwa", "Ordered food from Foodmandu"])
+    assert len(engine.calls) == 1
+
+    stats = classifier.stats()
+    assert stats["rows_classified"] == 5
+    assert stats["rows_inferred"] == 2
+    assert stats["cache"]["memory_hits"] == 2
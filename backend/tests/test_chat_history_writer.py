@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from contextlib import asynccontextmanager
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.chatbots.chat_memory import ChatHistoryWriter
+from backend.database import ChatHistory, User
+
+
+def session_factory_for(db_session):
+    @asynccontextmanager
+    async def session():
+        yield db_session
+    return session
+
+
+async def stored_texts(db_session):
+    rows = (await db_session.execute(select(ChatHistory).order_by(ChatHistory.id))).scalars().all()
+    return [row.text for row in rows]
+
+
+@pytest.mark.asyncio
+async def test_rows_are_written_in_one_batch_once_the_batch_is_full(db_session: AsyncSession, test_user: User):
+    writer = ChatHistoryWriter(batch_size=4, flush_interval=60, session_factory=session_factory_for(db_session))
+    writer.start()
+
+    for turn in range(2):
+        writer.add(test_user.id, "user", f"question {turn}")
+        writer.add(test_user.id, "bot", f"answer {turn}")
+    await asyncio.sleep(0.1)
+
+    assert writer.buffer == []
+    assert await stored_texts(db_session) == ["question 0", "answer 0", "question 1", "answer 1"]
+    await writer.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_shutdown_flushes_a_partial_batch(db_session: AsyncSession, test_user: User):
+    writer = ChatHistoryWriter(batch_size=50, flush_interval=60, session_factory=session_factory_for(db_session))
+    writer.start()
+    writer.add(test_user.id, "user", "question")
+    writer.add(test_user.id, "bot", "answer")
+
+    assert await stored_texts(db_session) == []
+
+    await writer.shutdown()
+    assert await stored_texts(db_session) == ["question", "answer"]
+    assert writer.written == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_the_rows_for_the_next_attempt(test_user: User):
+    @asynccontextmanager
+    async def broken_session():
+        raise ConnectionError("database unavailable")
+        yield
+
+    writer = ChatHistoryWriter(session_factory=broken_session)
+    writer.add(test_user.id, "user", "question")
+
+    assert await writer.flush() == 0
+    assert [row["text"] for row in writer.buffer] == ["question"]
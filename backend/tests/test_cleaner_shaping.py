@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+from backend.forecast.cleaner_shaping import cleaner_function, reshaping, shape_monthly
+
+
+def statement():
+    return pd.DataFrame({
+        " Date Time ": ["2025-02-03 10:00:00", "2025-01-15 09:30:00", "2025-01-20 18:00:00", None],
+        "Dr.": [300.0, 100.0, 0.0, 50.0],
+        "Cr. ": [0.0, 0.0, 500.0, 0.0],
+        "Category": ["Travel", "Travel", "Income", "Travel"]
+    })
+
+
+def test_cleaner_leaves_the_statement_untouched():
+    raw = statement()
+    before = raw.copy()
+
+    cleaned = cleaner_function(raw)
+
+    pd.testing.assert_frame_equal(raw, before)
+    assert list(cleaned.columns) == ["Dr.", "Cr.", "Category"]
+    assert cleaned.index.is_monotonic_increasing and len(cleaned) == 3
+
+
+def test_reshaping_drops_unspent_categories_and_adds_the_percentage_block():
+    monthly = reshaping(cleaner_function(statement()))
+
+    assert list(monthly.columns) == ["Travel", "Total", "Travel %", "Total %"]
+    assert list(monthly["Total"]) == [100.0, 300.0]
+    assert list(monthly["Total %"]) == [100.0, 100.0]
+
+
+def test_shape_monthly_does_not_modify_its_input():
+    monthly = pd.DataFrame({"Travel": [0.0, 200.0], "Dining & Food": [0.0, 600.0], "Education": [0.0, 0.0]},
+                           index=pd.date_range("2025-01-31", periods=2, freq="ME"))
+
+    shaped = shape_monthly(monthly)
+
+    assert list(monthly.columns) == ["Travel", "Dining & Food", "Education"]
+    assert shaped.loc[shaped.index[1], "Dining & Food %"] == 75.0
+    # A month without spending has no shares, as with the row-wise division it replaces
+    assert np.isnan(shaped.loc[shaped.index[0], "Travel %"])
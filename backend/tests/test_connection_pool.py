@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from backend.connection_pool import ConnectionPool, PoolNotOpen
+
+
+class FakeAsyncpgPool:
+    """Stands in for asyncpg.Pool with a fixed number of connections"""
+
+    def __init__(self, size):
+        self.free = asyncio.Queue()
+        for i in range(size):
+            self.free.put_nowait(f"conn-{i}")
+        self.size = size
+
+    async def acquire(self, timeout=None):
+        return await asyncio.wait_for(self.free.get(), timeout)
+
+    async def release(self, connection):
+        self.free.put_nowait(connection)
+
+    def get_size(self):
+        return self.size
+
+    def get_idle_size(self):
+        return self.free.qsize()
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_connections_are_borrowed_and_returned():
+    pool = ConnectionPool(min_size=1, max_size=2, acquire_timeout=1)
+    pool.pool = FakeAsyncpgPool(2)
+
+    async with pool.acquire() as first:
+        async with pool.acquire() as second:
+            assert first != second
+            assert pool.stats()["in_use"] == 2
+
+    stats = pool.stats()
+    assert stats["in_use"] == 0
+    assert stats["idle"] == 2
+    assert stats["acquired"] == 2
+
+
+@pytest.mark.asyncio
+async def test_acquire_times_out_when_the_pool_is_exhausted():
+    pool = ConnectionPool(min_size=1, max_size=1, acquire_timeout=0.01)
+    pool.pool = FakeAsyncpgPool(1)
+
+    async with pool.acquire():
+        with pytest.raises(asyncio.TimeoutError):
+            async with pool.acquire():
+                pass
+
+    assert pool.stats()["timeouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_acquire_before_open_fails():
+    pool = ConnectionPool()
+
+    with pytest.raises(PoolNotOpen):
+        async with pool.acquire():
+            pass
+    assert pool.stats()["open"] is False
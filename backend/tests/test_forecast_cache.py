@@ -0,0 +1,82 @@
+import pytest
+import pandas as pd
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.forecast import model
+from backend.forecast.forecast_cache import ForecastCache
+from backend.forecast.model import create_budget_forecast, forecast_cache_keys
+
+
+def monthly_frame(travel=(5200, 6100, 4800, 7000, 6500, 5900)):
+    index = pd.date_range("2025-01-31", periods=6, freq="ME", name="Date Time")
+    monthly = pd.DataFrame({
+        "Travel": list(travel),
+        "Dining & Food": [3100, 2900, 3500, 3300, 3600, 3400]
+    }, index=index, dtype=float)
+    monthly["Total"] = monthly.sum(axis=1)
+    for col in ["Travel", "Dining & Food", "Total"]:
+        monthly[f"{col} %"] = monthly[col] / monthly["Total"] * 100
+    return monthly
+
+
+@pytest.fixture
+def fitted_categories(monkeypatch):
+    fitted = []
+    real_forecasts = model.statsforecast_forecasts
+    monkeypatch.setattr(model, "statsforecast_forecasts", lambda series, engine: fitted.extend(series) or real_forecasts(series, engine))
+    return fitted
+
+
+def test_repeat_request_skips_fitting_and_reallocates(fitted_categories):
+    cache = ForecastCache(persistent=False)
+
+    forecasts, summary, budget = create_budget_forecast(monthly_frame(), 20000, 5000, "auto_ets", cache)
+    again, again_summary, tighter = create_budget_forecast(monthly_frame(), 20000, 15000, "auto_ets", cache)
+
+    assert fitted_categories == ["Travel", "Dining & Food"]
+    assert again == forecasts and again_summary == summary
+    assert sum(tighter.values()) < sum(budget.values())
+    assert cache.hits == 2
+
+
+def test_only_changed_series_and_engines_are_refitted(fitted_categories):
+    cache = ForecastCache(persistent=False)
+    create_budget_forecast(monthly_frame(), 20000, 5000, "auto_ets", cache)
+
+    create_budget_forecast(monthly_frame(travel=(5200, 6100, 4800, 7000, 6500, 9900)), 20000, 5000, "auto_ets", cache)
+    assert fitted_categories == ["Travel", "Dining & Food", "Travel"]
+
+    assert forecast_cache_keys(monthly_frame(), "auto_ets") != forecast_cache_keys(monthly_frame(), "auto_arima")
+
+
+def test_arima_time_budget_is_part_of_the_key(monkeypatch):
+    arima_keys = forecast_cache_keys(monthly_frame(), "arima")
+    ets_keys = forecast_cache_keys(monthly_frame(), "auto_ets")
+
+    monkeypatch.setattr(model, "ARIMA_TIME_BUDGET", model.ARIMA_TIME_BUDGET * 2)
+    assert forecast_cache_keys(monthly_frame(), "arima") != arima_keys
+    assert forecast_cache_keys(monthly_frame(), "auto_ets") == ets_keys
+
+
+def test_memory_tier_is_lru_bounded():
+    cache = ForecastCache(max_size=2, persistent=False)
+    cache.put("a", {"forecast": 1.0})
+    cache.put("b", {"forecast": 2.0})
+    cache.get("a")
+    cache.put("c", {"forecast": 3.0})
+
+    assert list(cache.entries) == ["a", "c"]
+
+
+@pytest.mark.asyncio
+async def test_persistent_tier_survives_a_restart(db_session: AsyncSession, fitted_categories):
+    writer = ForecastCache()
+    _, summary, _ = create_budget_forecast(monthly_frame(), 20000, 5000, "auto_ets", writer)
+    await writer.persist(db_session)
+
+    restarted = ForecastCache()
+    await restarted.load(db_session, forecast_cache_keys(monthly_frame(), "auto_ets").values())
+    _, cached_summary, _ = create_budget_forecast(monthly_frame(), 20000, 5000, "auto_ets", restarted)
+
+    assert restarted.persistent_loads == 2
+    assert len(fitted_categories) == 2
+    assert cached_summary["Travel"]["forecast"] == pytest.approx(summary["Travel"]["forecast"])
@@ -0,0 +1,45 @@
+import pytest
+import pandas as pd
+from backend.forecast.model import create_budget_forecast
+from backend.forecast.statsforecast_engine import statsforecast_forecasts_many
+
+
+def monthly_frame(scale=1.0):
+    index = pd.date_range("2025-01-31", periods=6, freq="ME", name="Date Time")
+    monthly = pd.DataFrame({
+        "Travel": [5200, 6100, 4800, 7000, 6500, 5900],
+        "Dining & Food": [3100, 2900, 3500, 3300, 3600, 3400]
+    }, index=index, dtype=float) * scale
+    monthly["Total"] = monthly.sum(axis=1)
+    for col in ["Travel", "Dining & Food", "Total"]:
+        monthly[f"{col} %"] = monthly[col] / monthly["Total"] * 100
+    return monthly
+
+
+@pytest.mark.parametrize("engine", ["auto_arima", "auto_ets"])
+def test_statsforecast_engines_keep_the_forecast_contract(engine):
+    forecasts, summary, budget = create_budget_forecast(monthly_frame(), income=20000, target_savings=15000, engine=engine)
+
+    assert set(forecasts) == set(summary) == set(budget) == {"Travel", "Dining & Food"}
+    for col, values in summary.items():
+        assert values["forecast"] == forecasts[col]
+        assert values["lower_bound"] <= values["forecast"] <= values["upper_bound"]
+    # income - savings covers less than the forecast, so the allocation has to cut
+    assert sum(budget.values()) < sum(forecasts.values())
+
+
+def test_many_users_are_forecast_in_one_call():
+    users = {
+        user: {col: monthly_frame(scale)[col] for col in ["Travel", "Dining & Food"]}
+        for user, scale in [(1, 1.0), (2, 10.0)]
+    }
+
+    results = statsforecast_forecasts_many(users, "auto_ets")
+
+    assert set(results) == {1, 2}
+    assert results[2][0]["Travel"] > 5 * results[1][0]["Travel"]
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        create_budget_forecast(monthly_frame(), income=20000, target_savings=5000, engine="prophet")
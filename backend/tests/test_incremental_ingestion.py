@@ -0,0 +1,114 @@
+import pytest
+import pandas as pd
+from datetime import datetime
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.database import Transaction, User
+from backend.forecast.cleaner_shaping import cleaner_function, reshape_monthly_totals, reshaping
+from backend.transaction import backfillContentHashes, content_hashes, insertTransaction, loadMonthlyTotals, storedTransactionCategories, transaction_keys
+
+
+def statement(rows):
+    columns = ["Reference Code", "Date Time", "Description", "Dr.", "Cr.", "Status", "Balance (NPR)", "Channel", "Category"]
+    return pd.DataFrame(rows, columns=columns)
+
+
+JANUARY = statement([
+    ["0VC723Q", "2025-01-03 10:56:21", "Money transferred to SANIMA BANK LTD.", 100.0, 0.0, "COMPLETE", 621.36, "App", "Banking & Finance"],
+    # eSewa charges reuse the reference code of the payment they belong to
+    ["0VC723Q", "2025-01-03 10:56:21", "Bank transfer charges", 10.0, 0.0, "COMPLETE", 611.36, "App", "Banking & Finance"],
+    [None, "2025-01-05 09:00:00", "Salary", 0.0, 50000.0, "COMPLETE", 50611.36, "App", "Income"],
+])
+
+FEBRUARY = statement([
+    ["0WPVCY9", "2025-02-04 17:32:57", "Paid for Dipesh Hair Cutting & Saloon", 150.0, 0.0, "COMPLETE", 50461.36, "App", "Personal Care"],
+])
+
+
+def keys_of(df):
+    return transaction_keys(df, content_hashes(df))
+
+
+@pytest.mark.asyncio
+async def test_reupload_only_finds_new_rows(db_session: AsyncSession, test_user: User):
+    await insertTransaction(test_user.id, JANUARY, db_session)
+
+    upload = pd.concat([JANUARY, FEBRUARY], ignore_index=True).drop(columns="Category")
+    keys = keys_of(upload)
+    stored = await storedTransactionCategories(test_user.id, keys, db_session)
+
+    assert keys.isin(stored.keys()).tolist() == [True, True, True, False]
+    assert stored[keys[2]] == "Income"
+
+
+@pytest.mark.asyncio
+async def test_rows_stored_before_content_hash_still_match(db_session: AsyncSession, test_user: User):
+    await insertTransaction(test_user.id, JANUARY, db_session)
+    await db_session.execute(update(Transaction).values(content_hash=None))
+    await db_session.commit()
+
+    keys = keys_of(JANUARY)
+    stored = await storedTransactionCategories(test_user.id, keys, db_session)
+
+    # Legacy rows without a reference code can only be found once their hash is backfilled
+    assert keys.isin(stored.keys()).tolist() == [True, True, False]
+
+    assert await backfillContentHashes(db_session, chunk_rows=2) == 3
+    stored = await storedTransactionCategories(test_user.id, keys, db_session)
+    assert keys.isin(stored.keys()).tolist() == [True, True, True]
+    assert await backfillContentHashes(db_session) == 0
+
+
+@pytest.mark.asyncio
+async def test_inserts_keep_the_monthly_rollup_current(db_session: AsyncSession, test_user: User):
+    await insertTransaction(test_user.id, JANUARY, db_session)
+    await insertTransaction(test_user.id, FEBRUARY, db_session)
+
+    totals = await loadMonthlyTotals(test_user.id, db_session)
+    rows = {(str(row.month), row.category): (row.debit, row.credit, row.count) for row in totals.itertuples()}
+
+    assert rows == {
+        ("2025-01-01", "Banking & Finance"): (110.0, 0.0, 2),
+        ("2025-01-01", "Income"): (0.0, 50000.0, 1),
+        ("2025-02-01", "Personal Care"): (150.0, 0.0, 1)
+    }
+
+
+@pytest.mark.asyncio
+async def test_rows_stored_by_a_racing_upload_are_skipped(db_session: AsyncSession, test_user: User):
+    # Both uploads looked up their keys before either inserted, so both pass the full statement
+    assert await insertTransaction(test_user.id, JANUARY, db_session) == 3
+    assert await insertTransaction(test_user.id, pd.concat([JANUARY, FEBRUARY], ignore_index=True), db_session) == 1
+
+    stored = (await db_session.execute(select(Transaction.description))).scalars().all()
+    totals = await loadMonthlyTotals(test_user.id, db_session)
+
+    assert len(stored) == 4
+    assert totals.set_index("category")["count"].to_dict() == {"Banking & Finance": 2, "Income": 1, "Personal Care": 1}
+
+
+@pytest.mark.asyncio
+async def test_forecast_input_from_rollup_matches_raw_reshaping(db_session: AsyncSession, test_user: User):
+    ledger = pd.concat([JANUARY, FEBRUARY], ignore_index=True)
+    await insertTransaction(test_user.id, ledger, db_session)
+
+    from_rollup = reshape_monthly_totals(await loadMonthlyTotals(test_user.id, db_session))
+    from_ledger = reshaping(cleaner_function(ledger.copy()))
+
+    pd.testing.assert_frame_equal(from_rollup, from_ledger, check_freq=False)
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_keeps_row_by_row_field_mapping(db_session: AsyncSession, test_user: User):
+    inserted = await insertTransaction(test_user.id, JANUARY, db_session)
+
+    rows = (await db_session.execute(select(Transaction).order_by(Transaction.id))).scalars().all()
+
+    assert inserted == 3
+    assert [(row.reference_code, row.amount, row.type) for row in rows] == [
+        ("0VC723Q", 100.0, "expense"),
+        ("0VC723Q", 10.0, "expense"),
+        ("None", 50000.0, "income")
+    ]
+    assert rows[0].date_time == datetime(2025, 1, 3, 10, 56, 21)
+    assert rows[2].content_hash == content_hashes(JANUARY)[2]
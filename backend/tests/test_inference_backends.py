@@ -0,0 +1,30 @@
+import os
+import pytest
+import pandas as pd
+from Modelling.preprocessing import cleanTextPipeline
+from backend.benchmarks.inference_backends import MODEL_PATH, DATASET_PATH, run_backend, check_parity
+
+pytestmark = pytest.mark.skipif(not os.path.isdir(MODEL_PATH), reason="backend/saved_model is not available")
+
+
+@pytest.fixture(scope="module")
+def sample_texts():
+    df = pd.read_csv(DATASET_PATH).dropna(subset=["Description"]).head(200)
+    return [cleanTextPipeline(text) for text in df["Description"]]
+
+
+@pytest.fixture(scope="module")
+def torch_outputs(sample_texts):
+    predicted, confidences, _ = run_backend("torch", sample_texts, batch_size=32)
+    return predicted, confidences
+
+
+def test_quantized_backend_matches_torch(sample_texts, torch_outputs):
+    predicted, confidences, _ = run_backend("quantized", sample_texts, batch_size=32)
+    assert check_parity(torch_outputs, (predicted, confidences), min_agreement=0.97, max_confidence_diff=0.1)["ok"]
+
+
+def test_onnx_backend_matches_torch(sample_texts, torch_outputs):
+    pytest.importorskip("onnxruntime")
+    predicted, confidences, _ = run_backend("onnx", sample_texts, batch_size=32)
+    assert check_parity(torch_outputs, (predicted, confidences))["ok"]
@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+from contextlib import asynccontextmanager
+from backend.jobs import JobManager, JobQueueFull
+from backend.pipeline import STAGES, InvalidStatement
+
+
+@asynccontextmanager
+async def fake_session():
+    yield None
+
+
+def make_pipeline(gate=None, fail_with=None):
+    async def pipeline(db):
+        for stage in STAGES:
+            if gate is not None:
+                await gate.wait()
+            if fail_with is not None:
+                raise fail_with
+            yield "stage", stage
+            if stage == "parsed":
+                yield "rows", [(1, {"text": "Uber ride"}), (0, {"text": "Foodmandu"})]
+        yield "result", {"budget": {"Travel": 100.0}}
+    return pipeline
+
+
+@pytest.mark.asyncio
+async def test_job_reports_stages_and_result():
+    manager = JobManager(session_factory=fake_session)
+    job = manager.submit(1, make_pipeline())
+
+    await manager.wait(job, timeout=5)
+
+    assert job.status == "completed"
+    assert all(job.to_dict()["stages"][stage] for stage in STAGES)
+    assert job.result["budget"] == {"Travel": 100.0}
+    assert job.result["results"] == [{"text": "Foodmandu"}, {"text": "Uber ride"}]
+
+
+@pytest.mark.asyncio
+async def test_failed_jobs_keep_the_endpoint_error_messages():
+    manager = JobManager(session_factory=fake_session)
+
+    invalid = manager.submit(1, make_pipeline(fail_with=InvalidStatement("a.xlsx")))
+    broken = manager.submit(1, make_pipeline(fail_with=KeyError("Description")))
+    await manager.wait(invalid, timeout=5)
+    await manager.wait(broken, timeout=5)
+
+    assert (invalid.status, invalid.error) == ("failed", "Invalid Format")
+    assert broken.status == "failed"
+    assert broken.error.startswith("Classification failed")
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_bounds_concurrent_jobs():
+    gate = asyncio.Event()
+    manager = JobManager(workers=1, session_factory=fake_session)
+
+    first = manager.submit(1, make_pipeline(gate))
+    second = manager.submit(1, make_pipeline(gate))
+    await asyncio.sleep(0.05)
+
+    assert first.status == "running"
+    assert second.status == "queued"
+
+    gate.set()
+    await manager.wait(second, timeout=5)
+    assert first.status == second.status == "completed"
+
+
+@pytest.mark.asyncio
+async def test_queue_limit_and_ownership():
+    gate = asyncio.Event()
+    manager = JobManager(workers=1, queue_limit=1, session_factory=fake_session)
+
+    job = manager.submit(1, make_pipeline(gate))
+    with pytest.raises(JobQueueFull):
+        manager.submit(1, make_pipeline(gate))
+
+    assert manager.get(job.id, 1) is job
+    assert manager.get(job.id, 2) is None
+
+    gate.set()
+    await manager.wait(job, timeout=5)
@@ -0,0 +1,66 @@
+import os
+import json
+import pytest
+from backend.classification.merchant_rules import MerchantRules, MERCHANT_RULES_PATH
+from backend.classification.category_cache import normalize_description
+
+
+def write_rules(path, rules):
+    path.write_text(json.dumps({"rules": rules}))
+
+
+@pytest.fixture
+def rules_file(tmp_path):
+    path = tmp_path / "rules.json"
+    write_rules(path, [
+        {"pattern": "Refund", "category": "Income"},
+        {"pattern": "Daraz", "category": "Groceries & Shopping"},
+        {"pattern": "Foodmandu", "category": "Dining & Food"},
+        {"pattern": "school fee", "category": "Education"}
+    ])
+    return path
+
+
+def test_match_uses_whole_words_and_table_order(rules_file):
+    rules = MerchantRules(str(rules_file))
+    keys = [normalize_description(text) for text in [
+        "Paid for Daraz Purchase",
+        "Refund from Daraz",
+        "Ordered food from Foodmandu",
+        "Paid School Fee - Grade 5",
+        "Paid at Darazzle Store",
+        "Fund Transferred to Khaja Ghar"
+    ]]
+
+    assert rules.match(keys) == {
+        "paid for daraz purchase": "Groceries & Shopping",
+        "refund from daraz": "Income",
+        "ordered food from foodmandu": "Dining & Food",
+        "paid school fee grade": "Education"
+    }
+
+
+def test_rules_reload_when_file_changes(rules_file):
+    rules = MerchantRules(str(rules_file))
+    assert rules.match(["ntc topup"]) == {}
+
+    write_rules(rules_file, [{"pattern": "NTC", "category": "Subscriptions"}])
+    os.utime(rules_file, (rules.mtime + 5, rules.mtime + 5))
+
+    assert rules.maybe_reload()
+    assert rules.match(["ntc topup"]) == {"ntc topup": "Subscriptions"}
+
+
+def test_invalid_table_keeps_previous_rules(rules_file):
+    rules = MerchantRules(str(rules_file), allowed_categories=["Income", "Groceries & Shopping", "Dining & Food", "Education"])
+
+    write_rules(rules_file, [{"pattern": "netflix", "category": "Streaming"}])
+    os.utime(rules_file, (rules.mtime + 5, rules.mtime + 5))
+
+    assert not rules.maybe_reload()
+    assert len(rules) == 4
+
+
+def test_shipped_rule_table_is_valid():
+    labels = ['Personal Care', 'Income', 'Banking & Finance', 'Dining & Food', 'Groceries & Shopping', 'Subscriptions', 'others', 'Entertainment', 'Travel', 'Education']
+    assert len(MerchantRules(MERCHANT_RULES_PATH, allowed_categories=labels)) > 0
@@ -0,0 +1,26 @@
+import pytest
+import pandas as pd
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.database import User
+from backend.transaction import insertTransaction
+from backend.chatbots.personal.personal_docs import get_user_docs
+
+
+def statement(months):
+    columns = ["Reference Code", "Date Time", "Description", "Dr.", "Cr.", "Status", "Balance (NPR)", "Channel", "Category"]
+    return pd.DataFrame([
+        [f"R{i}", f"{month}-{day:02d} 10:00:00", f"Ordered food {i}", 100.0 + i, 0.0, "COMPLETE", 5000.0, "App", "Dining & Food"]
+        for i, (month, day) in enumerate((month, day) for month in months for day in range(1, 11))
+    ], columns=columns)
+
+
+@pytest.mark.asyncio
+async def test_docs_cover_the_whole_transaction_history_and_the_rollup(db_session: AsyncSession, test_user: User):
+    await insertTransaction(test_user.id, statement(["2023-01", "2024-06", "2025-03"]), db_session)
+
+    docs = await get_user_docs(db_session, test_user.id)
+    tables = [doc["metadata"]["table"] for doc in docs]
+
+    assert tables.count("transactions") == 30
+    assert tables.count("monthly_category_totals") == 3
+    assert any(doc["text"].startswith("Transaction on 2023-01-01") for doc in docs)
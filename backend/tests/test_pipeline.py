@@ -0,0 +1,86 @@
+import pytest
+import pandas as pd
+from io import BytesIO
+from types import SimpleNamespace
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend import pipeline
+from backend.database import User
+from backend.pipeline import PipelineResult, run_budget_pipeline
+
+COLUMNS = ["Reference Code", "Date Time", "Description", "Dr.", "Cr.", "Status", "Balance (NPR)", "Channel"]
+
+
+class KeywordClassifier:
+    """Stands in for TransactionClassifier: one micro-batch, category picked from the description"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def iter_classify(self, db, descriptions):
+        self.calls.append(list(descriptions))
+        categories = ["Income" if "Salary" in text else "Dining & Food" for text in descriptions]
+        yield list(range(len(descriptions))), categories, [0.9] * len(descriptions)
+
+
+def statement(months):
+    rows = []
+    for m, month in enumerate(months):
+        rows.append([f"F{m}", f"{month}-05 12:00:00", f"Ordered food {m}", 3000.0 + 100 * m, 0.0, "COMPLETE", 10000.0, "App"])
+        rows.append([f"S{m}", f"{month}-01 09:00:00", "Salary", 0.0, 50000.0, "COMPLETE", 60000.0, "App"])
+    buffer = BytesIO()
+    pd.DataFrame(rows, columns=COLUMNS).to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+async def run(db, user, content, classifier=None, engine="auto_ets"):
+    result = PipelineResult()
+    uploads = [("statement.xlsx", BytesIO(content))]
+    async for event, value in run_budget_pipeline(uploads, 100000, 10000, user.id, db, classifier or KeywordClassifier(), SimpleNamespace(), engine):
+        result.add(event, value)
+    return result.response()
+
+
+@pytest.mark.asyncio
+async def test_short_history_returns_no_chart(db_session: AsyncSession, test_user: User):
+    response = await run(db_session, test_user, statement(["2025-01", "2025-02"]))
+
+    assert response["budget"] == {}
+    assert response["image_data"] is None
+
+
+@pytest.mark.asyncio
+async def test_chart_failure_does_not_fail_the_upload(db_session: AsyncSession, test_user: User, monkeypatch):
+    def broken_render(monthly_data, forecast, summary):
+        raise RuntimeError("no display")
+    monkeypatch.setattr(pipeline, "render_forecast", broken_render)
+
+    response = await run(db_session, test_user, statement(["2025-01", "2025-02", "2025-03", "2025-04"]))
+
+    assert response["budget"]
+    assert response["image_data"] is None
+
+
+@pytest.mark.asyncio
+async def test_reupload_reports_every_row_with_its_stored_category(db_session: AsyncSession, test_user: User):
+    first = await run(db_session, test_user, statement(["2025-01", "2025-02"]))
+
+    classifier = KeywordClassifier()
+    again = await run(db_session, test_user, statement(["2025-01", "2025-02", "2025-03"]), classifier)
+
+    assert classifier.calls == [["Ordered food 2", "Salary"]]
+    assert (again["new_transactions"], again["duplicate_transactions"]) == (2, 4)
+    assert [row["category"] for row in again["results"]] == [row["category"] for row in first["results"]] + ["Dining & Food", "Income"]
+    assert [row["confidence"] for row in again["results"]] == ["-"] * 4 + ["0.90"] * 2
+
+
+@pytest.mark.asyncio
+async def test_repeated_rows_take_the_category_of_their_first_copy(db_session: AsyncSession, test_user: User):
+    content = statement(["2025-01"])
+    twice = pd.read_excel(BytesIO(content))
+    buffer = BytesIO()
+    pd.concat([twice, twice], ignore_index=True).to_excel(buffer, index=False)
+
+    response = await run(db_session, test_user, buffer.getvalue())
+
+    assert response["new_transactions"] == 2
+    assert [row["category"] for row in response["results"]] == ["Dining & Food", "Income"] * 2
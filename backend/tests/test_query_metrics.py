@@ -0,0 +1,57 @@
+import logging
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from backend.query_metrics import QueryStats, OTHER_FINGERPRINT, current_endpoint, fingerprint, instrument_engine
+
+
+def test_fingerprint_collapses_literals_parameters_and_in_lists():
+    first = fingerprint("SELECT * FROM transactions WHERE user_id = 7 AND category ILIKE '%food%' AND id IN ($1::INTEGER, $2::INTEGER)")
+    second = fingerprint("SELECT *  FROM transactions\nWHERE user_id = 12 AND category ILIKE '%travel%' AND id IN ($1::INTEGER)")
+
+    assert first == second == "SELECT * FROM transactions WHERE user_id = ? AND category ILIKE ? AND id IN (?+)"
+    assert fingerprint("SELECT DATE_TRUNC('month', CURRENT_DATE)::date") == "SELECT DATE_TRUNC(?, CURRENT_DATE)::date"
+
+
+@pytest.mark.asyncio
+async def test_engine_statements_are_timed_per_fingerprint():
+    stats = QueryStats(slow_ms=10000, sample_rate=0)
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument_engine(engine, stats)
+
+    token = current_endpoint.set("POST /chat")
+    try:
+        async with engine.connect() as conn:
+            for limit in (1, 2, 3):
+                await conn.execute(text(f"SELECT value FROM (SELECT 1 AS value UNION ALL SELECT 2 UNION ALL SELECT 3) LIMIT {limit}"))
+    finally:
+        current_endpoint.reset(token)
+        await engine.dispose()
+
+    report = stats.report()
+    query = next(q for q in report["queries"] if q["fingerprint"].endswith("LIMIT ?"))
+    assert query["count"] == 3
+    assert query["rows"] == 6
+    assert query["endpoints"] == {"POST /chat": 3}
+    assert query["slow"] == 0
+
+
+def test_slow_queries_are_always_logged(caplog):
+    stats = QueryStats(slow_ms=100, sample_rate=0)
+
+    with caplog.at_level(logging.INFO, logger="backend.sql"):
+        stats.record("SELECT 1", 5, rows=1)
+        stats.record("SELECT 2", 250, rows=1, source="asyncpg")
+
+    assert [record.levelname for record in caplog.records] == ["WARNING"]
+    assert "250.0ms" in caplog.records[0].getMessage()
+    assert stats.report()["queries"][0]["slow"] == 1
+
+
+def test_new_fingerprints_past_the_cap_share_one_bucket():
+    stats = QueryStats(sample_rate=0, max_fingerprints=2)
+    for table in ("a", "b", "c", "d"):
+        stats.record(f"SELECT * FROM {table}", 1)
+
+    assert set(stats.fingerprints) == {"SELECT * FROM a", "SELECT * FROM b", OTHER_FINGERPRINT}
+    assert stats.fingerprints[OTHER_FINGERPRINT].count == 2
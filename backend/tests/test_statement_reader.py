@@ -0,0 +1,135 @@
+import datetime
+import pytest
+import pandas as pd
+from io import BytesIO
+from openpyxl import Workbook
+from pandas.testing import assert_frame_equal
+from backend.chatbots.general.clean_transaction import detect_statement_format, read_statement_chunks, read_excel_dynamic
+from backend.pipeline import InvalidStatement, parse_statement, parse_statements
+
+
+def workbook_bytes(rows):
+    workbook = Workbook()
+    sheet = workbook.active
+    for row in rows:
+        sheet.append(row)
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+STATEMENT = [
+    ["eSewa Statement"],
+    [],
+    ["Reference Code", "Date Time", "Description", "Dr.", "Cr.", "Balance (NPR)", "Channel", "Status"],
+    ["R1", datetime.datetime(2024, 1, 1), "Ordered food from Foodmandu", 500, 0, 1000, "App", "COMPLETE"],
+    [],
+    ["R2", datetime.datetime(2024, 1, 2), "Salary", 0, 50000.5, "51000.5", "App", "COMPLETE"],
+    ["R3", datetime.datetime(2024, 1, 3), "Uber ride", 300, 0, 50700.5, "App", "COMPLETE"],
+    [None, None, "Total", 800, 50000.5],
+    [],
+    []
+]
+
+
+def test_single_pass_reader_matches_pandas_double_parse():
+    contents = workbook_bytes(STATEMENT)
+
+    expected = pd.read_excel(BytesIO(contents), header=2)
+
+    assert_frame_equal(read_excel_dynamic(contents), expected)
+
+
+def test_reader_yields_bounded_chunks():
+    contents = workbook_bytes(STATEMENT)
+
+    chunks = list(read_statement_chunks(contents, chunk_rows=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert all(list(chunk.columns) == STATEMENT[2] for chunk in chunks)
+
+
+def test_parse_statement_cleans_each_chunk_and_closes_spooled_files():
+    spooled = BytesIO(workbook_bytes(STATEMENT))
+
+    df = parse_statement("statement.xlsx", spooled)
+
+    assert df["Reference Code"].tolist() == ["R1", "R2", "R3"]
+    assert spooled.closed
+
+
+def statement_csv():
+    lines = [
+        "eSewa Statement,,,,,,,",
+        "",
+        "Reference Code,Date Time,Description,Dr.,Cr.,Balance (NPR),Channel,Status",
+        "R1,2024-01-01 00:00:00,Ordered food from Foodmandu,500,0,1000,App,COMPLETE",
+        "R2,2024-01-02 00:00:00,Salary,0,50000.5,51000.5,App,COMPLETE",
+        "R3,2024-01-03 00:00:00,Uber ride,300,0,50700.5,App,COMPLETE",
+        ",,Total,800"
+    ]
+    return "\n".join(lines).encode()
+
+
+def test_formats_are_detected_from_content():
+    parquet = BytesIO()
+    pd.DataFrame({"Description": ["a"]}).to_parquet(parquet)
+
+    assert detect_statement_format(BytesIO(workbook_bytes(STATEMENT))) == "xlsx"
+    assert detect_statement_format(BytesIO(parquet.getvalue())) == "parquet"
+    assert detect_statement_format(BytesIO(statement_csv())) == "csv"
+
+
+def test_csv_and_parquet_parse_to_the_same_cleaned_frame_as_excel():
+    from_excel = parse_statement("statement.xlsx", BytesIO(workbook_bytes(STATEMENT)))
+    from_csv = parse_statement("statement.csv", BytesIO(statement_csv()))
+
+    parquet = BytesIO()
+    from_csv.to_parquet(parquet)
+    from_parquet = parse_statement("statement.parquet", BytesIO(parquet.getvalue()))
+
+    for df in (from_csv, from_parquet):
+        assert list(df.columns) == list(from_excel.columns)
+        for column in ["Reference Code", "Description", "Dr.", "Cr.", "Balance (NPR)"]:
+            assert df[column].tolist() == from_excel[column].tolist()
+        assert pd.to_datetime(df["Date Time"]).tolist() == from_excel["Date Time"].tolist()
+
+
+@pytest.mark.asyncio
+async def test_uploads_merge_in_order_and_report_unreadable_files():
+    uploads = [
+        ("march.csv", BytesIO(statement_csv())),
+        ("notes.txt", BytesIO(b"not a statement")),
+        ("april.xlsx", BytesIO(workbook_bytes(STATEMENT)))
+    ]
+
+    df, file_errors = await parse_statements(uploads)
+
+    assert df["Reference Code"].tolist() == ["R1", "R2", "R3"] * 2
+    assert [(error["file"], error["error"]) for error in file_errors] == [("notes.txt", "Invalid Format")]
+    assert file_errors[0]["reason"]
+
+
+@pytest.mark.asyncio
+async def test_all_uploads_unreadable_is_invalid_format():
+    with pytest.raises(InvalidStatement):
+        await parse_statements([("a.xlsx", BytesIO(b"PK\x03\x04broken"))])
+
+
+def test_legacy_xls_is_read_whole_by_pandas(monkeypatch):
+    sheet = pd.DataFrame([["eSewa Statement", None], ["Description", "Dr."], ["Uber ride", 300], ["Salary", 0]])
+    calls = []
+
+    def read_excel(source, header=None, nrows=None):
+        calls.append(header)
+        if header is None:
+            return sheet.iloc[:nrows]
+        return pd.DataFrame(sheet.iloc[header + 1:].values, columns=list(sheet.iloc[header]))
+
+    monkeypatch.setattr("backend.chatbots.general.clean_transaction.pd.read_excel", read_excel)
+    xls = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\x00" * 64
+
+    chunks = list(read_statement_chunks(xls, chunk_rows=1))
+
+    assert calls == [None, 1]
+    assert [list(chunk["Description"]) for chunk in chunks] == [["Uber ride"], ["Salary"]]
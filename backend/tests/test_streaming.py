@@ -0,0 +1,59 @@
+import json
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.classification.classifier import TransactionClassifier
+from backend.classification.merchant_rules import MerchantRules, MERCHANT_RULES_PATH
+from backend.pipeline import InvalidStatement, ndjson_events
+
+
+class MicroBatchEngine:
+    """Yields one micro-batch per text, like BatchInferenceEngine with batch_size=1"""
+
+    def iter_batches(self, texts):
+        for i in range(len(texts)):
+            yield [i], [0], [0.75]
+
+
+async def collect(events):
+    return [json.loads(line) async for line in ndjson_events(events)]
+
+
+@pytest.mark.asyncio
+async def test_iter_classify_yields_each_stage_and_micro_batch(db_session: AsyncSession, plain_text_cleaning):
+    classifier = TransactionClassifier(MicroBatchEngine(), {0: "others"}, rules=MerchantRules(MERCHANT_RULES_PATH))
+    descriptions = ["Paid at Bajeko Sekuwa", "Ordered food from Foodmandu", "Fund transferred to Ram", "Paid at Bajeko Sekuwa"]
+
+    chunks = [chunk async for chunk in classifier.iter_classify(db_session, descriptions)]
+
+    # Rules first, then one chunk per transformer micro-batch; duplicate descriptions share a chunk
+    assert chunks[0] == ([1], ["Dining & Food"], [1.0])
+    assert [sorted(indices) for indices, _, _ in chunks[1:]] == [[0, 3], [2]]
+    assert sorted(row for indices, _, _ in chunks for row in indices) == [0, 1, 2, 3]
+
+    categories, _ = await classifier.classify(db_session, descriptions)
+    assert categories == ["others", "Dining & Food", "others", "others"]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_events_keep_row_indices_and_end_with_result():
+    async def pipeline():
+        yield "stage", "parsed"
+        yield "rows", [(1, {"text": "Uber ride", "category": "Travel", "confidence": "0.91"})]
+        yield "result", {"budget": {"Travel": 100.0}}
+
+    messages = await collect(pipeline())
+
+    assert messages[0] == {"type": "stage", "stage": "parsed"}
+    assert messages[1]["rows"] == [{"index": 1, "text": "Uber ride", "category": "Travel", "confidence": "0.91"}]
+    assert messages[-1] == {"type": "result", "budget": {"Travel": 100.0}}
+
+
+@pytest.mark.asyncio
+async def test_ndjson_events_report_failures_in_band():
+    async def pipeline():
+        yield "stage", "parsed"
+        raise InvalidStatement("a.xlsx")
+
+    messages = await collect(pipeline())
+
+    assert messages[-1] == {"type": "error", "detail": "Invalid Format"}
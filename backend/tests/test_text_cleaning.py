@@ -0,0 +1,33 @@
+import pytest
+
+try:
+    from Modelling.preprocessing import cleanTextPipeline, cleanTextPipeline_batch, shutdown_clean_pool
+    cleanTextPipeline("Paid for Dipesh Hair Cutting & Saloon")
+    NLTK_DATA = True
+except LookupError:
+    NLTK_DATA = False
+
+pytestmark = pytest.mark.skipif(not NLTK_DATA, reason="NLTK corpora are not installed")
+
+DESCRIPTIONS = [
+    "Paid for Dipesh Hair Cutting & Saloon",
+    "Ordered food from Foodmandu",
+    "Fund Transferred by Biplov Malla",
+    "Netflix Subscription renewed",
+    "Ordered food from Foodmandu",
+    "Paid at Bajeko Sekuwa #42",
+    ""
+]
+
+
+def test_batch_matches_the_per_row_pipeline():
+    assert cleanTextPipeline_batch(DESCRIPTIONS) == [cleanTextPipeline(text) for text in DESCRIPTIONS]
+
+
+def test_parallel_batch_matches_the_per_row_pipeline():
+    try:
+        cleaned = cleanTextPipeline_batch(DESCRIPTIONS, workers=2, parallel_threshold=1)
+    finally:
+        shutdown_clean_pool()
+
+    assert cleaned == [cleanTextPipeline(text) for text in DESCRIPTIONS]
@@ -1,30 +1,240 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from backend.database import Transaction
+from sqlalchemy import select, update, text, table, column
+from backend.database import Transaction, MonthlyCategoryTotal, dialect_insert
 import pandas as pd
+import numpy as np
+import hashlib
+import time
 import traceback
 
-async def insertTransaction(user_id: int, df: pd.DataFrame, db: AsyncSession):
-    for _, row in df.iterrows():
-        txn = Transaction(
-            user_id = user_id,
-            reference_code = str(row['Reference Code']),
-            date_time = pd.to_datetime(row['Date Time']),
-            description = str(row['Description']),
-            amount = float(row['Dr.'] if row['Dr.'] > 0 else row['Cr.']),
-            type = "expense" if row['Dr.'] > 0 else "income",
-            status = str(row['Status']),
-            balance = float(row['Balance (NPR)']),
-            channel = str(row['Channel']),
-            category = str(row['Category'])
+LOOKUP_CHUNK = 1000
+BACKFILL_CHUNK = 5000
+MISSING_REFERENCES = {"", "None", "nan", "NaN"}
+TRANSACTION_COLUMNS = ["user_id", "reference_code", "date_time", "description", "amount", "type",
+                       "status", "balance", "channel", "category", "content_hash"]
+
+def content_hashes(df: pd.DataFrame) -> pd.Series:
+    """Hash of the fields that identify a statement row."""
+    if df.empty:
+        return pd.Series(dtype = str, index = df.index)
+
+    def money(column):
+        return pd.to_numeric(df[column], errors = "coerce").round(2).map("{:.2f}".format)
+
+    fields = pd.DataFrame({
+        "date_time": pd.to_datetime(df['Date Time'], errors = "coerce").dt.strftime("%Y-%m-%dT%H:%M:%S").fillna(""),
+        "description": df['Description'].astype(str).str.strip(),
+        "dr": money('Dr.'),
+        "cr": money('Cr.'),
+        "balance": money('Balance (NPR)')
+    }, index = df.index)
+
+    return fields.agg("|".join, axis = 1).map(lambda row: hashlib.sha1(row.encode()).hexdigest())
+
+def transaction_keys(df: pd.DataFrame, hashes: pd.Series) -> pd.Series:
+    """
+    Dedupe key per row: "<reference code>#<content hash>", or "#<content hash>" when the statement
+    has no reference code. eSewa reuses a payment's reference code for its service charge row, so
+    the reference code alone does not identify a transaction.
+    """
+    references = df['Reference Code'].astype(str).str.strip()
+    references = references.where(~references.isin(MISSING_REFERENCES), "")
+    return references + "#" + hashes
+
+def _stored_hashes(rows: pd.DataFrame) -> pd.Series:
+    # Rows inserted before content_hash existed get it recomputed from their stored fields
+    missing = rows['content_hash'].isna()
+    if not missing.any():
+        return rows['content_hash']
+
+    legacy = rows[missing]
+    expense = legacy['type'] == "expense"
+    recomputed = content_hashes(pd.DataFrame({
+        "Date Time": legacy['date_time'],
+        "Description": legacy['description'],
+        "Dr.": legacy['amount'].where(expense, 0.0),
+        "Cr.": legacy['amount'].where(~expense, 0.0),
+        "Balance (NPR)": legacy['balance']
+    }))
+    return rows['content_hash'].where(~missing, recomputed)
+
+async def backfillContentHashes(db: AsyncSession, chunk_rows: int = BACKFILL_CHUNK):
+    """
+    Store content_hash on rows inserted before the column existed. Rows without a reference code
+    are only looked up by hash, so until then a re-uploaded statement would insert them again.
+    """
+    columns = [Transaction.id, Transaction.date_time, Transaction.description, Transaction.amount,
+               Transaction.type, Transaction.balance, Transaction.content_hash]
+    last_id = 0
+    updated = 0
+    while True:
+        stmt = (
+            select(*columns)
+            .where(Transaction.content_hash.is_(None), Transaction.id > last_id)
+            .order_by(Transaction.id)
+            .limit(chunk_rows)
         )
+        found = (await db.execute(stmt)).all()
+        if not found:
+            break
+
+        rows = pd.DataFrame(found, columns = [column.key for column in columns])
+        # ORM bulk UPDATE by primary key: one executemany per chunk
+        await db.execute(update(Transaction), [
+            {"id": int(row_id), "content_hash": content_hash}
+            for row_id, content_hash in zip(rows['id'], _stored_hashes(rows))
+        ])
+        await db.commit()
+
+        last_id = int(rows['id'].iloc[-1])
+        updated += len(rows)
+
+    if updated:
+        print(f"Backfilled content_hash on {updated} stored transactions")
+    return updated
+
+async def storedTransactionCategories(user_id: int, keys: pd.Series, db: AsyncSession):
+    """Return {key: category} for the keys this user already has stored."""
+    unique_keys = keys.unique()
+    references = sorted({key.split("#", 1)[0] for key in unique_keys} - {""})
+    hashes = [key[1:] for key in unique_keys if key.startswith("#")]
+
+    columns = [Transaction.reference_code, Transaction.content_hash, Transaction.date_time, Transaction.description,
+               Transaction.amount, Transaction.type, Transaction.balance, Transaction.category]
+    found = []
+    for column, values in ((Transaction.reference_code, references), (Transaction.content_hash, hashes)):
+        for start in range(0, len(values), LOOKUP_CHUNK):
+            stmt = select(*columns).where(
+                Transaction.user_id == user_id,
+                column.in_(values[start:start + LOOKUP_CHUNK])
+            )
+            found.extend((await db.execute(stmt)).all())
+
+    if not found:
+        return {}
 
-        db.add(txn)
+    rows = pd.DataFrame(found, columns = [column.key for column in columns])
+    stored_keys = transaction_keys(rows.rename(columns = {"reference_code": "Reference Code"}), _stored_hashes(rows))
+    return dict(zip(stored_keys, rows['category']))
+
+def monthly_rollup(records) -> list:
+    """Aggregate transaction records into monthly_category_totals rows."""
+    frame = pd.DataFrame.from_records(records, columns = TRANSACTION_COLUMNS)
+    expense = frame['type'] == "expense"
+    frame['month'] = frame['date_time'].dt.to_period("M").dt.start_time.dt.date
+    frame['debit'] = frame['amount'].where(expense, 0.0)
+    frame['credit'] = frame['amount'].where(~expense, 0.0)
+
+    totals = frame.groupby(["user_id", "month", "category"], as_index = False).agg(
+        debit = ("debit", "sum"),
+        credit = ("credit", "sum"),
+        count = ("amount", "size")
+    )
+    return totals.to_dict("records")
+
+async def _add_monthly_totals(db: AsyncSession, rows):
+    insert = dialect_insert(db)(MonthlyCategoryTotal)
+    table = MonthlyCategoryTotal.__table__
+    stmt = insert.on_conflict_do_update(
+        index_elements = ["user_id", "month", "category"],
+        set_ = {
+            "debit": table.c.debit + insert.excluded.debit,
+            "credit": table.c.credit + insert.excluded.credit,
+            "count": table.c.count + insert.excluded.count
+        }
+    )
+    await db.execute(stmt, rows)
+
+async def loadMonthlyTotals(user_id: int, db: AsyncSession) -> pd.DataFrame:
+    stmt = select(
+        MonthlyCategoryTotal.month, MonthlyCategoryTotal.category, MonthlyCategoryTotal.debit,
+        MonthlyCategoryTotal.credit, MonthlyCategoryTotal.count
+    ).where(MonthlyCategoryTotal.user_id == user_id)
+    return pd.DataFrame((await db.execute(stmt)).all(), columns = ["month", "category", "debit", "credit", "count"])
+
+def transaction_records(user_id: int, df: pd.DataFrame):
+    """Convert the statement column-wise into row tuples ordered like TRANSACTION_COLUMNS."""
+    dr = pd.to_numeric(df['Dr.'], errors = "coerce")
+    cr = pd.to_numeric(df['Cr.'], errors = "coerce")
+    expense = dr > 0
 
     try:
-        await db.flush() 
+        date_time = pd.to_datetime(df['Date Time'])
+    except ValueError:
+        # Statements that mix date formats need per-value parsing, like the old row-by-row insert
+        date_time = pd.to_datetime(df['Date Time'], format = "mixed")
+
+    columns = [
+        [int(user_id)] * len(df),
+        df['Reference Code'].astype(str).tolist(),
+        pd.DatetimeIndex(date_time).to_pydatetime().tolist(),
+        df['Description'].astype(str).tolist(),
+        dr.where(expense, cr).astype(float).tolist(),
+        np.where(expense, "expense", "income").tolist(),
+        df['Status'].astype(str).tolist(),
+        pd.to_numeric(df['Balance (NPR)'], errors = "coerce").astype(float).tolist(),
+        df['Channel'].astype(str).tolist(),
+        df['Category'].astype(str).tolist(),
+        content_hashes(df).tolist()
+    ]
+    return list(zip(*columns))
+
+STAGING_TABLE = "incoming_transactions"
+
+def _conflict_free_insert(db: AsyncSession):
+    # Two uploads of the same statement can race past storedTransactionCategories; the unique
+    # index settles it and only the rows that were actually inserted come back
+    return (
+        dialect_insert(db)(Transaction)
+        .on_conflict_do_nothing(index_elements = ["user_id", "reference_code", "content_hash"])
+        .returning(*(Transaction.__table__.c[column] for column in TRANSACTION_COLUMNS))
+    )
+
+async def _copy_records(db: AsyncSession, records):
+    # COPY cannot skip conflicts, so it fills a transaction-scoped staging table that is then
+    # moved over with INSERT ... SELECT ... ON CONFLICT DO NOTHING, all on the session's connection
+    columns = ", ".join(TRANSACTION_COLUMNS)
+    await db.execute(text(
+        f"CREATE TEMP TABLE {STAGING_TABLE} ON COMMIT DROP AS SELECT {columns} FROM transactions WITH NO DATA"
+    ))
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        STAGING_TABLE,
+        records = records,
+        columns = TRANSACTION_COLUMNS
+    )
+    staged = select(*(column(name) for name in TRANSACTION_COLUMNS)).select_from(table(STAGING_TABLE))
+    stmt = _conflict_free_insert(db).from_select(TRANSACTION_COLUMNS, staged)
+    return (await db.execute(stmt)).all()
+
+async def _insert_records(db: AsyncSession, records):
+    # executemany; SQLAlchemy batches it into multi-row INSERT ... VALUES ... RETURNING statements
+    rows = [dict(zip(TRANSACTION_COLUMNS, record)) for record in records]
+    return (await db.execute(_conflict_free_insert(db), rows)).all()
+
+async def insertTransaction(user_id: int, df: pd.DataFrame, db: AsyncSession):
+    """Insert the statement rows the user does not have yet and return how many were inserted."""
+    start = time.perf_counter()
+    records = transaction_records(user_id, df)
+    inserted = []
+
+    try:
+        if records:
+            if db.get_bind().dialect.driver == "asyncpg":
+                inserted = await _copy_records(db, records)
+            else:
+                inserted = await _insert_records(db, records)
+            # Rows skipped as conflicts were already counted by whichever upload stored them
+            if inserted:
+                await _add_monthly_totals(db, monthly_rollup(inserted))
         await db.commit()
     except Exception as e:
         await db.rollback()
         print(f"\nCommit failed: {e}\n")
         traceback.print_exc()
-        raise
\ No newline at end of file
+        raise
+
+    elapsed = time.perf_counter() - start
+    print(f"Inserted {len(inserted)} of {len(records)} transactions in {elapsed:.2f}s ({len(records) / elapsed if elapsed else 0:.0f} rows/s)")
+    return len(inserted)
@@ -101,7 +101,7 @@ const BudgetPage = ({ token, user, onAuthRequired }) => {
             </label>
             <input
               type="file"
-              accept=".xlsx,.xls"
+              accept=".xlsx,.xls,.csv,.parquet"
               multiple
               onChange={handleFileChange}
               className="w-full px-5 py-4 bg-gray-900 bg-opacity-50 text-white rounded-xl focus:outline-none focus:ring-2 focus:ring-blue-500 border border-gray-700 focus:border-blue-500 transition"